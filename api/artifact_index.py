@@ -0,0 +1,443 @@
+"""
+Artifact Index
+A SQLite index over /ingest artifacts, so questions like "which URLs failed
+verification this week" or "toxicity mix for r/science" are answered with
+indexed queries instead of loading every toxicity_output file.
+
+The artifact writer adds each document as it is written. Artifacts saved
+before the index existed are loaded with the backfill command (run from
+api/; already indexed artifacts are skipped):
+
+    python -m artifact_index                       # ./artifacts into artifacts/index.db
+    python -m artifact_index old_artifacts --db artifacts/index.db
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from artifact_store import ARTIFACTS_DIR
+
+
+# Set to an empty string to turn the index off
+ARTIFACT_INDEX_DB = os.environ.get("TRUSTLENS_ARTIFACT_INDEX_DB", os.path.join(ARTIFACTS_DIR, "index.db"))
+
+# Most rows a query returns
+MAX_QUERY_LIMIT = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL,
+    source_filename TEXT NOT NULL,
+    subreddit TEXT,
+    post_id TEXT,
+    created_at REAL NOT NULL,
+    total_comments INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS comments (
+    artifact_id INTEGER NOT NULL,
+    comment_index INTEGER NOT NULL,
+    comment_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    toxicity_level TEXT NOT NULL,
+    max_toxicity REAL,
+    toxicity_scores TEXT,
+    evidence_status TEXT NOT NULL,
+    evidence_present TEXT,
+    evidence_verified TEXT,
+    PRIMARY KEY (artifact_id, comment_index)
+);
+CREATE TABLE IF NOT EXISTS evidence_urls (
+    artifact_id INTEGER NOT NULL,
+    comment_index INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    final_url TEXT,
+    domain TEXT,
+    verified INTEGER,
+    reason TEXT,
+    http_status INTEGER,
+    category TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_source ON artifacts (source_filename);
+CREATE INDEX IF NOT EXISTS idx_artifacts_subreddit ON artifacts (subreddit, created_at);
+CREATE INDEX IF NOT EXISTS idx_artifacts_created ON artifacts (created_at);
+CREATE INDEX IF NOT EXISTS idx_comments_toxicity ON comments (toxicity_level);
+CREATE INDEX IF NOT EXISTS idx_comments_evidence ON comments (evidence_status);
+CREATE INDEX IF NOT EXISTS idx_urls_domain ON evidence_urls (domain, created_at);
+CREATE INDEX IF NOT EXISTS idx_urls_verified ON evidence_urls (verified, created_at);
+"""
+
+# Columns returned by the comment and URL queries
+COMMENT_COLUMNS = (
+    "a.path", "a.source_filename", "a.subreddit", "a.created_at", "c.comment_id", "c.text",
+    "c.toxicity_level", "c.max_toxicity", "c.toxicity_scores", "c.evidence_status",
+    "c.evidence_present", "c.evidence_verified"
+)
+URL_COLUMNS = (
+    "a.path", "a.source_filename", "a.subreddit", "u.created_at", "c.comment_id", "u.url",
+    "u.final_url", "u.domain", "u.verified", "u.reason", "u.http_status", "u.category"
+)
+
+
+def _column_name(column: str) -> str:
+    return column.split(".", 1)[1]
+
+
+def _max_score(scores: Dict[str, Any]) -> Optional[float]:
+    values = [v for v in scores.values() if isinstance(v, (int, float))]
+    return max(values) if values else None
+
+
+def _as_flag(value: Any) -> Optional[int]:
+    return None if value is None else int(bool(value))
+
+
+def artifact_key(path: str, ingest_id: Optional[str] = None) -> str:
+    """
+    Index key for an artifact: its resolved absolute path, so same-named files
+    in different directories stay distinct. Ingests inside a jsonl file or
+    Parquet directory get "#<ingest_id>" appended.
+    """
+    key = os.path.realpath(path)
+    return f"{key}#{ingest_id}" if ingest_id else key
+
+
+class ArtifactIndex:
+    """
+    Usage:
+        index = ArtifactIndex("artifacts/index.db")
+        index.add(artifact_key(path), path, document)
+        index.query_urls(verified=False, since=time.time() - 7 * 86400)
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: SQLite file (created with its directory if missing)
+        """
+        self.db_path = db_path
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._upgrade_keys()
+
+    def _upgrade_keys(self):
+        # Older indexes keyed artifacts by bare file name ("name" or "name#ingest_id")
+        with self._lock:
+            rows = self._db.execute("SELECT id, key, path FROM artifacts").fetchall()
+            upgraded = [(artifact_key(path, key.partition("#")[2] or None), row_id)
+                        for row_id, key, path in rows if not os.path.isabs(key.partition("#")[0])]
+            if upgraded:
+                self._db.executemany("UPDATE OR IGNORE artifacts SET key = ? WHERE id = ?", upgraded)
+
+    # ---------- writing ----------
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM artifacts WHERE key = ?", (key,)).fetchone() is not None
+
+    def add(self, key: str, path: str, document: Dict[str, Any], created_at: Optional[float] = None) -> bool:
+        """
+        Index one /ingest document.
+
+        Args:
+            key: Unique artifact key, from artifact_key()
+            path: Where the artifact lives
+            document: The formatted /ingest output
+            created_at: When it was written (default now)
+
+        Returns:
+            False if key was already indexed
+        """
+        created_at = time.time() if created_at is None else created_at
+        post = document.get("post") or {}
+        comments = document.get("comments", [])
+
+        comment_rows = []
+        url_rows = []
+        for i, comment in enumerate(comments):
+            scores = comment.get("toxicity_scores") or {}
+            comment_rows.append((
+                i, comment.get("comment_id", f"comment_{i}"), comment.get("text", ""),
+                comment.get("toxicity_level", "Neutral"), _max_score(scores),
+                json.dumps(scores) if scores else None, comment.get("evidence_status", "None"),
+                comment.get("evidence_present"), comment.get("evidence_verified")
+            ))
+            for result in comment.get("evidence_results") or []:
+                url = result.get("input_url") or result.get("normalized_url") or result.get("final_url")
+                if not url:
+                    continue
+                domain = result.get("domain")
+                url_rows.append((
+                    i, url, result.get("final_url"), domain.lower() if domain else None,
+                    _as_flag(result.get("verified")), result.get("reason"), result.get("status"),
+                    result.get("category"), created_at
+                ))
+
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._db.execute(
+                    "INSERT INTO artifacts (key, path, source_filename, subreddit, post_id, created_at, total_comments)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO NOTHING",
+                    (key, path, document.get("source_filename") or "", post.get("subreddit"),
+                     post.get("id"), created_at, document.get("total_comments", len(comments)))
+                )
+                if cursor.rowcount == 0:
+                    self._db.execute("ROLLBACK")
+                    return False
+                artifact_id = cursor.lastrowid
+                self._db.executemany(
+                    "INSERT INTO comments (artifact_id, comment_index, comment_id, text, toxicity_level,"
+                    " max_toxicity, toxicity_scores, evidence_status, evidence_present, evidence_verified)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(artifact_id, *row) for row in comment_rows]
+                )
+                self._db.executemany(
+                    "INSERT INTO evidence_urls (artifact_id, comment_index, url, final_url, domain, verified,"
+                    " reason, http_status, category, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(artifact_id, *row) for row in url_rows]
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return True
+
+    # ---------- queries ----------
+
+    def _select(self, columns: Tuple[str, ...], sql: str, params: List[Any]) -> List[Dict[str, Any]]:
+        names = [_column_name(c) for c in columns]
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [dict(zip(names, row)) for row in rows]
+
+    @staticmethod
+    def _where(filters: List[Tuple[str, Any]]) -> Tuple[str, List[Any]]:
+        """AND together the "column op ?" conditions whose value was given."""
+        clauses = [clause for clause, value in filters if value is not None]
+        params = [value for _, value in filters if value is not None]
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query_comments(
+        self,
+        toxicity_level: Optional[str] = None,
+        evidence_status: Optional[str] = None,
+        subreddit: Optional[str] = None,
+        source_filename: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Indexed comments matching every given filter, newest and most toxic first."""
+        where, params = self._where([
+            ("c.toxicity_level = ?", toxicity_level),
+            ("c.evidence_status = ?", evidence_status),
+            ("a.subreddit = ?", subreddit),
+            ("a.source_filename = ?", source_filename),
+            ("a.created_at >= ?", since),
+            ("a.created_at < ?", until)
+        ])
+        sql = (
+            f"SELECT {', '.join(COMMENT_COLUMNS)} FROM comments c JOIN artifacts a ON a.id = c.artifact_id"
+            f"{where} ORDER BY a.created_at DESC, c.max_toxicity DESC LIMIT ?"
+        )
+        rows = self._select(COMMENT_COLUMNS, sql, params + [min(max(1, limit), MAX_QUERY_LIMIT)])
+        for row in rows:
+            row["toxicity_scores"] = json.loads(row["toxicity_scores"]) if row["toxicity_scores"] else {}
+        return rows
+
+    def query_urls(
+        self,
+        domain: Optional[str] = None,
+        verified: Optional[bool] = None,
+        reason: Optional[str] = None,
+        subreddit: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Checked evidence URLs matching every given filter, newest first."""
+        where, params = self._where([
+            ("u.domain = ?", domain.lower() if domain else None),
+            ("u.verified = ?", _as_flag(verified)),
+            ("u.reason = ?", reason),
+            ("a.subreddit = ?", subreddit),
+            ("u.created_at >= ?", since),
+            ("u.created_at < ?", until)
+        ])
+        sql = (
+            f"SELECT {', '.join(URL_COLUMNS)} FROM evidence_urls u"
+            " JOIN artifacts a ON a.id = u.artifact_id"
+            " JOIN comments c ON c.artifact_id = u.artifact_id AND c.comment_index = u.comment_index"
+            f"{where} ORDER BY u.created_at DESC LIMIT ?"
+        )
+        rows = self._select(URL_COLUMNS, sql, params + [min(max(1, limit), MAX_QUERY_LIMIT)])
+        for row in rows:
+            row["verified"] = None if row["verified"] is None else bool(row["verified"])
+        return rows
+
+    def toxicity_distribution(
+        self,
+        subreddit: Optional[str] = None,
+        source_filename: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None
+    ) -> Dict[str, int]:
+        """Comment count per toxicity level."""
+        where, params = self._where([
+            ("a.subreddit = ?", subreddit),
+            ("a.source_filename = ?", source_filename),
+            ("a.created_at >= ?", since),
+            ("a.created_at < ?", until)
+        ])
+        sql = (
+            "SELECT c.toxicity_level, COUNT(*) FROM comments c JOIN artifacts a ON a.id = c.artifact_id"
+            f"{where} GROUP BY c.toxicity_level"
+        )
+        with self._lock:
+            counts = dict(self._db.execute(sql, params).fetchall())
+        return {level: counts.get(level, 0) for level in ("Toxic", "Mild", "Neutral")}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = [
+                self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("artifacts", "comments", "evidence_urls")
+            ]
+        return {
+            "db_path": self.db_path,
+            "artifacts": counts[0],
+            "comments": counts[1],
+            "evidence_urls": counts[2]
+        }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+# ---------- backfill ----------
+
+def _documents_from_rows(rows: List[Dict[str, Any]]) -> Iterator[Tuple[str, Dict[str, Any], float]]:
+    """Regroup per-comment store rows (jsonl/parquet) into (ingest_id, document, created_at)."""
+    ingests: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+    for row in rows:
+        ingests.setdefault(row.get("ingest_id", ""), []).append(row)
+    for ingest_id, comments in ingests.items():
+        first = comments[0]
+        for comment in comments:
+            # Parquet stores the free-form fields as JSON text
+            if isinstance(comment.get("evidence_results"), str):
+                comment["evidence_results"] = json.loads(comment["evidence_results"])
+        document = {
+            "source_filename": first.get("source_filename", ""),
+            "post": {"subreddit": first.get("subreddit"), "id": first.get("post_id")},
+            "total_comments": len(comments),
+            "comments": comments
+        }
+        yield ingest_id, document, first.get("created_at") or time.time()
+
+
+def backfill(index: ArtifactIndex, directory: str = ARTIFACTS_DIR) -> Dict[str, int]:
+    """
+    Index every artifact in directory that isn't indexed yet.
+
+    Returns:
+        Counts of indexed, skipped (already indexed), empty (reserved names
+        whose write hasn't landed, or never will after a crash) and failed
+        artifacts
+    """
+    from artifact_writer import FILE_EXTENSIONS, JSONL_NAME, PARQUET_NAME, load_artifact, pq
+
+    counts = {"indexed": 0, "skipped": 0, "empty": 0, "failed": 0}
+    extensions = tuple(set(FILE_EXTENSIONS.values()))
+
+    def add(key: str, path: str, document: Dict[str, Any], created_at: float):
+        counts["indexed" if index.add(key, path, document, created_at) else "skipped"] += 1
+
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.startswith("."):
+            continue
+        if name.endswith(extensions):
+            if index.contains(artifact_key(path)):
+                counts["skipped"] += 1
+                continue
+            try:
+                if os.path.getsize(path) == 0:
+                    counts["empty"] += 1
+                    continue
+                document = load_artifact(path)
+            except (OSError, ValueError, RuntimeError) as e:
+                print(f"Warning: could not index {path}: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+                counts["failed"] += 1
+                continue
+            if isinstance(document, dict) and "comments" in document:
+                add(artifact_key(path), path, document, os.path.getmtime(path))
+        elif name == JSONL_NAME:
+            with open(path, encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            for ingest_id, document, created_at in _documents_from_rows(rows):
+                add(artifact_key(path, ingest_id), path, document, created_at)
+        elif name == PARQUET_NAME and os.path.isdir(path):
+            if pq is None:
+                print(f"Warning: pyarrow is not installed; skipping {path}", file=sys.stderr, flush=True)
+                continue
+            for part in sorted(os.listdir(path)):
+                if part.startswith(".") or not part.endswith(".parquet"):
+                    continue
+                rows = pq.read_table(os.path.join(path, part)).to_pylist()
+                for ingest_id, document, created_at in _documents_from_rows(rows):
+                    add(artifact_key(path, ingest_id), path, document, created_at)
+    return counts
+
+
+# Global index instance (singleton pattern)
+_global_index: Optional[ArtifactIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_artifact_index() -> Optional[ArtifactIndex]:
+    """Get or create the global artifact index; None when TRUSTLENS_ARTIFACT_INDEX_DB is empty."""
+    global _global_index
+    if _global_index is None and ARTIFACT_INDEX_DB:
+        with _index_lock:
+            if _global_index is None:
+                _global_index = ArtifactIndex(ARTIFACT_INDEX_DB)
+    return _global_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index existing /ingest artifacts")
+    parser.add_argument("directories", nargs="*", default=[ARTIFACTS_DIR], help="Artifact directories to scan")
+    parser.add_argument("--db", default=ARTIFACT_INDEX_DB or os.path.join(ARTIFACTS_DIR, "index.db"),
+                        help="Index database to fill")
+    args = parser.parse_args()
+
+    index = ArtifactIndex(args.db)
+    for directory in args.directories:
+        started = time.perf_counter()
+        counts = backfill(index, directory)
+        print(f"{directory}: indexed {counts['indexed']}, already indexed {counts['skipped']}, "
+              f"empty {counts['empty']}, failed {counts['failed']} ({time.perf_counter() - started:.2f}s)")
+    print(json.dumps(index.stats(), indent=2))
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Artifact Store
+Allocates names for /ingest result files in O(1) and writes them atomically.
+
+Two naming schemes:
+  numbered  toxicity_output_<n>.json, the original layout. n comes from a
+            persisted counter file; the directory is only scanned once, to
+            seed the counter when it doesn't exist yet.
+  time      toxicity_output_<UTC timestamp>_<random>.json, time-sortable and
+            unique without any shared state.
+
+Files are written to a temporary name and then hard-linked into place. A
+link never overwrites, so concurrent writers (threads or processes) can't
+clobber each other; on a collision the next id is tried. When the path has to
+be known before the content is ready (background writes), reserve() claims
+the name with an empty placeholder that fill() later replaces atomically
+(or release() removes if the content never comes).
+"""
+import json
+import os
+import re
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+ARTIFACTS_DIR = os.environ.get("TRUSTLENS_ARTIFACTS_DIR", "artifacts")
+ARTIFACT_NAMING = os.environ.get("TRUSTLENS_ARTIFACT_NAMING", "numbered").lower()
+
+NAMING_SCHEMES = ("numbered", "time")
+
+# Give up rather than spin if something keeps taking our names
+MAX_ALLOCATION_ATTEMPTS = 1000
+
+
+def time_id() -> str:
+    """A unique, time-sortable id such as 20240131T235959123Z_1a2b3c4d."""
+    now = time.time()
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now))
+    return f"{stamp}{int(now * 1000) % 1000:03d}Z_{secrets.token_hex(4)}"
+
+
+class ArtifactStore:
+    """
+    Usage:
+        store = ArtifactStore("artifacts")
+        path = store.save({"comments": [...]})   # artifacts/toxicity_output_17.json
+    """
+
+    def __init__(self, directory: str = ARTIFACTS_DIR, prefix: str = "toxicity_output",
+                 ext: str = ".json", naming: str = ARTIFACT_NAMING):
+        """
+        Args:
+            directory: Where artifacts are written (created if missing)
+            prefix: Filename prefix
+            ext: Filename extension, including the dot
+            naming: "numbered" or "time"
+        """
+        if naming not in NAMING_SCHEMES:
+            print(f"Warning: unknown artifact naming '{naming}'; using numbered", file=sys.stderr, flush=True)
+            naming = "numbered"
+        self.directory = directory
+        self.prefix = prefix
+        self.ext = ext
+        self.naming = naming
+        self.counter_path = os.path.join(directory, f".{prefix}.counter")
+        self._lock = threading.Lock()
+        self._counter: Optional[int] = None
+
+    # ---------- id allocation ----------
+
+    def _scan_highest(self) -> int:
+        """Highest existing number; only used to seed a missing counter."""
+        pat = re.compile(rf"^{re.escape(self.prefix)}_(\d+){re.escape(self.ext)}$")
+        highest = 0
+        for name in os.listdir(self.directory):
+            m = pat.match(name)
+            if m:
+                highest = max(highest, int(m.group(1)))
+        return highest
+
+    def _load_counter(self) -> int:
+        try:
+            with open(self.counter_path, encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return self._scan_highest()
+
+    def _store_counter(self, value: int):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".counter-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(str(value))
+            os.replace(tmp, self.counter_path)
+        except OSError:
+            # The counter is only a hint; collisions are still caught on link
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+    def _next_id(self) -> str:
+        if self.naming == "time":
+            return time_id()
+        if self._counter is None:
+            self._counter = self._load_counter()
+        self._counter += 1
+        return str(self._counter)
+
+    def path_for(self, artifact_id: str) -> str:
+        return os.path.join(self.directory, f"{self.prefix}_{artifact_id}{self.ext}")
+
+    # ---------- writing ----------
+
+    def _allocate(self, claim: Callable[[str], None]) -> Tuple[str, str]:
+        """
+        Give the next id whose path claim() manages to take; claim raises
+        FileExistsError when another writer got there first.
+        """
+        with self._lock:
+            for _ in range(MAX_ALLOCATION_ATTEMPTS):
+                artifact_id = self._next_id()
+                path = self.path_for(artifact_id)
+                try:
+                    claim(path)
+                except FileExistsError:
+                    continue
+                if self.naming == "numbered":
+                    self._store_counter(self._counter)
+                return artifact_id, path
+        raise RuntimeError(f"Could not allocate an artifact name in {self.directory}")
+
+    def _publish(self, tmp_path: str) -> Tuple[str, str]:
+        """Link the finished temp file to the next free name; returns (id, path)."""
+        def claim(path: str):
+            try:
+                os.link(tmp_path, path)
+            except FileExistsError:
+                raise
+            except OSError:
+                # Filesystem without hard links: reserve the name exclusively, then replace it
+                _create_exclusive(path)
+                os.replace(tmp_path, path)
+
+        return self._allocate(claim)
+
+    def _write_temp(self, write_body: Callable[[Any], None], mode: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-", suffix=self.ext)
+        try:
+            # mkstemp creates owner-only files; artifacts are ordinary output
+            os.chmod(tmp_path, 0o644)
+            with os.fdopen(fd, mode, **({"encoding": "utf-8"} if "b" not in mode else {})) as f:
+                write_body(f)
+        except BaseException:
+            _unlink_quietly(tmp_path)
+            raise
+        return tmp_path
+
+    def write(self, write_body: Callable[[Any], None], mode: str = "w") -> Tuple[str, str]:
+        """
+        Write an artifact atomically.
+
+        Args:
+            write_body: Called with an open temp file to write the content
+            mode: "w" for text, "wb" for bytes
+
+        Returns:
+            (artifact_id, path)
+        """
+        tmp_path = self._write_temp(write_body, mode)
+        try:
+            return self._publish(tmp_path)
+        finally:
+            _unlink_quietly(tmp_path)
+
+    def reserve(self) -> Tuple[str, str]:
+        """
+        Claim the next free name now, for content written later with fill().
+
+        An empty placeholder holds the name until then, so the path can be
+        reported before the artifact is written.
+
+        Returns:
+            (artifact_id, path)
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        return self._allocate(_create_exclusive)
+
+    def fill(self, path: str, write_body: Callable[[Any], None], mode: str = "w"):
+        """
+        Atomically replace a reserved placeholder with the finished content.
+
+        If the write fails the placeholder is released, so no empty artifact
+        is left behind under the reserved name.
+        """
+        try:
+            tmp_path = self._write_temp(write_body, mode)
+        except BaseException:
+            self.release(path)
+            raise
+        try:
+            os.replace(tmp_path, path)
+        except BaseException:
+            _unlink_quietly(tmp_path)
+            self.release(path)
+            raise
+
+    def release(self, path: str):
+        """Give up a reserved name that will never be filled, removing its placeholder."""
+        _unlink_quietly(path)
+
+    def save(self, document: Dict[str, Any]) -> str:
+        """Write document as indented JSON; returns the artifact path."""
+        _, path = self.write(lambda f: json.dump(document, f, ensure_ascii=False, indent=2))
+        return path
+
+
+def _create_exclusive(path: str):
+    os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+
+
+def _unlink_quietly(path: str):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+# Global store instance (singleton pattern)
+_global_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Get or create the global /ingest artifact store."""
+    global _global_store
+    if _global_store is None:
+        with _store_lock:
+            if _global_store is None:
+                _global_store = ArtifactStore()
+    return _global_store
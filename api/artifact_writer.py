@@ -0,0 +1,296 @@
+"""
+Artifact Writer
+Encodes /ingest results and writes them on a background thread, so the
+request only pays for formatting, not for serialization and disk I/O.
+
+Encodings (TRUSTLENS_ARTIFACT_ENCODING):
+  json         compact JSON, one file per ingest (default)
+  json-pretty  indented JSON, the original format
+  gzip         compact JSON, gzip-compressed (.json.gz)
+  zstd         compact JSON, zstd-compressed (.json.zst; needs zstandard)
+  jsonl        one line per comment, appended to toxicity_output.jsonl
+  parquet      one part file per ingest in the toxicity_output.parquet/
+               dataset directory (needs pyarrow)
+
+The per-ingest files keep the /ingest document layout. The jsonl and parquet
+stores hold one row per formatted comment, tagged with an ingest id and the
+source, for batch analytics across many ingests. Every document is also
+added to the artifact index (see artifact_index.py) once it is written.
+
+raw_data repeats the model and evidence output the comments already carry;
+TRUSTLENS_ARTIFACT_RAW_DATA=0 leaves it out of the per-ingest files.
+"""
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from artifact_index import ArtifactIndex, artifact_key, get_artifact_index
+from artifact_store import ARTIFACTS_DIR, ArtifactStore, time_id
+from performance_monitor import get_monitor
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+
+ARTIFACT_ENCODING = os.environ.get("TRUSTLENS_ARTIFACT_ENCODING", "json").lower()
+ARTIFACT_RAW_DATA = os.environ.get("TRUSTLENS_ARTIFACT_RAW_DATA", "1").lower() in ("1", "true", "yes")
+# Write on a background thread (0 writes before the response is returned)
+ARTIFACT_BACKGROUND = os.environ.get("TRUSTLENS_ARTIFACT_BACKGROUND", "1").lower() in ("1", "true", "yes")
+GZIP_LEVEL = int(os.environ.get("TRUSTLENS_ARTIFACT_GZIP_LEVEL", "6"))
+ZSTD_LEVEL = int(os.environ.get("TRUSTLENS_ARTIFACT_ZSTD_LEVEL", "3"))
+
+ENCODINGS = ("json", "json-pretty", "gzip", "zstd", "jsonl", "parquet")
+
+# Encodings written as one file per ingest, and their extensions
+FILE_EXTENSIONS = {
+    "json": ".json",
+    "json-pretty": ".json",
+    "gzip": ".json.gz",
+    "zstd": ".json.zst"
+}
+
+JSONL_NAME = "toxicity_output.jsonl"
+PARQUET_NAME = "toxicity_output.parquet"
+
+# Nested comment fields with no fixed shape; stored as JSON text in Parquet
+PARQUET_JSON_COLUMNS = ("evidence_results", "pattern_detection")
+
+
+def select_encoding(requested: str) -> str:
+    """Return requested, or the nearest encoding whose dependencies are installed."""
+    if requested not in ENCODINGS:
+        print(f"Warning: unknown artifact encoding '{requested}'; using json", file=sys.stderr, flush=True)
+        return "json"
+    if requested == "zstd" and zstandard is None:
+        print("Warning: zstandard is not installed; writing gzip artifacts", file=sys.stderr, flush=True)
+        return "gzip"
+    if requested == "parquet" and pq is None:
+        print("Warning: pyarrow is not installed; writing jsonl artifacts", file=sys.stderr, flush=True)
+        return "jsonl"
+    return requested
+
+
+def encode_document(document: Dict[str, Any], encoding: str) -> bytes:
+    """Serialize one /ingest document for a per-ingest file encoding."""
+    if encoding == "json-pretty":
+        body = json.dumps(document, ensure_ascii=False, indent=2)
+    else:
+        body = json.dumps(document, ensure_ascii=False, separators=(",", ":"))
+    data = body.encode("utf-8")
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return data
+
+
+def load_artifact(path: str) -> Dict[str, Any]:
+    """Read back a per-ingest artifact in any of the file encodings."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".gz"):
+        data = gzip.decompress(data)
+    elif path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return json.loads(data)
+
+
+def comment_rows(document: Dict[str, Any], ingest_id: str, created_at: float) -> List[Dict[str, Any]]:
+    """One row per formatted comment, tagged with where it came from."""
+    post = document.get("post") or {}
+    source = {
+        "ingest_id": ingest_id,
+        "created_at": created_at,
+        "source_filename": document.get("source_filename", ""),
+        "subreddit": post.get("subreddit"),
+        "post_id": post.get("id")
+    }
+    return [{**source, **comment} for comment in document.get("comments", [])]
+
+
+class ArtifactWriter:
+    """
+    Usage:
+        writer = ArtifactWriter("artifacts", encoding="gzip")
+        path = writer.save(document)   # returns at once; written in the background
+        writer.flush()                 # wait for queued writes
+    """
+
+    def __init__(self, directory: str = ARTIFACTS_DIR, encoding: str = ARTIFACT_ENCODING,
+                 raw_data: bool = ARTIFACT_RAW_DATA, background: bool = ARTIFACT_BACKGROUND,
+                 index: Optional[ArtifactIndex] = None):
+        """
+        Args:
+            directory: Where artifacts are written
+            encoding: One of ENCODINGS
+            raw_data: Keep the raw_data section in per-ingest files
+            background: Write on a background thread instead of in save()
+            index: Artifact index to add each written document to
+        """
+        self.directory = directory
+        self.encoding = select_encoding(encoding)
+        self.raw_data = raw_data
+        self.index = index
+        self.store = ArtifactStore(directory, ext=FILE_EXTENSIONS.get(self.encoding, ".json"))
+        self.jsonl_path = os.path.join(directory, JSONL_NAME)
+        self.parquet_store = ArtifactStore(os.path.join(directory, PARQUET_NAME), prefix="part",
+                                           ext=".parquet", naming="time")
+
+        # One thread keeps writes (and jsonl appends) in submission order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifact-writer") if background else None
+        self._pending: Set[Future] = set()
+        self._lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+        self.bytes_written = 0
+
+    # ---------- public API ----------
+
+    def save(self, document: Dict[str, Any]) -> str:
+        """
+        Queue document to be written.
+
+        Returns:
+            The artifact file, or for jsonl/parquet the store it is added to
+        """
+        created_at = time.time()
+        if self.encoding in FILE_EXTENSIONS:
+            if not self.raw_data:
+                document = {k: v for k, v in document.items() if k != "raw_data"}
+            _, path = self.store.reserve()
+            self._run(partial(self._write_file, path, document), artifact_key(path), path, document, created_at)
+            return path
+
+        ingest_id = time_id()
+        rows = comment_rows(document, ingest_id, created_at)
+        if self.encoding == "jsonl":
+            path = self.jsonl_path
+            write = partial(self._append_jsonl, rows)
+        else:
+            path = self.parquet_store.directory
+            write = partial(self._write_parquet, rows)
+        self._run(write, artifact_key(path, ingest_id), path, document, created_at)
+        return path
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until every write queued so far has finished."""
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.result(timeout=timeout)
+
+    def close(self):
+        """Finish queued writes and stop the writer thread."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "encoding": self.encoding,
+            "raw_data": self.raw_data,
+            "background": self._executor is not None,
+            "pending": pending,
+            "written": self.written,
+            "failed": self.failed,
+            "bytes_written": self.bytes_written
+        }
+
+    # ---------- writing ----------
+
+    def _run(self, job: Callable[[], int], key: str, path: str, document: Dict[str, Any], created_at: float):
+        if self._executor is None:
+            self._execute(job, key, path, document, created_at)
+            return
+        future = self._executor.submit(self._execute, job, key, path, document, created_at)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+
+    def _execute(self, job: Callable[[], int], key: str, path: str, document: Dict[str, Any], created_at: float):
+        try:
+            with get_monitor().measure_operation("artifact_write"):
+                size = job()
+        except Exception as e:
+            # Nobody is waiting on a background write; report it and carry on
+            with self._lock:
+                self.failed += 1
+            print(f"Warning: artifact write failed: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+            return
+        with self._lock:
+            self.written += 1
+            self.bytes_written += size
+
+        if self.index is not None:
+            try:
+                self.index.add(key, path, document, created_at)
+            except Exception as e:
+                # The artifact is safe on disk; backfill can index it later
+                print(f"Warning: could not index {key}: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+
+    def _done(self, future: Future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def _write_file(self, path: str, document: Dict[str, Any]) -> int:
+        try:
+            data = encode_document(document, self.encoding)
+        except BaseException:
+            self.store.release(path)
+            raise
+        self.store.fill(path, lambda f: f.write(data), "wb")
+        return len(data)
+
+    def _append_jsonl(self, rows: List[Dict[str, Any]]) -> int:
+        data = "".join(json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n" for row in rows)
+        data = data.encode("utf-8")
+        os.makedirs(self.directory, exist_ok=True)
+        # One write per ingest, so concurrent appenders never interleave lines
+        fd = os.open(self.jsonl_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        return len(data)
+
+    def _write_parquet(self, rows: List[Dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        for row in rows:
+            for column in PARQUET_JSON_COLUMNS:
+                row[column] = json.dumps(row.get(column), ensure_ascii=False)
+        table = pa.Table.from_pylist(rows)
+        _, path = self.parquet_store.write(lambda f: pq.write_table(table, f), "wb")
+        return os.path.getsize(path)
+
+
+# Global writer instance (singleton pattern)
+_global_writer: Optional[ArtifactWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_artifact_writer() -> ArtifactWriter:
+    """Get or create the global /ingest artifact writer."""
+    global _global_writer
+    if _global_writer is None:
+        with _writer_lock:
+            if _global_writer is None:
+                _global_writer = ArtifactWriter(index=get_artifact_index())
+    return _global_writer
@@ -0,0 +1,171 @@
+"""
+Result Caches
+Bounded in-memory LRU caches with per-entry TTLs, optionally backed by a local
+SQLite file so entries survive server restarts.
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+# Marks a miss, since None is also what get() returns for one
+_MISS = object()
+
+
+class TieredCache:
+    """
+    Two-tier key/value cache: a bounded LRU in memory in front of an optional
+    SQLite store. Values must be JSON-serializable when the disk tier is used.
+
+    Usage:
+        cache = TieredCache("url_verification", max_entries=10000, db_path="cache.db")
+        cache.set(key, value, ttl=3600)
+        value = cache.get(key)  # None on miss or expiry
+
+    Coroutines use aget()/aset(), which run the SQLite part on a worker
+    thread. The memory tier and the disk tier have separate locks, so a slow
+    disk read or write never holds up a memory hit.
+    """
+
+    # Expired rows are purged from disk every this many writes
+    PURGE_EVERY = 500
+
+    def __init__(self, name: str, max_entries: int = 10000, db_path: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            name: Cache name; several caches can share one SQLite file
+            max_entries: Maximum number of entries kept in memory
+            db_path: Path of the SQLite file for the disk tier (None = memory only)
+        """
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.db_path = db_path
+
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._writes = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                " name TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, PRIMARY KEY (name, key))"
+            )
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is _MISS:
+            value = self._get_disk(key, now)
+        return None if value is _MISS else value
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """get() for coroutines: memory hits return at once, disk reads run on a worker thread."""
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is _MISS and self._db is not None:
+            value = await asyncio.to_thread(self._get_disk, key, now)
+        return None if value is _MISS else value
+
+    def set(self, key: str, value: Any, ttl: float):
+        """Store a value for ttl seconds (ttl <= 0 means don't cache)."""
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._store_in_memory(key, expires_at, value)
+        self._set_disk(key, value, expires_at)
+
+    async def aset(self, key: str, value: Any, ttl: float):
+        """set() for coroutines: the disk write runs on a worker thread."""
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._store_in_memory(key, expires_at, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._set_disk, key, value, expires_at)
+
+    def _get_memory(self, key: str, now: float) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISS
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+            del self._entries[key]
+            return _MISS
+
+    def _get_disk(self, key: str, now: float) -> Any:
+        with self._db_lock:
+            if self._db is None:
+                return _MISS
+            row = self._db.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE name = ? AND key = ?",
+                (self.name, key)
+            ).fetchone()
+        if row is None or row[1] <= now:
+            return _MISS
+        value = json.loads(row[0])
+        with self._lock:
+            self._store_in_memory(key, row[1], value)
+        return value
+
+    def _set_disk(self, key: str, value: Any, expires_at: float):
+        with self._db_lock:
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache_entries (name, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.name, key, json.dumps(value, ensure_ascii=False), expires_at)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._db.execute(
+                    "DELETE FROM cache_entries WHERE name = ? AND expires_at <= ?",
+                    (self.name, time.time())
+                )
+
+    def _store_in_memory(self, key: str, expires_at: float, value: Any):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._entries.clear()
+        with self._db_lock:
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache_entries WHERE name = ?", (self.name,))
+
+    def stats(self) -> Dict[str, Any]:
+        """Current size of the cache."""
+        return {
+            "name": self.name,
+            "memory_entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "persistent": self._db is not None
+        }
+
+    def close(self):
+        """Close the SQLite connection, if any."""
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -1,9 +1,15 @@
-import re, json, socket, ipaddress, requests, tldextract
+import os, re, ssl, json, socket, asyncio, ipaddress, httpx, tldextract
 from urllib.parse import urlparse, urlunparse
-from bs4 import BeautifulSoup
 from typing import List, Dict, Any, Tuple
 from pathlib import Path
 
+from cache import TieredCache
+from html_classifier import extract_page_features
+from pattern_engine import PatternEngine
+from http_client import get_http_client, run_sync
+from performance_monitor import get_monitor
+import tracing
+
 # ---------- URL utils ----------
 
 BARE_URL_RX = re.compile(r'(?:(?:https?://)?(?:www\.)?[A-Za-z0-9.-]+\.[A-Za-z]{2,})(?:/[^\s<>"\)]*)?', re.I)
@@ -50,67 +56,32 @@ def extract_urls_from_text(text: str) -> List[str]:
 
 # ---------- Pattern-based evidence detection ----------
 
+PATTERNS_FILE = Path(__file__).parent.parent / "evidence_patterns.json"
+
 def load_evidence_patterns() -> Dict[str, Any]:
     """Load evidence patterns from JSON file."""
-    patterns_file = Path(__file__).parent.parent / "evidence_patterns.json"
     try:
-        with open(patterns_file, 'r', encoding='utf-8') as f:
+        with open(PATTERNS_FILE, 'r', encoding='utf-8') as f:
             return json.load(f)
     except FileNotFoundError:
-        print(f"Warning: evidence_patterns.json not found at {patterns_file}")
+        print(f"Warning: evidence_patterns.json not found at {PATTERNS_FILE}")
         return {"simple_keywords": [], "sentence_patterns": [], "multi_word_phrases": [], "credibility_indicators": []}
 
-# Load patterns once at module level
-EVIDENCE_PATTERNS = load_evidence_patterns()
+# Compile patterns once at module level; edits to the file are picked up
+# without a restart
+PATTERN_ENGINE = PatternEngine(str(PATTERNS_FILE), load_evidence_patterns)
 
 def detect_pattern_based_evidence(text: str) -> Dict[str, Any]:
     """
     Detect evidence cues in text using patterns from evidence_patterns.json.
     Returns dict with detected patterns and confidence level.
     """
-    text_lower = text.lower()
     detected = {
         "has_evidence_patterns": False,
-        "simple_keyword_matches": [],
-        "sentence_pattern_matches": [],
-        "phrase_matches": [],
-        "credibility_matches": [],
+        **PATTERN_ENGINE.get().match(text),
         "confidence": "none"  # none, low, medium, high
     }
 
-    # Check simple keywords
-    for keyword in EVIDENCE_PATTERNS.get("simple_keywords", []):
-        if keyword.lower() in text_lower:
-            detected["simple_keyword_matches"].append(keyword)
-
-    # Check sentence patterns (regex)
-    for pattern_obj in EVIDENCE_PATTERNS.get("sentence_patterns", []):
-        pattern = pattern_obj.get("pattern", "")
-        flags = re.IGNORECASE if pattern_obj.get("flags", "").lower() == "i" else 0
-        try:
-            if re.search(pattern, text, flags):
-                detected["sentence_pattern_matches"].append({
-                    "pattern": pattern_obj.get("description", pattern),
-                    "regex": pattern
-                })
-        except re.error:
-            continue
-
-    # Check multi-word phrases
-    for phrase in EVIDENCE_PATTERNS.get("multi_word_phrases", []):
-        if phrase.lower() in text_lower:
-            detected["phrase_matches"].append(phrase)
-
-    # Check credibility indicators
-    for indicator_group in EVIDENCE_PATTERNS.get("credibility_indicators", []):
-        indicator_type = indicator_group.get("type", "")
-        for keyword in indicator_group.get("keywords", []):
-            if keyword.lower() in text_lower:
-                detected["credibility_matches"].append({
-                    "type": indicator_type,
-                    "keyword": keyword
-                })
-
     # Determine if evidence patterns are present
     total_matches = (
         len(detected["simple_keyword_matches"]) +
@@ -136,14 +107,15 @@ def detect_pattern_based_evidence(text: str) -> Dict[str, Any]:
 
 # ---------- Network guards & DNS ----------
 
-def resolve_public_ips(host: str) -> Tuple[bool, List[str], str | None]:
+async def resolve_public_ips_async(host: str) -> Tuple[bool, List[str], str | None]:
     """Resolve host; ensure IPs are public (not private/loopback/link-local)."""
     # Validate host is not empty and not too long
     if not host or len(host) > 253:  # Max domain length is 253 chars
         return False, [], "invalid_host_length"
 
     try:
-        infos = socket.getaddrinfo(host, None)
+        # Resolved on the loop's executor, so the event loop never blocks on DNS
+        infos = await asyncio.get_running_loop().getaddrinfo(host, None)
     except socket.gaierror as e:
         return False, [], f"dns_failure:{e}"
     except UnicodeError as e:
@@ -163,35 +135,97 @@ def resolve_public_ips(host: str) -> Tuple[bool, List[str], str | None]:
         return False, ips, "ip_parse_error"
     return True, ips, None
 
+def resolve_public_ips(host: str) -> Tuple[bool, List[str], str | None]:
+    return run_sync(resolve_public_ips_async(host))
+
 # ---------- Fetch & classify ----------
 
-def fetch_page(url: str, timeout: float = 10.0) -> Dict[str, Any]:
-    s = requests.Session()
-    s.headers.update({"User-Agent": "TL-Verifier/1.0 (+evidence-check)"})
-    # HEAD first, fall back to GET
+def _is_tls_error(exc: BaseException) -> bool:
+    """True if an httpx error was caused by a TLS/certificate failure."""
+    while exc is not None:
+        if isinstance(exc, ssl.SSLError):
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+# Page bodies are streamed and reading stops at the byte cap. When the head
+# carries JSON-LD (which decides the category before body text hints are
+# consulted), reading also stops once </head> has been seen with no JSON-LD
+# block left open; otherwise the body's JSON-LD and text hints are read too.
+FETCH_MAX_BYTES = int(os.environ.get("TRUSTLENS_FETCH_MAX_BYTES", str(512 * 1024)))
+FETCH_STOP_AT_HEAD = os.environ.get("TRUSTLENS_FETCH_STOP_AT_HEAD", "1").lower() in ("1", "true", "yes")
+
+def _head_complete(lowered: bytes) -> bool:
+    """True once the document head is closed, carries JSON-LD, and no JSON-LD script is still open."""
+    head_end = lowered.find(b"</head")
+    if head_end < 0 or lowered.find(b"application/ld+json", 0, head_end) < 0:
+        return False
+    last_jsonld = lowered.rfind(b"application/ld+json")
+    return lowered.find(b"</script", last_jsonld) >= 0
+
+async def _read_html(response: httpx.Response, max_bytes: int, stop_at_head: bool) -> Tuple[str, int]:
+    """Read at most max_bytes of an HTML body; returns (text, bytes_read)."""
+    chunks: List[bytes] = []
+    lowered = b""
+    bytes_read = 0
+    async for chunk in response.aiter_bytes(chunk_size=16 * 1024):
+        chunk = chunk[:max_bytes - bytes_read]
+        chunks.append(chunk)
+        bytes_read += len(chunk)
+        if bytes_read >= max_bytes:
+            break
+        if stop_at_head:
+            lowered += chunk.lower()
+            head_end = lowered.find(b"</head")
+            if head_end >= 0 and lowered.find(b"application/ld+json", 0, head_end) < 0:
+                # Nothing in the head decides the category: read on to max_bytes
+                stop_at_head = False
+            elif _head_complete(lowered):
+                break
+    return b"".join(chunks).decode(response.encoding or "utf-8", errors="replace"), bytes_read
+
+async def fetch_page_async(
+    url: str,
+    timeout: float = 10.0,
+    max_bytes: int = FETCH_MAX_BYTES,
+    stop_at_head: bool = FETCH_STOP_AT_HEAD
+) -> Dict[str, Any]:
+    client = get_http_client()
+    # HEAD first, fall back to GET (both reuse the pooled connection)
     try:
-        h = s.head(url, allow_redirects=True, timeout=timeout)
-        final = h.url
+        with tracing.span("http_head", tracing.SPAN_KIND_CLIENT, **{"url.full": url}) as span:
+            h = await client.head(url, timeout=timeout)
+            span.set_attribute("http.response.status_code", h.status_code)
+        final = str(h.url)
         ct = (h.headers.get("Content-Type","") or "").split(";")[0].lower()
         status = h.status_code
         text = ""
+        bytes_read = 0
         if "text/html" in ct or not ct:
-            g = s.get(final, allow_redirects=True, timeout=timeout)
-            final = g.url or final
-            status = g.status_code or status
-            ct = (g.headers.get("Content-Type","") or ct).split(";")[0].lower()
-            text = g.text if "text/html" in (ct or "") else ""
+            with tracing.span("http_get", tracing.SPAN_KIND_CLIENT, **{"url.full": final}) as span:
+                async with client.stream("GET", final, timeout=timeout) as g:
+                    final = str(g.url) or final
+                    status = g.status_code or status
+                    ct = (g.headers.get("Content-Type","") or ct).split(";")[0].lower()
+                    if "text/html" in (ct or ""):
+                        text, bytes_read = await _read_html(g, max_bytes, stop_at_head)
+                span.set_attribute("http.response.status_code", status)
+                span.set_attribute("http.response.body.size", bytes_read)
         elif ct == "application/pdf":
             # don’t download the whole file — consider it a “document”
             text = ""
-        return {"ok": status < 400, "status": status, "final_url": final, "content_type": ct, "html": text}
-    except requests.exceptions.SSLError:
-        return {"ok": False, "error": "tls_error"}
-    except requests.exceptions.Timeout:
+        return {"ok": status < 400, "status": status, "final_url": final, "content_type": ct, "html": text,
+                "bytes_read": bytes_read}
+    except httpx.TimeoutException:
         return {"ok": False, "error": "timeout"}
-    except requests.RequestException as e:
+    except (httpx.HTTPError, httpx.InvalidURL) as e:
+        if _is_tls_error(e):
+            return {"ok": False, "error": "tls_error"}
         return {"ok": False, "error": f"http_error:{type(e).__name__}"}
 
+def fetch_page(url: str, timeout: float = 10.0) -> Dict[str, Any]:
+    return run_sync(fetch_page_async(url, timeout))
+
 SCHEMA_TO_CATEGORY = {
     "NewsArticle":"news", "Article":"article", "BlogPosting":"blog",
     "ScholarlyArticle":"education", "TechArticle":"docs",
@@ -201,22 +235,7 @@ SCHEMA_TO_CATEGORY = {
 }
 
 def parse_jsonld_types(html: str) -> List[str]:
-    types = []
-    try:
-        soup = BeautifulSoup(html, "html.parser")
-        for tag in soup.find_all("script", type="application/ld+json"):
-            try:
-                data = json.loads(tag.string or "")
-                objs = data if isinstance(data, list) else [data]
-                for obj in objs:
-                    t = obj.get("@type")
-                    if isinstance(t, list): types += [str(x).lower() for x in t]
-                    elif isinstance(t, str): types.append(t.lower())
-            except Exception:
-                continue
-    except Exception:
-        pass
-    return list(set(types))
+    return list(extract_page_features(html).jsonld_types)
 
 def guess_category(final_url: str, content_type: str, html: str) -> Tuple[str, float, Dict[str, Any]]:
     """Return (category, confidence, signals). No domain list; rely on page/TLD signals."""
@@ -226,21 +245,20 @@ def guess_category(final_url: str, content_type: str, html: str) -> Tuple[str, f
     if "text/html" not in (content_type or ""):
         return "website", 0.5, {"content_type":content_type or "unknown"}
 
-    soup = BeautifulSoup(html, "html.parser")
-    title = (soup.title.string or "").strip() if soup.title else ""
-    og_type = soup.find("meta", property="og:type")
-    og_type = (og_type.get("content","").strip().lower() if og_type else "")
-
     # TLD cues (.gov/.edu)
-    domain = tldextract.extract(final_url).registered_domain or ""
     suffix = tldextract.extract(final_url).suffix or ""
     if suffix.endswith("gov") or suffix.endswith("gov.uk"):
         return "government", 0.9, {"tld":"gov"}
     if suffix.endswith("edu"):
         return "education", 0.85, {"tld":"edu"}
 
+    # One parse yields og:type, JSON-LD and text hints
+    with get_monitor().measure_operation("html_parse"), tracing.span("html_parse", bytes=len(html)):
+        features = extract_page_features(html)
+    og_type = features.og_type
+
     # JSON-LD types
-    jl = parse_jsonld_types(html)
+    jl = features.jsonld_types
     mapped = [SCHEMA_TO_CATEGORY.get(t.capitalize(), "") for t in jl]
     mapped = [m for m in mapped if m]
     if mapped:
@@ -261,22 +279,71 @@ def guess_category(final_url: str, content_type: str, html: str) -> Tuple[str, f
 
     # Path/content hints
     path = urlparse(final_url).path.lower()
-    text = soup.get_text(" ", strip=True).lower()
     if any(k in path for k in ("/docs","/documentation","/api","/developer")):
         return "docs", 0.7, {"path_hint":"docs"}
-    if "add to cart" in text or "sku" in text or "/product" in path:
+    if features.text_hints or "/product" in path:
         return "ecommerce", 0.7, {"content_hint":"product"}
 
     # Fallback
     return "website", 0.55, {"fallback":"generic"}
 
+# ---------- Verification cache ----------
+
+# Verified links are stable for a long time; failures (DNS errors, timeouts,
+# HTTP errors) are cached for a shorter time so a dead host isn't retried on
+# every hover but can recover.
+URL_CACHE_SIZE = int(os.environ.get("TRUSTLENS_URL_CACHE_SIZE", "10000"))
+URL_CACHE_TTL = float(os.environ.get("TRUSTLENS_URL_CACHE_TTL", str(24 * 3600)))
+URL_CACHE_FAILURE_TTL = float(os.environ.get("TRUSTLENS_URL_CACHE_FAILURE_TTL", "600"))
+URL_CACHE_DB = os.environ.get("TRUSTLENS_URL_CACHE_DB") or None
+
+VERIFICATION_CACHE = TieredCache("url_verification", max_entries=URL_CACHE_SIZE, db_path=URL_CACHE_DB)
+
+def url_cache_key(url: str) -> str | None:
+    """Cache key for a URL: normalized, with scheme and host lowercased."""
+    nu = normalize_url(url)
+    if not nu:
+        return None
+    p = urlparse(nu)
+    return urlunparse(p._replace(scheme=p.scheme.lower(), netloc=p.netloc.lower(), path=p.path or "/"))
+
+async def verify_and_classify_async(url: str) -> Dict[str, Any]:
+    """Cached verification + classification (see verify_and_classify_uncached_async)."""
+    with tracing.span("verify_and_classify", **{"url.full": url}) as span:
+        out = await _verify_and_classify_cached(url, span)
+        span.set_attribute("verified", out["verified"])
+        span.set_attribute("reason", out.get("reason"))
+        return out
+
+async def _verify_and_classify_cached(url: str, span) -> Dict[str, Any]:
+    try:
+        key = url_cache_key(url)
+    except ValueError:
+        key = None
+    if key is None:
+        return await verify_and_classify_uncached_async(url)
+
+    cached = await VERIFICATION_CACHE.aget(key)
+    get_monitor().record_cache_lookup("url_verification", cached is not None)
+    span.set_attribute("cache.hit", cached is not None)
+    if cached is not None:
+        return {**cached, "input_url": url}
+
+    out = await verify_and_classify_uncached_async(url)
+    ttl = URL_CACHE_TTL if out["verified"] else URL_CACHE_FAILURE_TTL
+    await VERIFICATION_CACHE.aset(key, dict(out), ttl)
+    return out
+
 def verify_and_classify(url: str) -> Dict[str, Any]:
+    return run_sync(verify_and_classify_async(url))
+
+async def verify_and_classify_uncached_async(url: str) -> Dict[str, Any]:
     """Real-time verification + classification. No local credibility list."""
     out = {
         "input_url": url, "normalized_url": None, "final_url": None,
         "domain": None, "ips": [], "public_dns_ok": None, "http_ok": None,
         "status": None, "content_type": None, "category": None, "confidence": 0.0,
-        "verified": False, "reason": None, "signals": {}
+        "verified": False, "reason": None, "signals": {}, "bytes_read": 0
     }
     nu = normalize_url(url)
     if not nu:
@@ -286,8 +353,13 @@ def verify_and_classify(url: str) -> Dict[str, Any]:
     host = urlparse(nu).hostname or ""
     out["domain"] = tldextract.extract(host).registered_domain or host
 
+    monitor = get_monitor()
+
     # DNS & public IP check
-    dns_ok, ips, dns_err = resolve_public_ips(host)
+    with monitor.measure_operation("dns_resolution"), tracing.span("dns", **{"server.address": host}) as span:
+        dns_ok, ips, dns_err = await resolve_public_ips_async(host)
+        span.set_attribute("dns.ok", dns_ok)
+        span.set_attribute("dns.addresses", len(ips))
     out["ips"] = ips
     if not dns_ok:
         out["public_dns_ok"] = False
@@ -296,7 +368,8 @@ def verify_and_classify(url: str) -> Dict[str, Any]:
     out["public_dns_ok"] = True
 
     # Fetch page
-    fetched = fetch_page(nu)
+    with monitor.measure_operation("http_fetch"):
+        fetched = await fetch_page_async(nu)
     if not fetched.get("ok", False):
         out["http_ok"] = False
         out["reason"] = fetched.get("error") or f"http_status_{fetched.get('status')}"
@@ -307,9 +380,14 @@ def verify_and_classify(url: str) -> Dict[str, Any]:
     out["status"] = fetched["status"]
     out["final_url"] = fetched["final_url"]
     out["content_type"] = fetched["content_type"]
-
-    # Classify by reading the front page
-    cat, conf, signals = guess_category(out["final_url"], out["content_type"], fetched.get("html",""))
+    out["bytes_read"] = fetched["bytes_read"]
+
+    # Classify by reading the front page (CPU-bound parse runs off the loop)
+    with tracing.span("classify") as span:
+        cat, conf, signals = await asyncio.to_thread(
+            guess_category, out["final_url"], out["content_type"], fetched.get("html","")
+        )
+        span.set_attribute("category", cat)
     out["category"], out["confidence"], out["signals"] = cat, conf, signals
 
     # Verdict: Verified if DNS ok + HTTP ok (<400) + looks like content
@@ -323,15 +401,26 @@ def verify_and_classify(url: str) -> Dict[str, Any]:
 
 # ---------- Per-comment pipeline ----------
 
-def analyze_comment(comment_id: str, text: str) -> Dict[str, Any]:
-    import sys
-    
+async def analyze_comment_async(comment_id: str, text: str) -> Dict[str, Any]:
     urls = extract_urls_from_text(text)
-    link_results = [verify_and_classify(u) for u in urls]
+    link_results = list(await asyncio.gather(*(verify_and_classify_async(u) for u in urls)))
 
     # Detect pattern-based evidence
     pattern_detection = detect_pattern_based_evidence(text)
 
+    return build_comment_result(comment_id, text, urls, link_results, pattern_detection)
+
+def analyze_comment(comment_id: str, text: str) -> Dict[str, Any]:
+    return run_sync(analyze_comment_async(comment_id, text))
+
+def build_comment_result(
+    comment_id: str,
+    text: str,
+    urls: List[str],
+    link_results: List[Dict[str, Any]],
+    pattern_detection: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Summarize already-verified links and pattern cues into the per-comment result."""
     # Summarize comment-level status
     if not link_results:
         # No URLs found - check for evidence patterns
@@ -35,7 +35,7 @@ def analyze_comment_monitored(comment_id: str, text: str) -> Dict[str, Any]:
             link_results.append(result)
 
             # Record verification success/failure
-            monitor.record_url_verification(result.get("verified", False))
+            monitor.record_url_verification(result.get("verified", False), result.get("reason"))
 
     # Build the complete result (same logic as original analyze_comment)
     if not link_results:
@@ -25,6 +25,24 @@ def extract_comments(payload):
     return comments_list
 
 
+# Post fields kept alongside the analysis in saved artifacts
+POST_FIELDS = ("id", "title", "subreddit", "author", "permalink", "created_utc")
+
+
+def extract_post_metadata(payload):
+    """
+    Picks the post's identifying fields out of the payload.
+
+    Args:
+        payload (dict): The JSON payload containing Reddit post data.
+
+    Returns:
+        dict: The POST_FIELDS present in payload["data"].
+    """
+    data = payload.get("data") or {}
+    return {field: data[field] for field in POST_FIELDS if data.get(field) is not None}
+
+
 # Example usage
 if __name__ == "__main__":
     import json
@@ -0,0 +1,207 @@
+"""
+Single-pass HTML Feature Extraction
+Parses a fetched page once and pulls out everything guess_category needs:
+<title>, og:type, JSON-LD @type values and product text hints. Uses selectolax
+or lxml when installed and falls back to the standard library's html.parser.
+"""
+import json
+import os
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    try:
+        # selectolax < 1.0 only ships the Modest backend
+        from selectolax.parser import HTMLParser as SelectolaxParser
+    except ImportError:
+        SelectolaxParser = None
+
+try:
+    import lxml.html as lxml_html
+except ImportError:
+    lxml_html = None
+
+
+# Phrases in the visible page text that suggest a product page
+PRODUCT_TEXT_HINTS = ("add to cart", "sku")
+
+# Elements whose contents are not visible page text
+NON_TEXT_TAGS = frozenset({"script", "style", "template"})
+
+JSONLD_TYPE = "application/ld+json"
+
+
+class PageFeatures(NamedTuple):
+    """Classification signals extracted from one HTML document."""
+    title: str
+    og_type: str
+    jsonld_types: Tuple[str, ...]
+    text_hints: Tuple[str, ...]
+
+
+EMPTY_FEATURES = PageFeatures("", "", (), ())
+
+
+def _jsonld_types(blocks: List[str]) -> Tuple[str, ...]:
+    """Lowercased, de-duplicated @type values from raw JSON-LD script bodies."""
+    types: List[str] = []
+    for block in blocks:
+        try:
+            data = json.loads(block or "")
+            objs = data if isinstance(data, list) else [data]
+            for obj in objs:
+                t = obj.get("@type")
+                if isinstance(t, list): types += [str(x).lower() for x in t]
+                elif isinstance(t, str): types.append(t.lower())
+        except Exception:
+            continue
+    return tuple(dict.fromkeys(types))
+
+
+def _text_hints(text: str) -> Tuple[str, ...]:
+    text = text.lower()
+    return tuple(h for h in PRODUCT_TEXT_HINTS if h in text)
+
+
+# ---------- Backends ----------
+
+class _FeatureParser(HTMLParser):
+    """Streaming html.parser handler that collects features in one pass."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title_parts: List[str] = []
+        self.title_done = False
+        self.og_type = None
+        self.jsonld_blocks: List[str] = []
+        self.text_parts: List[str] = []
+        self._in_title = False
+        self._jsonld: List[str] | None = None
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title" and not self.title_done:
+            self._in_title = True
+        elif tag == "meta" and self.og_type is None:
+            attrs = dict(attrs)
+            if attrs.get("property") == "og:type":
+                self.og_type = attrs.get("content") or ""
+        elif tag in NON_TEXT_TAGS:
+            self._skip_depth += 1
+            if tag == "script" and dict(attrs).get("type") == JSONLD_TYPE:
+                self._jsonld = []
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self._in_title:
+            self._in_title = False
+            self.title_done = True
+        elif tag in NON_TEXT_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+            if tag == "script" and self._jsonld is not None:
+                self.jsonld_blocks.append("".join(self._jsonld))
+                self._jsonld = None
+
+    def handle_data(self, data):
+        if self._jsonld is not None:
+            self._jsonld.append(data)
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self.title_parts.append(data)
+        data = data.strip()
+        if data:
+            self.text_parts.append(data)
+
+
+def _extract_html_parser(html: str) -> PageFeatures:
+    parser = _FeatureParser()
+    parser.feed(html)
+    parser.close()
+    return PageFeatures(
+        title="".join(parser.title_parts).strip(),
+        og_type=(parser.og_type or "").strip().lower(),
+        jsonld_types=_jsonld_types(parser.jsonld_blocks),
+        text_hints=_text_hints(" ".join(parser.text_parts))
+    )
+
+
+def _extract_selectolax(html: str) -> PageFeatures:
+    tree = SelectolaxParser(html)
+    title = tree.css_first("title")
+    og = tree.css_first('meta[property="og:type"]')
+    blocks = [node.text(deep=True) for node in tree.css(f'script[type="{JSONLD_TYPE}"]')]
+    tree.strip_tags(list(NON_TEXT_TAGS))
+    text = tree.root.text(separator=" ", strip=True) if tree.root is not None else ""
+    return PageFeatures(
+        title=(title.text(deep=True) if title is not None else "").strip(),
+        og_type=((og.attributes.get("content") if og is not None else "") or "").strip().lower(),
+        jsonld_types=_jsonld_types(blocks),
+        text_hints=_text_hints(text)
+    )
+
+
+def _extract_lxml(html: str) -> PageFeatures:
+    if not html.strip():
+        return EMPTY_FEATURES
+    try:
+        doc = lxml_html.document_fromstring(html)
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        return _extract_html_parser(html)
+    title = doc.find(".//title")
+    og = doc.xpath('//meta[@property="og:type"]')
+    blocks = [node.text or "" for node in doc.xpath(f'//script[@type="{JSONLD_TYPE}"]')]
+    parts: List[str] = []
+    for el in doc.iter():
+        if isinstance(el.tag, str) and el.tag not in NON_TEXT_TAGS and el.text and el.text.strip():
+            parts.append(el.text.strip())
+        if el.tail and el.tail.strip():
+            parts.append(el.tail.strip())
+    return PageFeatures(
+        title=(title.text_content() if title is not None else "").strip(),
+        og_type=((og[0].get("content") if og else "") or "").strip().lower(),
+        jsonld_types=_jsonld_types(blocks),
+        text_hints=_text_hints(" ".join(parts))
+    )
+
+
+BACKENDS: Dict[str, Callable[[str], PageFeatures]] = {"html.parser": _extract_html_parser}
+if SelectolaxParser is not None:
+    BACKENDS["selectolax"] = _extract_selectolax
+if lxml_html is not None:
+    BACKENDS["lxml"] = _extract_lxml
+
+
+def _select_backend(requested: str) -> str:
+    if requested in BACKENDS:
+        return requested
+    for name in ("selectolax", "lxml", "html.parser"):
+        if name in BACKENDS:
+            return name
+    return "html.parser"
+
+
+# "auto" picks the fastest installed backend
+BACKEND = _select_backend(os.environ.get("TRUSTLENS_HTML_BACKEND", "auto"))
+
+
+def extract_page_features(html: str, backend: str | None = None) -> PageFeatures:
+    """
+    Parse html once and return its classification features.
+
+    Args:
+        html: Page markup (possibly truncated)
+        backend: Backend name overriding TRUSTLENS_HTML_BACKEND
+
+    Returns:
+        PageFeatures(title, og_type, jsonld_types, text_hints)
+    """
+    if not html:
+        return EMPTY_FEATURES
+    extract = BACKENDS.get(backend or BACKEND, BACKENDS[BACKEND])
+    try:
+        return extract(html)
+    except Exception:
+        return EMPTY_FEATURES
@@ -0,0 +1,127 @@
+"""
+Shared HTTP Client
+Long-lived, connection-pooled async HTTP clients used for evidence fetching,
+so links on the same host reuse keep-alive connections and TLS sessions
+instead of paying a fresh handshake per request.
+
+httpx.AsyncClient connections are bound to the event loop that opened them,
+so there is one pooled client per loop: the server's loop, plus a private
+background loop that backs the synchronous wrappers in evidence.py.
+"""
+import asyncio
+import importlib.util
+import os
+import sys
+import threading
+import weakref
+from typing import Any, Awaitable, Optional
+
+import httpx
+
+
+USER_AGENT = "TL-Verifier/1.0 (+evidence-check)"
+
+# Pool limits. Concurrent connections per host are additionally bounded by
+# the verification engine's per-host limit (TRUSTLENS_VERIFY_PER_HOST).
+MAX_CONNECTIONS = int(os.environ.get("TRUSTLENS_HTTP_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("TRUSTLENS_HTTP_MAX_KEEPALIVE", "20"))
+KEEPALIVE_EXPIRY = float(os.environ.get("TRUSTLENS_HTTP_KEEPALIVE_EXPIRY", "30"))
+
+# HTTP/2 needs the optional 'h2' package (pip install httpx[http2])
+HTTP2 = os.environ.get("TRUSTLENS_HTTP2", "0").lower() in ("1", "true", "yes")
+
+
+def _http2_available() -> bool:
+    if not HTTP2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        print("Warning: TRUSTLENS_HTTP2 is set but the 'h2' package is not installed; using HTTP/1.1",
+              file=sys.stderr, flush=True)
+        return False
+    return True
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Build a pooled client with the configured limits."""
+    return httpx.AsyncClient(
+        headers={"User-Agent": USER_AGENT},
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY
+        ),
+        http2=_http2_available(),
+        follow_redirects=True
+    )
+
+
+# One client per event loop
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get or create the shared HTTP client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(loop)
+            if client is None:
+                client = create_http_client()
+                _clients[loop] = client
+    return client
+
+
+async def close_http_client():
+    """Close the running loop's client and its pooled connections."""
+    with _clients_lock:
+        client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+# ---------- Background loop for synchronous callers ----------
+
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_thread: Optional[threading.Thread] = None
+_sync_lock = threading.Lock()
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    global _sync_loop, _sync_thread
+    if _sync_loop is None:
+        with _sync_lock:
+            if _sync_loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="tl-http-sync", daemon=True)
+                thread.start()
+                _sync_loop, _sync_thread = loop, thread
+    return _sync_loop
+
+
+def run_sync(coro: Awaitable[Any]) -> Any:
+    """
+    Run a coroutine to completion from synchronous code.
+
+    The coroutine runs on a dedicated background loop so its pooled client
+    survives between calls. Must not be called from inside that loop.
+    """
+    loop = _get_sync_loop()
+    if threading.current_thread() is _sync_thread:
+        raise RuntimeError("run_sync() called from the HTTP background loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def shutdown_sync_loop():
+    """Close the background loop's client and stop the loop."""
+    global _sync_loop, _sync_thread
+    with _sync_lock:
+        loop, thread = _sync_loop, _sync_thread
+        _sync_loop, _sync_thread = None, None
+    if loop is None:
+        return
+    asyncio.run_coroutine_threadsafe(close_http_client(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
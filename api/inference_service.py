@@ -0,0 +1,101 @@
+"""
+Toxicity Inference Service
+Scores comment texts for /ingest. The toxicity model runs in-process by
+default; set TRUSTLENS_PREDICT_URL (e.g. http://10.0.0.5:8001/predict) to send
+batches to a separately deployed /predict endpoint instead.
+"""
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+
+from performance_monitor import get_monitor
+import tracing
+from toxicity_model.app import Texts, predict as toxicity_predict
+
+
+# Remote /predict endpoint for split deployments; empty means in-process
+PREDICT_URL = os.environ.get("TRUSTLENS_PREDICT_URL", "").strip()
+PREDICT_TIMEOUT = float(os.environ.get("TRUSTLENS_PREDICT_TIMEOUT", "30"))
+
+
+class InferenceError(RuntimeError):
+    """Raised when toxicity scores could not be produced for a batch."""
+
+
+class InferenceService:
+    """
+    Produces /predict-shaped toxicity results for a list of texts.
+
+    In-process mode calls toxicity_model.app.predict directly on a worker
+    thread, so the event loop stays free for evidence analysis running
+    alongside it.
+    """
+
+    def __init__(self, remote_url: Optional[str] = None, timeout: float = PREDICT_TIMEOUT):
+        """
+        Args:
+            remote_url: URL of a remote /predict endpoint (None = in-process)
+            timeout: Request timeout for the remote endpoint, in seconds
+        """
+        self.remote_url = remote_url or None
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def mode(self) -> str:
+        return "remote" if self.remote_url else "in-process"
+
+    async def predict(self, texts: List[str]) -> Dict[str, Any]:
+        """
+        Score texts; raises InferenceError if the model could not be reached or run.
+
+        Results are requested without the verbose "detailed" list; the output
+        formatter builds per-comment dicts from the matrices.
+        """
+        # Covers batching delay and the forward pass (or the remote round trip)
+        with get_monitor().measure_operation("model_inference"), \
+                tracing.span("toxicity_inference", texts=len(texts), mode=self.mode):
+            if self.remote_url:
+                return await self._predict_remote(texts)
+            try:
+                return await run_in_threadpool(toxicity_predict, Texts(texts=texts), False)
+            except Exception as e:
+                raise InferenceError(f"Toxicity model failed: {type(e).__name__}: {e}") from e
+
+    async def _predict_remote(self, texts: List[str]) -> Dict[str, Any]:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        try:
+            header = tracing.traceparent()
+            resp = await self._client.post(self.remote_url, params={"detailed": "false"}, json={"texts": texts},
+                                           headers={"traceparent": header} if header else None)
+            resp.raise_for_status()
+            return resp.json()
+        except httpx.HTTPError as e:
+            raise InferenceError(f"Failed to call {self.remote_url}: {e}") from e
+        except ValueError as e:
+            raise InferenceError(f"Invalid response from {self.remote_url}: {e}") from e
+
+    async def aclose(self):
+        """Close the remote HTTP client, if one was opened."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Global service instance (singleton pattern)
+_global_service: Optional[InferenceService] = None
+_service_lock = threading.Lock()
+
+
+def get_inference_service() -> InferenceService:
+    """Get or create the global inference service."""
+    global _global_service
+    if _global_service is None:
+        with _service_lock:
+            if _global_service is None:
+                _global_service = InferenceService(remote_url=PREDICT_URL)
+    return _global_service
@@ -0,0 +1,199 @@
+"""
+Ingest Pipeline
+Steps shared by /ingest and /ingest/stream: score toxicity alongside evidence
+analysis, format the results and persist the artifact. Performance snapshots
+are written periodically by the metrics sink (metrics_sink.py); the old
+per-ingest metrics file and console summary are opt-in via
+TRUSTLENS_PER_REQUEST_REPORT.
+
+The streaming variant scores toxicity in model-batch-sized chunks and yields
+one record per comment as soon as both its toxicity chunk and its own URLs are
+done, so the first badges arrive after roughly one model batch instead of
+after the slowest URL in the thread.
+"""
+import asyncio
+import os
+import sys
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from artifact_writer import get_artifact_writer
+from evidence_monitored import (
+    get_performance_stats,
+    log_performance_stats,
+    print_performance_summary
+)
+from inference_service import InferenceError, get_inference_service
+from output_formatter import format_all_results, format_comment_result, toxicity_rows
+from toxicity_model.batcher import MAX_BATCH_SIZE
+import tracing
+from verification_engine import get_engine
+
+
+# Comments per toxicity request when streaming; one model batch by default
+STREAM_CHUNK_SIZE = int(os.environ.get("TRUSTLENS_STREAM_CHUNK_SIZE", str(MAX_BATCH_SIZE)))
+
+# Write a performance_metrics_*.json file and print the summary after every ingest
+PER_REQUEST_REPORT = os.environ.get("TRUSTLENS_PER_REQUEST_REPORT", "0").lower() in ("1", "true", "yes")
+
+
+def merge_toxicity_results(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Concatenate /predict results for consecutive chunks of one comment list."""
+    merged: Dict[str, Any] = {
+        "labels": chunks[0].get("labels", []) if chunks else [],
+        "probabilities": [],
+        "predictions": [],
+        "badge_colors": []
+    }
+    for chunk in chunks:
+        for key in ("probabilities", "predictions", "badge_colors"):
+            merged[key].extend(chunk.get(key, []))
+    if chunks and all("detailed" in chunk for chunk in chunks):
+        merged["detailed"] = [row for chunk in chunks for row in chunk["detailed"]]
+    return merged
+
+
+def save_ingest_results(
+    comments: List[str],
+    toxicity_results: Dict[str, Any],
+    evidence_results: List[Dict[str, Any]],
+    source_filename: str,
+    post: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Format and persist one ingest.
+
+    Returns:
+        The /ingest response: where the artifact was saved plus summary,
+        preview and performance fields
+    """
+    print(f"Analyzed {len(evidence_results)} comments for evidence", file=sys.stdout, flush=True)
+
+    # Get performance stats for this batch
+    perf_stats = get_performance_stats()
+
+    # Format results according to output structure (include performance stats)
+    with tracing.span("format_results", comments=len(comments)):
+        formatted_output = format_all_results(
+            comments=comments,
+            toxicity_results=toxicity_results,
+            evidence_results=evidence_results,
+            source_filename=source_filename,
+            performance_stats=perf_stats,
+            post=post
+        )
+
+    # Persist results; the artifact name is reserved now and the encoded
+    # document is written on the artifact writer thread
+    with tracing.span("persist") as span:
+        out_path = get_artifact_writer().save(formatted_output)
+        span.set_attribute("path", out_path)
+
+    print(f"Saving predictions to: {out_path}", file=sys.stdout, flush=True)
+
+    if PER_REQUEST_REPORT:
+        perf_log_path = log_performance_stats()
+        print(f"Performance metrics saved to: {perf_log_path}", file=sys.stdout, flush=True)
+        print_performance_summary()
+
+    # Return where we saved it, plus quick-access fields for UI convenience
+    return {
+        "status": "ok",
+        "saved_to": out_path,
+        "total_comments": formatted_output["total_comments"],
+        "summary": formatted_output["summary"],
+        "preview": formatted_output["comments"][:3] if len(formatted_output["comments"]) > 0 else [],  # Show first 3 comments as preview
+        "performance": perf_stats  # Include real-time performance metrics
+    }
+
+
+async def run_ingest(
+    comments: List[str],
+    source_filename: str,
+    post: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Analyze every comment, then save and return the /ingest response."""
+    # Score toxicity in-process (or on the remote /predict if configured),
+    # running alongside evidence analysis rather than before it
+    toxicity_task = asyncio.ensure_future(get_inference_service().predict(comments))
+
+    # All URLs in the payload are verified concurrently; a bad URL only
+    # degrades the comment it belongs to, never the whole batch
+    comment_batch = [{"comment_id": f"comment_{i}", "text": text} for i, text in enumerate(comments)]
+    evidence_results = await get_engine().analyze_comments(comment_batch)
+
+    try:
+        predictions = await toxicity_task
+    except InferenceError as e:
+        # Surface a clear error if the toxicity model isn't available
+        msg = str(e)
+        print(msg, file=sys.stderr, flush=True)
+        return {"status": "error", "message": msg}
+
+    return save_ingest_results(comments, predictions, evidence_results, source_filename, post)
+
+
+async def stream_ingest(
+    comments: List[str],
+    source_filename: str,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    post: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Analyze comments and yield records as they complete:
+
+        {"type": "start", "total_comments": N}
+        {"type": "comment", "index": i, ...formatted comment}   (completion order)
+        {"type": "summary", ...same fields as the /ingest response}
+
+    If toxicity scoring fails, an {"type": "error", "message": ...} record
+    ends the stream instead of the summary.
+    """
+    chunk_size = max(1, chunk_size)
+    service = get_inference_service()
+    yield {"type": "start", "total_comments": len(comments)}
+
+    starts = list(range(0, len(comments), chunk_size))
+    toxicity_tasks = [asyncio.ensure_future(service.predict(comments[s:s + chunk_size])) for s in starts]
+    comment_batch = [{"comment_id": f"comment_{i}", "text": text} for i, text in enumerate(comments)]
+    evidence_tasks, url_tasks = get_engine().start_comments(comment_batch)
+
+    # Per-comment toxicity rows, built once per chunk as each chunk is needed
+    chunk_rows: Dict[int, List[Dict[str, Any]]] = {}
+
+    async def ready(i: int):
+        # Toxicity first, so a failed chunk ends the stream without waiting on URL fetches
+        c = i // chunk_size
+        chunk = await toxicity_tasks[c]
+        evidence_result = await evidence_tasks[i]
+        rows = chunk_rows.get(c)
+        if rows is None:
+            rows = chunk_rows[c] = toxicity_rows(chunk)
+        return i, evidence_result, rows[i % chunk_size]
+
+    waiters = [asyncio.ensure_future(ready(i)) for i in range(len(comments))]
+    try:
+        try:
+            for next_done in asyncio.as_completed(waiters):
+                i, evidence_result, toxicity_row = await next_done
+                with tracing.span("format_comment", index=i):
+                    record = format_comment_result(comments[i], f"comment_{i}", toxicity_row, evidence_result)
+                yield {"type": "comment", "index": i, **record}
+        except InferenceError as e:
+            msg = str(e)
+            print(msg, file=sys.stderr, flush=True)
+            yield {"type": "error", "message": msg}
+            return
+
+        predictions = merge_toxicity_results([task.result() for task in toxicity_tasks])
+        evidence_results = [task.result() for task in evidence_tasks]
+        summary = save_ingest_results(comments, predictions, evidence_results, source_filename, post)
+        yield {"type": "summary", **summary}
+    finally:
+        # Client went away or scoring failed: stop outstanding work, including
+        # URL fetches the comment tasks were waiting on
+        for task in toxicity_tasks + evidence_tasks + url_tasks + waiters:
+            task.cancel()
+        for task in waiters:
+            # The other comments of a failed chunk fail the same way; already reported
+            if task.done() and not task.cancelled():
+                task.exception()
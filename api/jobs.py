@@ -0,0 +1,225 @@
+"""
+Background Ingest Jobs
+A bounded in-process job queue for large ingests: /ingest?mode=job returns a
+job id immediately, a fixed number of worker tasks run the analysis, and the
+client polls (or streams) the job status and fetches the result when done.
+
+The queue holds at most JOB_QUEUE_SIZE waiting jobs; submissions beyond that
+are rejected (HTTP 429) rather than buffered, so a burst of ingests can't
+exhaust memory. Finished jobs are kept for JOB_RESULT_TTL seconds, and at most
+JOB_MAX_FINISHED of them.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import tracing
+
+
+# Ingests analyzed at the same time
+JOB_WORKERS = int(os.environ.get("TRUSTLENS_JOB_WORKERS", "2"))
+# Jobs allowed to wait for a worker before submissions are rejected
+JOB_QUEUE_SIZE = int(os.environ.get("TRUSTLENS_JOB_QUEUE_SIZE", "16"))
+# How long, and how many, finished jobs stay fetchable
+JOB_RESULT_TTL = float(os.environ.get("TRUSTLENS_JOB_RESULT_TTL", "3600"))
+JOB_MAX_FINISHED = int(os.environ.get("TRUSTLENS_JOB_MAX_FINISHED", "200"))
+
+FINISHED_STATES = ("done", "error")
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class Job:
+    """One queued ingest and its progress."""
+
+    def __init__(self, comments: List[str], source_filename: str, post: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex
+        self.comments = comments
+        self.source_filename = source_filename
+        self.post = post
+        self.status = "queued"
+        self.total_comments = len(comments)
+        self.completed_comments = 0
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        # The submitting request's span; the job's own trace continues it
+        self.trace_parent = tracing.current_span()
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def notify(self):
+        """Wake everyone watching this job."""
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def to_status(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "total_comments": self.total_comments,
+            "completed_comments": self.completed_comments,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+
+
+# Runs one job, reporting progress through the callback; returns the result
+JobRunner = Callable[[Job], Any]
+
+
+class JobQueue:
+    """
+    Usage:
+        queue = JobQueue(run_ingest_job)
+        job = queue.submit(comments, "post.json")   # QueueFullError if at capacity
+        queue.get(job.id).to_status()
+        await queue.stop()
+    """
+
+    def __init__(self, runner: JobRunner, workers: int = JOB_WORKERS, max_queued: int = JOB_QUEUE_SIZE,
+                 result_ttl: float = JOB_RESULT_TTL, max_finished: int = JOB_MAX_FINISHED):
+        """
+        Args:
+            runner: Coroutine function taking a Job and returning its result;
+                it may update job.completed_comments and call job.notify()
+            workers: Number of jobs analyzed concurrently
+            max_queued: Jobs allowed to wait for a worker
+            result_ttl: Seconds finished jobs stay fetchable
+            max_finished: Most finished jobs kept
+        """
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.max_queued = max(1, max_queued)
+        self.result_ttl = result_ttl
+        self.max_finished = max(1, max_finished)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_workers(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Queues and tasks belong to one event loop (one per server process)
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queued)
+            self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+
+    def submit(self, comments: List[str], source_filename: str, post: Optional[Dict[str, Any]] = None) -> Job:
+        """Queue an ingest; raises QueueFullError when max_queued jobs are already waiting."""
+        self._ensure_workers()
+        self._prune()
+        job = Job(comments, source_filename, post)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Job queue is full ({self.max_queued} waiting)") from None
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        counts = {state: 0 for state in ("queued", "running") + FINISHED_STATES}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {"workers": self.workers, "max_queued": self.max_queued, **counts}
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            job.notify()
+            try:
+                with tracing.trace("ingest_job", parent=job.trace_parent, **{"job.id": job.id,
+                                                                             "comments": job.total_comments}):
+                    job.result = await self.runner(job)
+                job.status = "done"
+            except asyncio.CancelledError:
+                job.status, job.error = "error", "Server shutting down"
+                raise
+            except Exception as e:
+                print(f"Job {job.id} failed: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+                job.status, job.error = "error", f"{type(e).__name__}: {e}"
+            finally:
+                job.finished_at = time.time()
+                # The input isn't needed once the job is finished
+                job.comments = []
+                job.trace_parent = None
+                job.notify()
+                self._queue.task_done()
+
+    def _prune(self):
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.finished]
+        excess = len(finished) - self.max_finished
+        for job in finished:
+            if excess > 0 or now - job.finished_at > self.result_ttl:
+                del self._jobs[job.id]
+                excess -= 1
+
+    async def watch(self, job: Job) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the job's status now and after every change, until it finishes."""
+        while True:
+            changed = job._changed
+            yield job.to_status()
+            if job.finished:
+                return
+            await changed.wait()
+
+    async def stop(self):
+        """Cancel the workers; running jobs end with an error status."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+
+async def run_ingest_job(job: Job) -> Dict[str, Any]:
+    """Run a job through the streaming ingest pipeline, counting finished comments."""
+    # Imported here so the queue itself doesn't pull in the model and HTTP stack
+    from ingest_pipeline import stream_ingest
+
+    async for record in stream_ingest(job.comments, job.source_filename, post=job.post):
+        if record["type"] == "comment":
+            job.completed_comments += 1
+            job.notify()
+        elif record["type"] == "error":
+            raise RuntimeError(record["message"])
+        elif record["type"] == "summary":
+            return {key: value for key, value in record.items() if key != "type"}
+    raise RuntimeError("Ingest ended without a summary")
+
+
+# Global queue instance (singleton pattern)
+_global_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Get or create the global ingest job queue."""
+    global _global_queue
+    if _global_queue is None:
+        with _queue_lock:
+            if _global_queue is None:
+                _global_queue = JobQueue(run_ingest_job)
+    return _global_queue
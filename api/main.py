@@ -1,13 +1,16 @@
 # main.py
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Any, Dict, List
+from starlette.routing import Match
+from typing import Annotated, Any, Dict, List, Optional
 import sys
 import os
-import re
 import json
-import httpx
+import time
 
 # Import your toxicity model's predict for the local /predict mirror
 # Make sure your package/module path is correct.
@@ -18,23 +21,47 @@ import os
 _api_dir = os.path.dirname(os.path.abspath(__file__))
 if _api_dir not in sys.path:
     sys.path.insert(0, _api_dir)
-from toxicity_model.app import predict as toxicity_predict
+from toxicity_model.app import predict as toxicity_predict, model_stats as toxicity_model_stats, shutdown as shutdown_toxicity_model
 
 # Ensure the filename matches the module below (extract_pure_comments.py)
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from extract_pure_comments import extract_comments
-from evidence import analyze_comments as analyze_evidence, analyze_comment
-from evidence_monitored import (
-    get_performance_stats,
-    log_performance_stats,
-    print_performance_summary
-)
-from output_formatter import format_all_results
-
-
-app = FastAPI(title="Reddit Ingest API")
+from extract_pure_comments import extract_comments, extract_post_metadata
+from evidence_monitored import get_performance_stats
+from metrics_exporter import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics
+from metrics_sink import get_metrics_sink
+from performance_monitor import get_monitor
+from inference_service import get_inference_service
+from ingest_pipeline import run_ingest, stream_ingest
+from verification_engine import get_engine
+from jobs import QueueFullError, get_job_queue
+from artifact_index import MAX_QUERY_LIMIT, get_artifact_index
+from artifact_writer import get_artifact_writer
+from http_client import close_http_client, shutdown_sync_loop
+import tracing
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    metrics_sink = get_metrics_sink()
+    if metrics_sink is not None:
+        metrics_sink.start()
+    yield
+    # Shutdown: stop ingest job workers and finish queued artifact writes,
+    # then release pooled connections held by the shared clients
+    await get_job_queue().stop()
+    get_artifact_writer().close()
+    if metrics_sink is not None:
+        metrics_sink.close()
+    tracing.shutdown_tracing()
+    await close_http_client()
+    shutdown_sync_loop()
+    await get_inference_service().aclose()
+    shutdown_toxicity_model()
+
+
+app = FastAPI(title="Reddit Ingest API", lifespan=lifespan)
 
 # Allow extension pages and localhost to call us.
 origins = [
@@ -52,6 +79,66 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def time_endpoints(request: Request, call_next):
+    """
+    Record each request's latency under its route template, e.g. "GET /jobs/{job_id}",
+    and trace it: the request's root span is the parent of every pipeline span.
+    """
+    monitor = get_monitor()
+    monitor.request_started()
+    start = time.perf_counter()
+    root = tracing.start_trace(
+        f"{request.method} {request.url.path}",
+        traceparent=request.headers.get("traceparent"),
+        **{"http.request.method": request.method, "url.path": request.url.path}
+    )
+    try:
+        with tracing.use_span(root):
+            response = await call_next(request)
+    except BaseException as e:
+        monitor.request_finished()
+        if root is not None:
+            root.record_error(e)
+            root.end()
+        raise
+    if root is not None:
+        response.headers["X-Trace-Id"] = root.trace.trace_id
+
+    # The request is in flight until its body (possibly a long NDJSON stream) is sent
+    body = response.body_iterator
+
+    async def timed_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            monitor.request_finished()
+            latency_ms = (time.perf_counter() - start) * 1000
+            route = _route_template(request)
+            monitor.record_endpoint(f"{request.method} {route}", latency_ms)
+            if root is not None:
+                root.name = f"{request.method} {route}"
+                root.set_attribute("http.route", route)
+                root.set_attribute("http.response.status_code", response.status_code)
+                root.end()
+
+    response.body_iterator = timed_body()
+    return response
+
+
+def _route_template(request: Request) -> str:
+    route = request.scope.get("route")
+    if route is None:
+        # Older FastAPI releases don't put the matched route in the scope
+        for candidate in request.app.router.routes:
+            if candidate.matches(request.scope)[0] == Match.FULL:
+                route = candidate
+                break
+    # Unmatched paths share one key so 404 probes can't grow the table
+    return getattr(route, "path", None) or "unmatched"
+
+
 class IngestPayload(BaseModel):
     filename: str
     data: Dict[str, Any]
@@ -65,130 +152,157 @@ class SingleComment(BaseModel):
     text: str
 
 
-def get_next_output_path(directory: str, prefix: str = "toxicity_output", ext: str = ".json") -> str:
+@app.post("/ingest")
+async def ingest(payload: IngestPayload, mode: str = "sync"):
     """
-    Returns a path like artifacts/toxicity_output_1.json, toxicity_output_2.json, ...
-    Scans existing files to pick the next available number.
+    Analyze a post's comments. With mode=job the analysis runs in the
+    background job queue and a job id is returned right away (202), or 429
+    if the queue is full.
     """
-    os.makedirs(directory, exist_ok=True)
-    pat = re.compile(rf"^{re.escape(prefix)}_(\d+){re.escape(ext)}$")
-    nums: List[int] = []
-    for name in os.listdir(directory):
-        m = pat.match(name)
-        if m:
-            try:
-                nums.append(int(m.group(1)))
-            except ValueError:
-                pass
-    nxt = (max(nums) + 1) if nums else 1
-    return os.path.join(directory, f"{prefix}_{nxt}{ext}")
-
-
-@app.post("/ingest")
-async def ingest(payload: IngestPayload):
     print("==> RECEIVED REDDIT POST PAYLOAD", file=sys.stdout, flush=True)
     print(payload.model_dump_json(indent=2), file=sys.stdout, flush=True)
 
-    # 1) Extract plain comment texts from nested JSON
-    comments = extract_comments(payload.model_dump())
-    predict_payload = {"texts": comments}
+    # Extract plain comment texts (and the post's subreddit, id, ...) from nested JSON
+    data = payload.model_dump()
+    with tracing.span("extract_comments") as span:
+        comments = extract_comments(data)
+        post = extract_post_metadata(data)
+        span.set_attribute("comments", len(comments))
 
-    # 2) Call the toxicity /predict endpoint (same process, different route)
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.post("http://127.0.0.1:8000/predict", json=predict_payload)
-            resp.raise_for_status()
-            predictions = resp.json()
-    except httpx.HTTPError as e:
-        # Surface a clear error if the toxicity service isn't reachable
-        msg = f"Failed to call /predict: {e}"
-        print(msg, file=sys.stderr, flush=True)
-        return {"status": "error", "message": msg}
-
-    # 3) Analyze evidence/sources in comments
-    # Process each comment individually to handle errors gracefully
-    # This ensures one bad URL doesn't break analysis for all comments
-    evidence_results = []
-    for i, text in enumerate(comments):
-        comment_id = f"comment_{i}"
+    if mode == "job":
         try:
-            result = analyze_comment(comment_id, text)
-            evidence_results.append(result)
-        except (UnicodeError, ValueError, OSError) as e:
-            # Handle DNS/URL resolution errors for individual comments
-            # These are expected for malformed URLs
-            evidence_results.append({
-                "comment_id": comment_id,
-                "text": text,
-                "urls": [],
-                "status": "None",
-                "results": [],
-                "TL2_tooltip": "Unable to verify sources",
-                "TL3_detail": "Could not analyze URLs in this comment"
-            })
-        except Exception as e:
-            # Handle any other unexpected errors for individual comments
-            evidence_results.append({
-                "comment_id": comment_id,
-                "text": text,
-                "urls": [],
-                "status": "None",
-                "results": [],
-                "TL2_tooltip": "Analysis error",
-                "TL3_detail": "Error analyzing evidence"
-            })
-    
-    print(f"Analyzed {len(evidence_results)} comments for evidence", file=sys.stdout, flush=True)
-
-    # Get performance stats for this batch
-    perf_stats = get_performance_stats()
-
-    # 4) Format results according to output structure (include performance stats)
-    formatted_output = format_all_results(
-        comments=comments,
-        toxicity_results=predictions,
-        evidence_results=evidence_results,
-        source_filename=payload.filename,
-        performance_stats=perf_stats
-    )
-
-    # 5) Persist results to JSON file (auto-numbered, safe on Windows)
-    out_path = get_next_output_path("artifacts", prefix="toxicity_output", ext=".json")
-    payload_to_save = formatted_output
-
-    # Use 'x' to avoid overwriting if called concurrently; fall back to next number if needed
-    try:
-        with open(out_path, "x", encoding="utf-8") as f:
-            json.dump(payload_to_save, f, ensure_ascii=False, indent=2)
-    except FileExistsError:
-        out_path = get_next_output_path("artifacts", prefix="toxicity_output", ext=".json")
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(payload_to_save, f, ensure_ascii=False, indent=2)
-
-    print(f"Saved predictions to: {out_path}", file=sys.stdout, flush=True)
-
-    # Log performance stats to file
-    perf_log_path = log_performance_stats()
-    print(f"Performance metrics saved to: {perf_log_path}", file=sys.stdout, flush=True)
-
-    # Print performance summary to console
-    print_performance_summary()
-
-    # Return where we saved it, plus quick-access fields for UI convenience
+            job = get_job_queue().submit(comments, payload.filename, post)
+        except QueueFullError as e:
+            return JSONResponse(status_code=429, headers={"Retry-After": "5"},
+                                content={"status": "error", "message": str(e)})
+        return JSONResponse(status_code=202, content={
+            **job.to_status(),
+            "status_url": f"/jobs/{job.id}",
+            "result_url": f"/jobs/{job.id}/result"
+        })
+
+    # Analyze, format and save
+    return await run_ingest(comments, payload.filename, post)
+
+
+@app.post("/ingest/stream")
+async def ingest_stream(payload: IngestPayload):
+    """
+    Same analysis as /ingest, streamed as NDJSON: a start record, one record
+    per comment as soon as its toxicity and evidence are ready, then the
+    /ingest summary.
+    """
+    print("==> RECEIVED REDDIT POST PAYLOAD (stream)", file=sys.stdout, flush=True)
+    data = payload.model_dump()
+    with tracing.span("extract_comments") as span:
+        comments = extract_comments(data)
+        post = extract_post_metadata(data)
+        span.set_attribute("comments", len(comments))
+
+    async def lines():
+        async for record in stream_ingest(comments, payload.filename, post=post):
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _get_job_or_404(job_id: str):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Progress of a background ingest."""
+    return _get_job_or_404(job_id).to_status()
+
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    """The /ingest response once the job is done; 202 with its status until then."""
+    job = _get_job_or_404(job_id)
+    if job.status == "done":
+        return job.result
+    if job.status == "error":
+        return {"status": "error", "message": job.error}
+    return JSONResponse(status_code=202, content=job.to_status())
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """NDJSON stream of the job's status after every change, ending when it finishes."""
+    job = _get_job_or_404(job_id)
+
+    async def lines():
+        async for status in get_job_queue().watch(job):
+            yield json.dumps(status) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _index_or_503():
+    index = get_artifact_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Artifact index is disabled (TRUSTLENS_ARTIFACT_INDEX_DB)")
+    return index
+
+
+# Queries over saved artifacts; since/until are Unix timestamps
+@app.get("/artifacts/comments")
+def artifact_comments(
+    toxicity_level: Optional[str] = None,
+    evidence_status: Optional[str] = None,
+    subreddit: Optional[str] = None,
+    source_filename: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_QUERY_LIMIT)] = 100,
+):
+    """Saved comments filtered by toxicity level, evidence status, subreddit, source or time."""
+    rows = _index_or_503().query_comments(toxicity_level, evidence_status, subreddit, source_filename,
+                                          since, until, limit)
+    return {"status": "ok", "count": len(rows), "comments": rows}
+
+
+@app.get("/artifacts/urls")
+def artifact_urls(
+    domain: Optional[str] = None,
+    verified: Optional[bool] = None,
+    reason: Optional[str] = None,
+    subreddit: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_QUERY_LIMIT)] = 100,
+):
+    """Checked evidence URLs, e.g. verified=false&since=<a week ago> for recent failures."""
+    rows = _index_or_503().query_urls(domain, verified, reason, subreddit, since, until, limit)
+    return {"status": "ok", "count": len(rows), "urls": rows}
+
+
+@app.get("/artifacts/toxicity")
+def artifact_toxicity(
+    subreddit: Optional[str] = None,
+    source_filename: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+):
+    """Toxicity level distribution of saved comments."""
     return {
         "status": "ok",
-        "saved_to": out_path,
-        "total_comments": formatted_output["total_comments"],
-        "summary": formatted_output["summary"],
-        "preview": formatted_output["comments"][:3] if len(formatted_output["comments"]) > 0 else [],  # Show first 3 comments as preview
-        "performance": perf_stats  # Include real-time performance metrics
+        "toxicity": _index_or_503().toxicity_distribution(subreddit, source_filename, since, until)
     }
 
 
 # Mirror endpoint for direct prediction on arbitrary comments
 @app.post("/predict")
-def predict_output(comments: Texts):
-    result = toxicity_predict(comments)
+def predict_output(
+    comments: Texts,
+    detailed: bool = True,
+    response_format: Annotated[str, Query(alias="format")] = "full",
+):
+    result = toxicity_predict(comments, detailed, response_format)
     # Debug: Log what we're returning
     print(f"DEBUG main.py: predict_output result keys: {list(result.keys()) if isinstance(result, dict) else 'Not a dict'}", flush=True)
     print(f"DEBUG main.py: badge_colors in result: {'badge_colors' in result if isinstance(result, dict) else 'N/A'}", flush=True)
@@ -233,17 +347,18 @@ def determine_badge_color(toxicity_color: str, evidence_status: str) -> str:
 
 
 @app.post("/analyze-evidence")
-def analyze_evidence_single(comment: SingleComment):
+async def analyze_evidence_single(comment: SingleComment):
     """Analyze evidence for a single comment - for frontend use."""
     import uuid
     try:
         comment_id = f"comment_{uuid.uuid4().hex[:8]}"
 
-        # 1) Analyze evidence
-        result = analyze_comment(comment_id, comment.text)
+        # 1) Analyze evidence, under the same concurrency limits and metrics as /ingest
+        (result,) = await get_engine().analyze_comments([{"comment_id": comment_id, "text": comment.text}])
 
         # 2) Get toxicity level
-        toxicity_result = toxicity_predict(Texts(texts=[comment.text]))
+        with tracing.span("toxicity_inference", texts=1, mode="in-process"):
+            toxicity_result = await run_in_threadpool(toxicity_predict, Texts(texts=[comment.text]))
         toxicity_color = toxicity_result.get("badge_colors", ["yellow"])[0]
         toxicity_details = toxicity_result.get("detailed", [{}])[0]
 
@@ -267,7 +382,8 @@ def analyze_evidence_single(comment: SingleComment):
 
         # Still get toxicity for error case
         try:
-            toxicity_result = toxicity_predict(Texts(texts=[comment.text]))
+            with tracing.span("toxicity_inference", texts=1, mode="in-process"):
+                toxicity_result = await run_in_threadpool(toxicity_predict, Texts(texts=[comment.text]))
             toxicity_color = toxicity_result.get("badge_colors", ["yellow"])[0]
             badge_color = determine_badge_color(toxicity_color, "None")
         except:
@@ -296,7 +412,8 @@ def analyze_evidence_single(comment: SingleComment):
 
         # Still get toxicity for error case
         try:
-            toxicity_result = toxicity_predict(Texts(texts=[comment.text]))
+            with tracing.span("toxicity_inference", texts=1, mode="in-process"):
+                toxicity_result = await run_in_threadpool(toxicity_predict, Texts(texts=[comment.text]))
             toxicity_color = toxicity_result.get("badge_colors", ["yellow"])[0]
             badge_color = determine_badge_color(toxicity_color, "None")
         except:
@@ -330,9 +447,33 @@ async def health():
 async def get_performance():
     """Get real-time performance metrics for evidence analysis."""
     stats = get_performance_stats()
+    metrics_sink = get_metrics_sink()
+    return {
+        "status": "ok",
+        "metrics": stats,
+        "toxicity_model": toxicity_model_stats(),
+        "jobs": get_job_queue().stats(),
+        "artifacts": get_artifact_writer().stats(),
+        "metrics_sink": metrics_sink.stats() if metrics_sink is not None else None
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    """Pipeline counters and latency histograms in Prometheus text format."""
+    score_cache = toxicity_model_stats()["score_cache"]
+    text = render_metrics(get_monitor(), caches={"toxicity_scores": score_cache})
+    return Response(content=text, media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/traces/slow")
+async def slow_traces():
+    """Span trees of the slowest recent requests and jobs, slowest first."""
+    exporter = tracing.get_trace_exporter()
     return {
         "status": "ok",
-        "metrics": stats
+        "traces": tracing.get_slow_traces().worst(),
+        "export": exporter.stats() if exporter is not None else None
     }
 
 
@@ -0,0 +1,125 @@
+"""
+Prometheus Metrics Exporter
+Renders the performance monitor's counters and latency histograms in the
+Prometheus text exposition format (version 0.0.4) for GET /metrics. It needs
+no client library; a local Prometheus or any scrape test can read the output.
+"""
+import math
+from typing import Dict, List, Optional, Tuple
+
+from performance_monitor import BATCH_SIZE_BOUNDS, LatencyHistogram, PerformanceMonitor
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency histogram bucket bounds, in seconds as Prometheus expects
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PREFIX = "trustlens"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Optional[Dict[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class MetricsText:
+    """Collects metric families; each family's samples are written together."""
+
+    def __init__(self):
+        self._lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str):
+        self._lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        self._lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+    def sample(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
+        self._lines.append(f"{PREFIX}_{name}{_format_labels(labels)} {_format_value(value)}")
+
+    def histogram(self, name: str, bounds: Tuple[float, ...], cumulative: List[int], total: float, count: int,
+                  labels: Optional[Dict[str, str]] = None):
+        labels = labels or {}
+        for bound, n in zip(bounds, cumulative):
+            self.sample(f"{name}_bucket", n, {**labels, "le": _format_value(float(bound))})
+        self.sample(f"{name}_bucket", count, {**labels, "le": "+Inf"})
+        self.sample(f"{name}_sum", total, labels)
+        self.sample(f"{name}_count", count, labels)
+
+    def latency_histogram(self, name: str, histogram: LatencyHistogram, labels: Dict[str, str]):
+        cumulative = histogram.cumulative_counts([bound * 1000 for bound in LATENCY_BUCKETS])
+        self.histogram(name, LATENCY_BUCKETS, cumulative, histogram.total / 1000, histogram.count, labels)
+
+    def text(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+
+def render_metrics(monitor: PerformanceMonitor, caches: Optional[Dict[str, Dict[str, int]]] = None) -> str:
+    """
+    Render every metric the monitor tracks.
+
+    Args:
+        monitor: Source of counters and histograms
+        caches: Extra {name: {"hits": n, "misses": n}} lookups to report,
+            e.g. the toxicity score cache, alongside the monitor's own
+
+    Returns:
+        Prometheus text exposition format
+    """
+    out = MetricsText()
+    # One merged read, so every family reflects the same moment
+    snapshot = monitor.snapshot()
+
+    out.family("comments_processed_total", "counter", "Comments analyzed for evidence.")
+    out.sample("comments_processed_total", snapshot.comments_processed)
+
+    out.family("url_verifications_total", "counter", "Evidence URLs checked, by outcome and reason.")
+    for outcome, reasons in monitor.get_verification_reasons(snapshot).items():
+        for reason, n in reasons.items():
+            out.sample("url_verifications_total", n, {"outcome": outcome, "reason": reason})
+
+    out.family("operation_duration_seconds", "histogram",
+               "Latency of pipeline stages (evidence, DNS, fetch, HTML parse, model, artifact write).")
+    for operation, histogram in sorted(snapshot.operations.items()):
+        out.latency_histogram("operation_duration_seconds", histogram, {"operation": operation})
+
+    out.family("http_request_duration_seconds", "histogram", "Latency of HTTP requests by route.")
+    for endpoint, histogram in sorted(snapshot.endpoints.items()):
+        method, _, route = endpoint.partition(" ")
+        out.latency_histogram("http_request_duration_seconds", histogram, {"method": method, "route": route})
+
+    out.family("http_requests_in_flight", "gauge", "HTTP requests currently being served.")
+    out.sample("http_requests_in_flight", snapshot.in_flight_requests)
+
+    batching = monitor.get_batch_stats(snapshot)
+    cumulative, running = [], 0
+    for n in list(batching["batch_sizes"].values())[:len(BATCH_SIZE_BOUNDS)]:
+        running += n
+        cumulative.append(running)
+    out.family("model_batch_size", "histogram", "Texts per toxicity model forward pass.")
+    out.histogram("model_batch_size", BATCH_SIZE_BOUNDS, cumulative, batching["items"], batching["batches"])
+
+    lookups = {name: (s["hits"], s["misses"]) for name, s in monitor.get_cache_stats(snapshot).items()}
+    for name, s in (caches or {}).items():
+        lookups[name] = (s.get("hits", 0), s.get("misses", 0))
+    out.family("cache_lookups_total", "counter", "Cache lookups by cache and result.")
+    for name, (hits, misses) in sorted(lookups.items()):
+        out.sample("cache_lookups_total", hits, {"cache": name, "result": "hit"})
+        out.sample("cache_lookups_total", misses, {"cache": name, "result": "miss"})
+    out.family("cache_hit_ratio", "gauge", "Share of cache lookups that were hits.")
+    for name, (hits, misses) in sorted(lookups.items()):
+        out.sample("cache_hit_ratio", hits / (hits + misses) if hits + misses else 0.0, {"cache": name})
+
+    return out.text()
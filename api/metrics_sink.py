@@ -0,0 +1,171 @@
+"""
+Rolling Metrics Sink
+Appends a snapshot of the performance monitor to one JSONL file at a fixed
+interval, from a background thread, so no request pays for writing metrics.
+
+The file is rotated like a log: once it reaches TRUSTLENS_METRICS_SINK_MAX_BYTES
+or has been written to for TRUSTLENS_METRICS_SINK_MAX_AGE seconds it is renamed
+to metrics.jsonl.1 (older files shift to .2, .3, ...), and only
+TRUSTLENS_METRICS_SINK_BACKUPS rotated files are kept. Each line is
+get_all_stats() plus a unix "time".
+"""
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from performance_monitor import PerformanceMonitor, get_monitor
+
+
+# Seconds between snapshots; 0 disables the sink
+METRICS_SINK_INTERVAL = float(os.environ.get("TRUSTLENS_METRICS_SINK_INTERVAL", "60"))
+METRICS_SINK_PATH = os.environ.get(
+    "TRUSTLENS_METRICS_SINK_PATH",
+    str(Path(__file__).parent / "performance_logs" / "metrics.jsonl")
+)
+METRICS_SINK_MAX_BYTES = int(os.environ.get("TRUSTLENS_METRICS_SINK_MAX_BYTES", str(10 * 1024 * 1024)))
+METRICS_SINK_MAX_AGE = float(os.environ.get("TRUSTLENS_METRICS_SINK_MAX_AGE", str(24 * 3600)))
+METRICS_SINK_BACKUPS = int(os.environ.get("TRUSTLENS_METRICS_SINK_BACKUPS", "7"))
+
+
+class RollingMetricsSink:
+    """Periodically appends monitor snapshots to a size- and age-rotated JSONL file."""
+
+    def __init__(
+        self,
+        monitor: PerformanceMonitor,
+        path: str = METRICS_SINK_PATH,
+        interval: float = METRICS_SINK_INTERVAL,
+        max_bytes: int = METRICS_SINK_MAX_BYTES,
+        max_age: float = METRICS_SINK_MAX_AGE,
+        backups: int = METRICS_SINK_BACKUPS
+    ):
+        """
+        Args:
+            monitor: Source of the snapshots
+            path: Current JSONL file; rotated files get .1, .2, ... appended
+            interval: Seconds between snapshots
+            max_bytes: Rotate once the file is at least this large
+            max_age: Rotate once the file's first snapshot is this many seconds old
+            backups: Rotated files to keep; older ones are deleted
+        """
+        self.monitor = monitor
+        self.path = path
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backups = backups
+
+        self.written = 0
+        self.rotations = 0
+        self.failed = 0
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = self._first_snapshot_time()
+
+    def start(self):
+        """Start writing snapshots every `interval` seconds."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="trustlens-metrics-sink", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop the background thread and write one last snapshot."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self) -> bool:
+        """
+        Append one snapshot now, rotating first if the file is due.
+
+        Returns:
+            Whether the snapshot was written
+        """
+        now = time.time()
+        record = {"time": round(now, 3), **self.monitor.get_all_stats()}
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                if self._due_for_rotation(now):
+                    self._rotate()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+                if self._started_at is None:
+                    self._started_at = now
+                self.written += 1
+                return True
+            except OSError as e:
+                self.failed += 1
+                print(f"Warning: could not write metrics snapshot to {self.path}: {e}", file=sys.stderr, flush=True)
+                return False
+
+    def _due_for_rotation(self, now: float) -> bool:
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return False
+        if size == 0:
+            return False
+        return size >= self.max_bytes or (self._started_at is not None and now - self._started_at >= self.max_age)
+
+    def _rotate(self):
+        # metrics.jsonl.N-1 -> .N, ..., metrics.jsonl -> .1; the oldest is overwritten
+        if self.backups <= 0:
+            os.unlink(self.path)
+        else:
+            for n in range(self.backups - 1, 0, -1):
+                older = f"{self.path}.{n}"
+                if os.path.exists(older):
+                    os.replace(older, f"{self.path}.{n + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        self._started_at = None
+        self.rotations += 1
+
+    def _first_snapshot_time(self) -> Optional[float]:
+        # After a restart the file's age still counts from its first snapshot
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return float(json.loads(f.readline())["time"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "interval_seconds": self.interval,
+            "running": self._thread is not None,
+            "written": self.written,
+            "rotations": self.rotations,
+            "failed": self.failed
+        }
+
+
+# Global sink instance (singleton pattern)
+_global_sink: Optional[RollingMetricsSink] = None
+_sink_lock = threading.Lock()
+
+
+def get_metrics_sink() -> Optional[RollingMetricsSink]:
+    """Get or create the global metrics sink, or None if TRUSTLENS_METRICS_SINK_INTERVAL is 0."""
+    global _global_sink
+    if METRICS_SINK_INTERVAL <= 0:
+        return None
+    if _global_sink is None:
+        with _sink_lock:
+            if _global_sink is None:
+                _global_sink = RollingMetricsSink(get_monitor())
+    return _global_sink
@@ -183,12 +183,38 @@ def format_comment_result(
     }
 
 
+def toxicity_rows(toxicity_results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Per-comment toxicity dicts (scores, predictions, badge_color).
+
+    Uses the model's "detailed" list when present; otherwise builds the same
+    dicts from the compact labels/probabilities/predictions/badge_colors form.
+    """
+    if "detailed" in toxicity_results:
+        return toxicity_results["detailed"]
+
+    labels = toxicity_results.get("labels", [])
+    return [
+        {
+            "scores": dict(zip(labels, probs)),
+            "predictions": dict(zip(labels, preds)),
+            "badge_color": color
+        }
+        for probs, preds, color in zip(
+            toxicity_results.get("probabilities", []),
+            toxicity_results.get("predictions", []),
+            toxicity_results.get("badge_colors", [])
+        )
+    ]
+
+
 def format_all_results(
     comments: List[str],
     toxicity_results: Dict[str, Any],
     evidence_results: List[Dict[str, Any]],
     source_filename: str = "",
-    performance_stats: Dict[str, Any] = None
+    performance_stats: Dict[str, Any] = None,
+    post: Dict[str, Any] = None
 ) -> Dict[str, Any]:
     """
     Format complete analysis results for all comments.
@@ -199,11 +225,12 @@ def format_all_results(
         evidence_results: List of evidence analysis results
         source_filename: Source file name
         performance_stats: Performance monitoring statistics (optional)
+        post: Post metadata such as subreddit and id (optional)
 
     Returns:
         Complete formatted output
     """
-    detailed_toxicity = toxicity_results.get("detailed", [])
+    detailed_toxicity = toxicity_rows(toxicity_results)
 
     formatted_comments = []
     for i, comment_text in enumerate(comments):
@@ -251,6 +278,10 @@ def format_all_results(
         }
     }
 
+    # Add post metadata if available
+    if post:
+        output["post"] = post
+
     # Add performance stats if available
     if performance_stats:
         output["performance_metrics"] = performance_stats
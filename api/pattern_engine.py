@@ -0,0 +1,158 @@
+"""
+Compiled Evidence Pattern Matching
+Compiles evidence_patterns.json once into a multi-pattern matcher: every literal
+(keyword, phrase, credibility indicator) goes into one Aho-Corasick automaton
+and the sentence regexes are precompiled, with a combined alternation used as
+a fast "nothing can match" prefilter. The file is re-read when it changes.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+# A combined alternation would renumber groups, so patterns that refer back
+# to a group can't be part of the prefilter
+_BACKREFERENCE_RX = re.compile(r"\\[1-9]|\(\?P=")
+
+
+class CompiledPatterns:
+    """An immutable, compiled form of one evidence_patterns.json document."""
+
+    def __init__(self, patterns: Dict[str, Any]):
+        self.simple_keywords: List[str] = list(patterns.get("simple_keywords", []))
+        self.multi_word_phrases: List[str] = list(patterns.get("multi_word_phrases", []))
+        self.credibility_keywords: List[Tuple[str, str]] = [
+            (group.get("type", ""), keyword)
+            for group in patterns.get("credibility_indicators", [])
+            for keyword in group.get("keywords", [])
+        ]
+
+        # Literals are matched case-insensitively; identical literals across
+        # groups are searched once
+        literals = {k.lower() for k in self.simple_keywords}
+        literals |= {p.lower() for p in self.multi_word_phrases}
+        literals |= {k.lower() for _, k in self.credibility_keywords}
+        # The empty string is "in" every text, but an automaton can't hold it
+        self._always_match = "" in literals
+        literals.discard("")
+        self._literals = sorted(literals)
+        self._automaton = None
+        if ahocorasick is not None and self._literals:
+            self._automaton = ahocorasick.Automaton()
+            for literal in self._literals:
+                self._automaton.add_word(literal, literal)
+            self._automaton.make_automaton()
+
+        # Sentence regexes, in file order; invalid ones are skipped as before
+        self.sentence_patterns: List[Tuple[re.Pattern, Dict[str, str]]] = []
+        sources: List[str] = []
+        for pattern_obj in patterns.get("sentence_patterns", []):
+            pattern = pattern_obj.get("pattern", "")
+            ignore_case = pattern_obj.get("flags", "").lower() == "i"
+            try:
+                compiled = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+            except re.error:
+                continue
+            self.sentence_patterns.append((compiled, {
+                "pattern": pattern_obj.get("description", pattern),
+                "regex": pattern
+            }))
+            sources.append(f"(?i:{pattern})" if ignore_case else f"(?:{pattern})")
+
+        self._prefilter: Optional[re.Pattern] = None
+        if sources and not any(_BACKREFERENCE_RX.search(s) for s in sources):
+            try:
+                self._prefilter = re.compile("|".join(sources))
+            except re.error:
+                self._prefilter = None
+
+    def _matched_literals(self, text_lower: str) -> Set[str]:
+        matched = {""} if self._always_match else set()
+        if self._automaton is not None:
+            matched.update(literal for _, literal in self._automaton.iter(text_lower))
+        else:
+            matched.update(literal for literal in self._literals if literal in text_lower)
+        return matched
+
+    def match(self, text: str) -> Dict[str, Any]:
+        """
+        Match text against every pattern.
+
+        Returns:
+            Dict of matches per pattern group, in the order the patterns appear
+            in the source file
+        """
+        text_lower = text.lower()
+        matched = self._matched_literals(text_lower)
+
+        sentence_matches = []
+        if self.sentence_patterns and (self._prefilter is None or self._prefilter.search(text)):
+            sentence_matches = [info.copy() for rx, info in self.sentence_patterns if rx.search(text)]
+
+        return {
+            "simple_keyword_matches": [k for k in self.simple_keywords if k.lower() in matched],
+            "sentence_pattern_matches": sentence_matches,
+            "phrase_matches": [p for p in self.multi_word_phrases if p.lower() in matched],
+            "credibility_matches": [
+                {"type": t, "keyword": k} for t, k in self.credibility_keywords if k.lower() in matched
+            ]
+        }
+
+
+class PatternEngine:
+    """
+    Holds the compiled patterns for a JSON file and rebuilds them when the
+    file's modification time changes (checked at most every reload_interval
+    seconds).
+    """
+
+    def __init__(self, path: str, loader: Callable[[], Dict[str, Any]], reload_interval: float = 1.0):
+        """
+        Args:
+            path: Pattern file to watch for changes
+            loader: Function returning the parsed pattern document
+            reload_interval: Minimum seconds between modification checks
+        """
+        self.path = path
+        self.loader = loader
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtime = self._stat()
+        self._checked_at = time.monotonic()
+        self._compiled = CompiledPatterns(loader())
+
+    def _stat(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def get(self) -> CompiledPatterns:
+        """Return the current compiled patterns, reloading the file if it changed."""
+        now = time.monotonic()
+        if now - self._checked_at >= self.reload_interval:
+            with self._lock:
+                if now - self._checked_at >= self.reload_interval:
+                    self._checked_at = now
+                    mtime = self._stat()
+                    if mtime != self._mtime:
+                        self._reload(mtime)
+        return self._compiled
+
+    def _reload(self, mtime: Optional[float]):
+        self._mtime = mtime
+        try:
+            compiled = CompiledPatterns(self.loader())
+        except Exception as e:
+            # Keep serving the previous patterns if the file is mid-edit or invalid
+            print(f"Warning: could not reload {self.path}: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+            return
+        self._compiled = compiled
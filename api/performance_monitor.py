@@ -1,20 +1,259 @@
 """
 Real-time Performance Monitor for Evidence Analysis
 Tracks latency, response rate, and throughput for all evidence processing operations.
+
+Latencies go into fixed-size log-bucketed histograms (one per operation or
+endpoint), so memory stays constant however many samples are recorded and
+p50/p90/p99/p999 come from one pass over the buckets. Each thread records
+into its own shard and readers merge the shards, so recording is safe from
+thread pools without a shared lock.
 """
+import math
+import threading
 import time
 import json
-import statistics
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from pathlib import Path
-from collections import deque
+
+
+# Operations always present in get_all_stats, even before their first sample
+CORE_OPERATIONS = ("pattern_detection", "url_extraction", "url_verification", "full_analysis")
+
+# Pipeline stages timed outside evidence analysis, registered alongside them
+STAGE_OPERATIONS = ("dns_resolution", "http_fetch", "html_parse", "model_inference", "model_forward",
+                    "artifact_write")
+
+# Upper bounds of the model batch size distribution
+BATCH_SIZE_BOUNDS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+PERCENTILES = (("p50", 0.50), ("p90", 0.90), ("p95", 0.95), ("p99", 0.99), ("p999", 0.999))
+
+
+class LatencyHistogram:
+    """
+    Streaming latency histogram with logarithmic buckets.
+
+    Each power of two (in microseconds) is split into SUB_BUCKETS equal-width
+    buckets, so a reported percentile is within about 3% of the true sample
+    value. Values from MIN_MS to MAX_MS get their own bucket; anything outside
+    is clamped into the first or last one (min and max are still tracked
+    exactly). The bucket comes from math.frexp, with no logarithm to compute.
+    """
+
+    __slots__ = ("counts", "count", "total", "total_sq", "min", "max")
+
+    MIN_MS = 0.001
+    MAX_MS = 3_600_000.0
+    SUB_BUCKETS = 16
+    BUCKETS = int(math.ceil(math.log2(MAX_MS / MIN_MS))) * SUB_BUCKETS
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    @classmethod
+    def bucket_index(cls, value_ms: float) -> int:
+        # value / MIN_MS = mantissa * 2**exponent with mantissa in [0.5, 1):
+        # the exponent picks the power of two, the mantissa the sub-bucket
+        mantissa, exponent = math.frexp(value_ms / cls.MIN_MS)
+        index = (exponent - 1) * cls.SUB_BUCKETS + int((mantissa - 0.5) * 2 * cls.SUB_BUCKETS)
+        if index < 0:
+            return 0
+        return index if index < cls.BUCKETS else cls.BUCKETS - 1
+
+    @classmethod
+    def bucket_value(cls, index: int) -> float:
+        """Representative value of a bucket: the middle of its bounds."""
+        octave, sub = divmod(index, cls.SUB_BUCKETS)
+        return cls.MIN_MS * 2 ** octave * (1 + (sub + 0.5) / cls.SUB_BUCKETS)
+
+    def record(self, value_ms: float):
+        # bucket_index() with the constants folded in (MIN_MS = 0.001,
+        # SUB_BUCKETS = 16), since this runs for every sample
+        mantissa, exponent = math.frexp(value_ms * 1000.0)
+        index = (exponent << 4) + int(mantissa * 32.0) - 32
+        if index < 0:
+            index = 0
+        elif index >= self.BUCKETS:
+            index = self.BUCKETS - 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value_ms
+        self.total_sq += value_ms * value_ms
+        if value_ms < self.min:
+            self.min = value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add another histogram's samples to this one."""
+        if not other.count:
+            return
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentiles(self, quantiles: List[float]) -> List[float]:
+        """Values at the given quantiles (ascending), from one pass over the buckets."""
+        if self.count == 0:
+            return [0.0] * len(quantiles)
+        ranks = [max(1, math.ceil(q * self.count)) for q in quantiles]
+        values = []
+        seen = 0
+        i = 0
+        for index, n in enumerate(self.counts):
+            if not n:
+                continue
+            seen += n
+            while i < len(ranks) and ranks[i] <= seen:
+                # The extreme ranks are known exactly
+                if ranks[i] == 1:
+                    values.append(self.min)
+                elif ranks[i] == self.count:
+                    values.append(self.max)
+                else:
+                    values.append(min(max(self.bucket_value(index), self.min), self.max))
+                i += 1
+            if i == len(ranks):
+                break
+        return values
+
+    def copy(self) -> "LatencyHistogram":
+        other = LatencyHistogram()
+        other.merge(self)
+        return other
+
+    def cumulative_counts(self, bounds_ms: List[float]) -> List[int]:
+        """
+        Samples at or below each bound (ascending), as Prometheus histogram
+        buckets need. A sample is placed by its bucket's representative value.
+        """
+        counts = [0] * len(bounds_ms)
+        running = 0
+        b = 0
+        for index, n in enumerate(self.counts):
+            if not n:
+                continue
+            value = self.bucket_value(index)
+            while b < len(bounds_ms) and bounds_ms[b] < value:
+                counts[b] = running
+                b += 1
+            running += n
+        while b < len(bounds_ms):
+            counts[b] = running
+            b += 1
+        return counts
+
+    def snapshot(self) -> Dict[str, Any]:
+        if self.count == 0:
+            return {"count": 0, "avg": 0, "min": 0, "max": 0, "std_dev": 0,
+                    **{name: 0 for name, _ in PERCENTILES}}
+        avg = self.total / self.count
+        variance = max(0.0, (self.total_sq - self.count * avg * avg) / (self.count - 1)) if self.count > 1 else 0.0
+        values = self.percentiles([q for _, q in PERCENTILES])
+        return {
+            "count": self.count,
+            "avg": avg,
+            "min": self.min,
+            "max": self.max,
+            "std_dev": math.sqrt(variance),
+            **{name: value for (name, _), value in zip(PERCENTILES, values)}
+        }
+
+
+class MetricsShard:
+    """
+    Counters and histograms recorded by one thread, or merged from all of
+    them by PerformanceMonitor.snapshot().
+
+    Only the owning thread writes to a shard, so recording needs no lock. It
+    wraps each update in two `version` increments (a sequence lock): a reader
+    that saw an odd version, or a different one once it finished copying,
+    raced an update and copies again, so it never sees half of one.
+    """
+
+    __slots__ = ("version", "owner", "operations", "endpoints", "comments_processed", "urls_verified",
+                 "successful_verifications", "failed_verifications", "verification_reasons",
+                 "cache_hits", "cache_misses", "model_batches", "model_batch_items", "model_batch_sizes",
+                 "in_flight_requests")
+
+    def __init__(self, owner: Optional[threading.Thread] = None):
+        self.version = 0
+        self.owner = owner
+        self.operations: Dict[str, LatencyHistogram] = {}
+        self.endpoints: Dict[str, LatencyHistogram] = {}
+        self.comments_processed = 0
+        self.urls_verified = 0
+        self.successful_verifications = 0
+        self.failed_verifications = 0
+        # {"verified": {"reachable": n}, "failed": {"dns_failure": n, ...}}
+        self.verification_reasons: Dict[str, Dict[str, int]] = {"verified": {}, "failed": {}}
+        self.cache_hits: Dict[str, int] = {}
+        self.cache_misses: Dict[str, int] = {}
+        self.model_batches = 0
+        self.model_batch_items = 0
+        self.model_batch_sizes = [0] * (len(BATCH_SIZE_BOUNDS) + 1)
+        # Requests may start and finish on different threads, so this is a
+        # delta that only adds up across all shards
+        self.in_flight_requests = 0
+
+    def read(self) -> "MetricsShard":
+        """A consistent copy of this shard, safe to take from any thread."""
+        while True:
+            version = self.version
+            if not version & 1:
+                copy = MetricsShard()
+                self.merge_into(copy)
+                if self.version == version:
+                    return copy
+            # Let the owner finish its update
+            time.sleep(0)
+
+    def merge_into(self, total: "MetricsShard"):
+        """Add this shard's values to `total`, which no other thread can see."""
+        # list() copies each dict in one step, so a concurrent insert can't
+        # break the iteration
+        for mine, theirs in ((self.operations, total.operations), (self.endpoints, total.endpoints)):
+            for name, histogram in list(mine.items()):
+                merged = theirs.get(name)
+                if merged is None:
+                    merged = theirs[name] = LatencyHistogram()
+                merged.merge(histogram)
+        total.comments_processed += self.comments_processed
+        total.urls_verified += self.urls_verified
+        total.successful_verifications += self.successful_verifications
+        total.failed_verifications += self.failed_verifications
+        for outcome, counts in self.verification_reasons.items():
+            _add_counts(total.verification_reasons[outcome], counts)
+        _add_counts(total.cache_hits, self.cache_hits)
+        _add_counts(total.cache_misses, self.cache_misses)
+        total.model_batches += self.model_batches
+        total.model_batch_items += self.model_batch_items
+        total.model_batch_sizes = [a + b for a, b in zip(total.model_batch_sizes, self.model_batch_sizes)]
+        total.in_flight_requests += self.in_flight_requests
+
+
+def _add_counts(total: Dict[str, int], counts: Dict[str, int]):
+    for name, n in list(counts.items()):
+        total[name] = total.get(name, 0) + n
 
 
 class PerformanceMonitor:
     """
     Monitor performance metrics for evidence analysis operations.
     Tracks latency, throughput, and generates real-time statistics.
+
+    Safe to record from any number of threads: each thread records into its
+    own MetricsShard, and readers merge the shards, so recording a sample
+    never waits on another thread and no update is lost.
     """
 
     def __init__(self, window_size: int = 100, enable_logging: bool = True):
@@ -22,23 +261,22 @@ class PerformanceMonitor:
         Initialize the performance monitor.
 
         Args:
-            window_size: Number of recent operations to keep for rolling stats
+            window_size: Unused; kept for compatibility (histograms have a fixed size)
             enable_logging: Whether to log metrics to file
         """
         self.window_size = window_size
         self.enable_logging = enable_logging
 
-        # Store recent latencies for rolling statistics
-        self.pattern_detection_latencies = deque(maxlen=window_size)
-        self.url_extraction_latencies = deque(maxlen=window_size)
-        self.url_verification_latencies = deque(maxlen=window_size)
-        self.full_analysis_latencies = deque(maxlen=window_size)
+        # One shard per recording thread; shards of threads that have exited
+        # are folded into _retired the next time the monitor is read
+        self._local = threading.local()
+        self._shards: List[MetricsShard] = []
+        self._retired = MetricsShard()
+        self._registry_lock = threading.Lock()
 
-        # Counters
-        self.total_comments_processed = 0
-        self.total_urls_verified = 0
-        self.successful_verifications = 0
-        self.failed_verifications = 0
+        # Operations reported even before their first sample, in this order
+        self._operation_names: Dict[str, None] = {}
+        self.register_operations(*CORE_OPERATIONS, *STAGE_OPERATIONS)
 
         # Session start time
         self.session_start = time.time()
@@ -48,6 +286,63 @@ class PerformanceMonitor:
         if enable_logging:
             self.logs_dir.mkdir(exist_ok=True)
 
+    def register_operations(self, *names: str):
+        """Report these operations in get_all_stats from now on, sampled or not."""
+        with self._registry_lock:
+            for name in names:
+                self._operation_names.setdefault(name, None)
+
+    def _shard(self) -> MetricsShard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = MetricsShard(threading.current_thread())
+            with self._registry_lock:
+                self._shards.append(shard)
+            return shard
+
+    def snapshot(self) -> MetricsShard:
+        """
+        Every thread's metrics merged into one MetricsShard, with a histogram
+        (empty if never sampled) for each registered operation.
+        """
+        with self._registry_lock:
+            live = []
+            for shard in self._shards:
+                if shard.owner.is_alive():
+                    live.append(shard)
+                else:
+                    shard.merge_into(self._retired)
+            self._shards = live
+            total = MetricsShard()
+            self._retired.merge_into(total)
+            names = list(self._operation_names)
+        for shard in live:
+            shard.read().merge_into(total)
+        registered = {name: total.operations.pop(name, None) or LatencyHistogram() for name in names}
+        total.operations = {**registered, **total.operations}
+        return total
+
+    @property
+    def total_comments_processed(self) -> int:
+        return self.snapshot().comments_processed
+
+    @property
+    def total_urls_verified(self) -> int:
+        return self.snapshot().urls_verified
+
+    @property
+    def successful_verifications(self) -> int:
+        return self.snapshot().successful_verifications
+
+    @property
+    def failed_verifications(self) -> int:
+        return self.snapshot().failed_verifications
+
+    @property
+    def in_flight_requests(self) -> int:
+        return self.snapshot().in_flight_requests
+
     def measure_operation(self, operation_type: str):
         """
         Context manager to measure operation latency.
@@ -59,91 +354,168 @@ class PerformanceMonitor:
         return OperationTimer(self, operation_type)
 
     def record_latency(self, operation_type: str, latency_ms: float):
-        """Record a latency measurement."""
-        if operation_type == "pattern_detection":
-            self.pattern_detection_latencies.append(latency_ms)
-        elif operation_type == "url_extraction":
-            self.url_extraction_latencies.append(latency_ms)
-        elif operation_type == "url_verification":
-            self.url_verification_latencies.append(latency_ms)
-        elif operation_type == "full_analysis":
-            self.full_analysis_latencies.append(latency_ms)
+        """Record a latency measurement for any operation name."""
+        shard = self._shard()
+        shard.version += 1
+        try:
+            histogram = shard.operations.get(operation_type)
+            if histogram is None:
+                histogram = shard.operations[operation_type] = LatencyHistogram()
+            histogram.record(latency_ms)
+        finally:
+            shard.version += 1
+
+    def record_endpoint(self, endpoint: str, latency_ms: float):
+        """Record the latency of one HTTP request, keyed like "POST /ingest"."""
+        shard = self._shard()
+        shard.version += 1
+        try:
+            histogram = shard.endpoints.get(endpoint)
+            if histogram is None:
+                histogram = shard.endpoints[endpoint] = LatencyHistogram()
+            histogram.record(latency_ms)
+        finally:
+            shard.version += 1
 
     def record_comment_processed(self):
         """Increment the total comments processed counter."""
-        self.total_comments_processed += 1
-
-    def record_url_verification(self, success: bool):
-        """Record a URL verification attempt."""
-        self.total_urls_verified += 1
+        self._shard().comments_processed += 1
+
+    def record_url_verification(self, success: bool, reason: Optional[str] = None):
+        """Record a URL verification attempt and why it passed or failed."""
+        # Details after the colon (error text, an IP) would make every reason unique
+        reason = (reason or ("reachable" if success else "unknown")).split(":", 1)[0]
+        shard = self._shard()
+        shard.version += 1
+        counts = shard.verification_reasons["verified" if success else "failed"]
+        counts[reason] = counts.get(reason, 0) + 1
+        shard.urls_verified += 1
         if success:
-            self.successful_verifications += 1
+            shard.successful_verifications += 1
         else:
-            self.failed_verifications += 1
+            shard.failed_verifications += 1
+        shard.version += 1
+
+    def record_batch(self, size: int, latency_ms: float):
+        """Record one model forward pass (a MicroBatcher observer)."""
+        index = next((i for i, bound in enumerate(BATCH_SIZE_BOUNDS) if size <= bound), len(BATCH_SIZE_BOUNDS))
+        shard = self._shard()
+        shard.version += 1
+        shard.model_batches += 1
+        shard.model_batch_items += size
+        shard.model_batch_sizes[index] += 1
+        shard.version += 1
+        self.record_latency("model_forward", latency_ms)
+
+    def request_started(self):
+        self._shard().in_flight_requests += 1
+
+    def request_finished(self):
+        self._shard().in_flight_requests -= 1
+
+    def record_cache_lookup(self, cache_name: str, hit: bool):
+        """Record a cache lookup as a hit or a miss."""
+        shard = self._shard()
+        counters = shard.cache_hits if hit else shard.cache_misses
+        counters[cache_name] = counters.get(cache_name, 0) + 1
+
+    def get_verification_reasons(self, snapshot: Optional[MetricsShard] = None) -> Dict[str, Dict[str, int]]:
+        """URL verification counts per outcome and reason."""
+        snapshot = snapshot or self.snapshot()
+        return {outcome: dict(sorted(counts.items())) for outcome, counts in snapshot.verification_reasons.items()}
+
+    def latency_histograms(self) -> Dict[str, Dict[str, LatencyHistogram]]:
+        """Every operation and endpoint histogram, merged across threads."""
+        snapshot = self.snapshot()
+        return {"operations": snapshot.operations, "endpoints": snapshot.endpoints}
+
+    def get_batch_stats(self, snapshot: Optional[MetricsShard] = None) -> Dict[str, Any]:
+        """Model forward pass count and size distribution."""
+        snapshot = snapshot or self.snapshot()
+        batches, items = snapshot.model_batches, snapshot.model_batch_items
+        labels = [f"<={bound}" for bound in BATCH_SIZE_BOUNDS] + [f">{BATCH_SIZE_BOUNDS[-1]}"]
+        return {
+            "batches": batches,
+            "items": items,
+            "avg_batch_size": round(items / batches, 2) if batches else 0,
+            "batch_sizes": dict(zip(labels, snapshot.model_batch_sizes))
+        }
+
+    def get_cache_stats(self, snapshot: Optional[MetricsShard] = None) -> Dict[str, Any]:
+        """Get hit/miss counters for every cache that has been consulted."""
+        snapshot = snapshot or self.snapshot()
+        stats = {}
+        for name in sorted(set(snapshot.cache_hits) | set(snapshot.cache_misses)):
+            hits = snapshot.cache_hits.get(name, 0)
+            misses = snapshot.cache_misses.get(name, 0)
+            stats[name] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses) * 100, 2) if hits + misses > 0 else 0
+            }
+        return stats
+
+    @staticmethod
+    def _latency_stats(name_key: str, name: str, histogram: LatencyHistogram) -> Dict[str, Any]:
+        snap = histogram.snapshot()
+        avg = snap["avg"]
+        return {
+            name_key: name,
+            "sample_size": snap["count"],
+            "avg_latency_ms": round(avg, 3),
+            "median_latency_ms": round(snap["p50"], 3),
+            "min_latency_ms": round(snap["min"], 3),
+            "max_latency_ms": round(snap["max"], 3),
+            "std_dev_ms": round(snap["std_dev"], 3),
+            **{f"{p}_latency_ms": round(snap[p], 3) for p, _ in PERCENTILES},
+            "throughput_ops_per_sec": round(1000 / avg, 2) if avg > 0 else 0
+        }
 
     def get_stats(self, operation_type: str) -> Dict[str, Any]:
         """Get statistics for a specific operation type."""
-        if operation_type == "pattern_detection":
-            latencies = list(self.pattern_detection_latencies)
-        elif operation_type == "url_extraction":
-            latencies = list(self.url_extraction_latencies)
-        elif operation_type == "url_verification":
-            latencies = list(self.url_verification_latencies)
-        elif operation_type == "full_analysis":
-            latencies = list(self.full_analysis_latencies)
-        else:
+        histogram = self.snapshot().operations.get(operation_type)
+        if histogram is None:
             return {}
+        return self._latency_stats("operation", operation_type, histogram)
 
-        if not latencies:
-            return {
-                "operation": operation_type,
-                "sample_size": 0,
-                "avg_latency_ms": 0,
-                "median_latency_ms": 0,
-                "min_latency_ms": 0,
-                "max_latency_ms": 0,
-                "throughput_ops_per_sec": 0
-            }
-
-        avg_latency = statistics.mean(latencies)
-
+    def get_endpoint_stats(self, snapshot: Optional[MetricsShard] = None) -> Dict[str, Any]:
+        """Get latency statistics for every endpoint that has served a request."""
+        snapshot = snapshot or self.snapshot()
         return {
-            "operation": operation_type,
-            "sample_size": len(latencies),
-            "avg_latency_ms": round(avg_latency, 3),
-            "median_latency_ms": round(statistics.median(latencies), 3),
-            "min_latency_ms": round(min(latencies), 3),
-            "max_latency_ms": round(max(latencies), 3),
-            "std_dev_ms": round(statistics.stdev(latencies), 3) if len(latencies) > 1 else 0,
-            "throughput_ops_per_sec": round(1000 / avg_latency, 2) if avg_latency > 0 else 0
+            name: self._latency_stats("endpoint", name, histogram)
+            for name, histogram in sorted(snapshot.endpoints.items())
         }
 
     def get_all_stats(self) -> Dict[str, Any]:
-        """Get comprehensive statistics for all operations."""
+        """Get comprehensive statistics for all operations, from one consistent snapshot."""
+        snapshot = self.snapshot()
         session_duration = time.time() - self.session_start
 
         stats = {
             "timestamp": datetime.now().isoformat(),
             "session_duration_seconds": round(session_duration, 2),
-            "total_comments_processed": self.total_comments_processed,
-            "total_urls_verified": self.total_urls_verified,
-            "successful_verifications": self.successful_verifications,
-            "failed_verifications": self.failed_verifications,
+            "total_comments_processed": snapshot.comments_processed,
+            "total_urls_verified": snapshot.urls_verified,
+            "successful_verifications": snapshot.successful_verifications,
+            "failed_verifications": snapshot.failed_verifications,
             "verification_success_rate": round(
-                (self.successful_verifications / self.total_urls_verified * 100)
-                if self.total_urls_verified > 0 else 0,
+                (snapshot.successful_verifications / snapshot.urls_verified * 100)
+                if snapshot.urls_verified > 0 else 0,
                 2
             ),
             "overall_throughput_comments_per_sec": round(
-                self.total_comments_processed / session_duration,
+                snapshot.comments_processed / session_duration,
                 2
             ) if session_duration > 0 else 0,
             "operations": {
-                "pattern_detection": self.get_stats("pattern_detection"),
-                "url_extraction": self.get_stats("url_extraction"),
-                "url_verification": self.get_stats("url_verification"),
-                "full_analysis": self.get_stats("full_analysis")
-            }
+                name: self._latency_stats("operation", name, histogram)
+                for name, histogram in snapshot.operations.items()
+            },
+            "endpoints": self.get_endpoint_stats(snapshot),
+            "verification_reasons": self.get_verification_reasons(snapshot),
+            "model_batching": self.get_batch_stats(snapshot),
+            "in_flight_requests": snapshot.in_flight_requests,
+            "caches": self.get_cache_stats(snapshot)
         }
 
         return stats
@@ -189,22 +561,37 @@ class PerformanceMonitor:
             print(f"  Sample Size: {op_stats['sample_size']}")
             print(f"  Avg Latency: {op_stats['avg_latency_ms']:.3f} ms")
             print(f"  Median: {op_stats['median_latency_ms']:.3f} ms")
+            print(f"  p90 / p99 / p999: {op_stats['p90_latency_ms']:.3f} / {op_stats['p99_latency_ms']:.3f} / "
+                  f"{op_stats['p999_latency_ms']:.3f} ms")
             print(f"  Range: {op_stats['min_latency_ms']:.3f} - {op_stats['max_latency_ms']:.3f} ms")
             print(f"  Throughput: {op_stats['throughput_ops_per_sec']:.2f} ops/sec")
 
+        if stats['endpoints']:
+            print("\nEndpoints:")
+            for endpoint, ep_stats in stats['endpoints'].items():
+                print(f"  {endpoint}: {ep_stats['sample_size']} requests, p50 {ep_stats['p50_latency_ms']:.1f} ms, "
+                      f"p99 {ep_stats['p99_latency_ms']:.1f} ms")
+
+        if stats['caches']:
+            print("\nCaches:")
+            for cache_name, cache_stats in stats['caches'].items():
+                print(f"  {cache_name}: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                      f"({cache_stats['hit_rate']:.2f}% hit rate)")
+
         print("\n" + "="*80)
 
     def reset(self):
         """Reset all metrics (useful for testing or starting fresh)."""
-        self.pattern_detection_latencies.clear()
-        self.url_extraction_latencies.clear()
-        self.url_verification_latencies.clear()
-        self.full_analysis_latencies.clear()
-
-        self.total_comments_processed = 0
-        self.total_urls_verified = 0
-        self.successful_verifications = 0
-        self.failed_verifications = 0
+        # Start every thread on a fresh shard rather than clearing shards that
+        # their owners may be writing to; only the in-flight count carries over
+        with self._registry_lock:
+            retired = MetricsShard()
+            retired.in_flight_requests = self._retired.in_flight_requests + sum(
+                shard.in_flight_requests for shard in self._shards
+            )
+            self._retired = retired
+            self._shards = []
+            self._local = threading.local()
 
         self.session_start = time.time()
 
@@ -231,18 +618,22 @@ class OperationTimer:
 
 # Global monitor instance (singleton pattern)
 _global_monitor: Optional[PerformanceMonitor] = None
+_global_monitor_lock = threading.Lock()
 
 
 def get_monitor(window_size: int = 100, enable_logging: bool = True) -> PerformanceMonitor:
     """Get or create the global performance monitor instance."""
     global _global_monitor
     if _global_monitor is None:
-        _global_monitor = PerformanceMonitor(window_size, enable_logging)
+        with _global_monitor_lock:
+            if _global_monitor is None:
+                _global_monitor = PerformanceMonitor(window_size, enable_logging)
     return _global_monitor
 
 
 def reset_monitor():
     """Reset the global monitor instance."""
-    global _global_monitor
-    if _global_monitor is not None:
-        _global_monitor.reset()
+    with _global_monitor_lock:
+        monitor = _global_monitor
+    if monitor is not None:
+        monitor.reset()
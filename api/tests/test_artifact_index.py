@@ -0,0 +1,154 @@
+"""Unit tests for the SQLite index over saved artifacts in :mod:`api.artifact_index`."""
+
+import json
+
+import pytest
+
+from api.artifact_index import ArtifactIndex, artifact_key, backfill
+from api.artifact_writer import ArtifactWriter
+
+
+def _comment(i, level, status, results=()):
+    return {
+        "comment_id": f"comment_{i}",
+        "text": f"comment {i}",
+        "toxicity_level": level,
+        "toxicity_scores": {"toxic": {"Toxic": 0.9, "Mild": 0.4, "Neutral": 0.1}[level], "insult": 0.05},
+        "evidence_status": status,
+        "evidence_results": list(results),
+    }
+
+
+def _result(url, domain, verified, reason):
+    return {"input_url": url, "final_url": url, "domain": domain, "verified": verified,
+            "reason": reason, "status": 200 if verified else 404, "category": "website"}
+
+
+def _document(subreddit, comments, source="thread"):
+    return {
+        "source_filename": source,
+        "total_comments": len(comments),
+        "post": {"subreddit": subreddit, "id": "abc"},
+        "comments": comments,
+    }
+
+
+SCIENCE = _document("science", [
+    _comment(0, "Toxic", "None"),
+    _comment(1, "Neutral", "Verified", [_result("https://nature.com/a", "Nature.com", True, "reachable")]),
+    _comment(2, "Mild", "Unverified", [_result("https://bad.example/x", "bad.example", False, "http_404")]),
+])
+NEWS = _document("news", [
+    _comment(0, "Neutral", "Unverified", [_result("https://bad.example/y", "bad.example", False, "dns_failed")]),
+], source="other")
+
+
+@pytest.fixture
+def index():
+    idx = ArtifactIndex(":memory:")
+    idx.add("toxicity_output_1.json", "artifacts/toxicity_output_1.json", SCIENCE, created_at=1000.0)
+    idx.add("toxicity_output_2.json", "artifacts/toxicity_output_2.json", NEWS, created_at=2000.0)
+    yield idx
+    idx.close()
+
+
+def test_comments_filter_by_level_and_subreddit(index):
+    rows = index.query_comments(toxicity_level="Toxic", subreddit="science")
+    assert [(r["comment_id"], r["path"]) for r in rows] == [("comment_0", "artifacts/toxicity_output_1.json")]
+    assert rows[0]["toxicity_scores"] == {"toxic": 0.9, "insult": 0.05}
+    assert rows[0]["max_toxicity"] == 0.9
+
+
+def test_comments_filter_by_evidence_status_and_time(index):
+    assert len(index.query_comments(evidence_status="Unverified")) == 2
+    rows = index.query_comments(evidence_status="Unverified", since=1500.0)
+    assert [r["subreddit"] for r in rows] == ["news"]
+
+
+def test_failed_urls_since_a_date(index):
+    rows = index.query_urls(verified=False)
+    assert [r["url"] for r in rows] == ["https://bad.example/y", "https://bad.example/x"]
+    assert rows[0]["verified"] is False
+    assert [r["reason"] for r in index.query_urls(verified=False, since=1500.0)] == ["dns_failed"]
+
+
+def test_domains_are_matched_case_insensitively(index):
+    assert [r["url"] for r in index.query_urls(domain="NATURE.com")] == ["https://nature.com/a"]
+
+
+def test_toxicity_distribution(index):
+    assert index.toxicity_distribution(subreddit="science") == {"Toxic": 1, "Mild": 1, "Neutral": 1}
+    assert index.toxicity_distribution() == {"Toxic": 1, "Mild": 1, "Neutral": 2}
+    assert index.toxicity_distribution(source_filename="other") == {"Toxic": 0, "Mild": 0, "Neutral": 1}
+
+
+def test_adding_the_same_artifact_twice_is_a_no_op(index):
+    assert index.add("toxicity_output_1.json", "elsewhere", SCIENCE) is False
+    assert index.stats()["comments"] == 4
+
+
+def test_limit_caps_results(index):
+    assert len(index.query_comments(limit=2)) == 2
+
+
+def test_backfill_indexes_each_artifact_once(tmp_path):
+    (tmp_path / "toxicity_output_1.json").write_text(json.dumps(SCIENCE))
+    (tmp_path / "toxicity_output_2.json").write_text("")  # reserved, never filled
+    (tmp_path / "toxicity_output_3.json").write_text("{not json")
+    rows = [dict(c, ingest_id="i1", created_at=5.0, source_filename="other", subreddit="news")
+            for c in NEWS["comments"]]
+    (tmp_path / "toxicity_output.jsonl").write_text("".join(json.dumps(r) + "\n" for r in rows))
+
+    index = ArtifactIndex(str(tmp_path / "index.db"))
+    assert backfill(index, str(tmp_path)) == {"indexed": 2, "skipped": 0, "empty": 1, "failed": 1}
+    assert backfill(index, str(tmp_path)) == {"indexed": 0, "skipped": 2, "empty": 1, "failed": 1}
+    assert index.toxicity_distribution(subreddit="news") == {"Toxic": 0, "Mild": 0, "Neutral": 1}
+    index.close()
+
+
+def test_same_names_in_different_directories_are_distinct(tmp_path):
+    for directory, document in (("old", SCIENCE), ("new", NEWS)):
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / "toxicity_output_1.json").write_text(json.dumps(document))
+
+    index = ArtifactIndex(":memory:")
+    assert backfill(index, str(tmp_path / "old"))["indexed"] == 1
+    assert backfill(index, str(tmp_path / "new"))["indexed"] == 1
+    assert index.toxicity_distribution(subreddit="science")["Toxic"] == 1
+    assert index.toxicity_distribution(subreddit="news")["Neutral"] == 1
+
+    # Writers in two directories allocating the same name don't collide either
+    for directory in ("w1", "w2"):
+        writer = ArtifactWriter(str(tmp_path / directory), index=index)
+        writer.save(SCIENCE)
+        writer.close()
+    assert index.stats()["artifacts"] == 4
+    index.close()
+
+
+def test_bare_file_name_keys_are_upgraded(tmp_path):
+    path = tmp_path / "toxicity_output_1.json"
+    path.write_text(json.dumps(SCIENCE))
+    db = str(tmp_path / "index.db")
+    old = ArtifactIndex(db)
+    old.add("toxicity_output_1.json", str(path), SCIENCE)
+    old.close()
+
+    index = ArtifactIndex(db)
+    assert index.contains(artifact_key(str(path)))
+    assert backfill(index, str(tmp_path))["skipped"] == 1
+    index.close()
+
+
+@pytest.mark.parametrize("encoding", ["json", "jsonl"])
+def test_writer_indexes_what_it_writes(tmp_path, encoding):
+    index = ArtifactIndex(":memory:")
+    writer = ArtifactWriter(str(tmp_path), encoding=encoding, index=index)
+    writer.save(SCIENCE)
+    writer.close()
+    assert index.stats()["artifacts"] == 1
+    assert index.toxicity_distribution(subreddit="science")["Toxic"] == 1
+
+    # A later backfill recognizes the artifact as already indexed
+    assert backfill(index, str(tmp_path))["indexed"] == 0
+    index.close()
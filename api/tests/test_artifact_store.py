@@ -0,0 +1,89 @@
+"""Unit tests for artifact naming and atomic writes in :mod:`api.artifact_store`."""
+
+import json
+import os
+import threading
+
+import pytest
+
+from api.artifact_store import ArtifactStore
+
+
+def _names(directory):
+    return sorted(name for name in os.listdir(directory) if not name.startswith("."))
+
+
+def test_numbered_names_continue_after_existing_files(tmp_path):
+    for n in (1, 2, 10):
+        (tmp_path / f"toxicity_output_{n}.json").write_text("{}")
+    store = ArtifactStore(str(tmp_path))
+    path = store.save({"a": 1})
+    assert os.path.basename(path) == "toxicity_output_11.json"
+    assert json.loads(open(path, encoding="utf-8").read()) == {"a": 1}
+
+
+def test_counter_is_persisted_so_the_directory_is_not_rescanned(tmp_path, monkeypatch):
+    ArtifactStore(str(tmp_path)).save({})
+
+    store = ArtifactStore(str(tmp_path))
+    monkeypatch.setattr(store, "_scan_highest", lambda: (_ for _ in ()).throw(AssertionError("scanned")))
+    assert os.path.basename(store.save({})) == "toxicity_output_2.json"
+
+
+def test_collisions_skip_to_the_next_free_number(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    store.save({})
+    # Another writer took number 2 behind our back
+    (tmp_path / "toxicity_output_2.json").write_text('{"other": true}')
+    path = store.save({"mine": True})
+    assert os.path.basename(path) == "toxicity_output_3.json"
+    assert json.loads((tmp_path / "toxicity_output_2.json").read_text()) == {"other": True}
+
+
+def test_concurrent_writers_never_overwrite(tmp_path):
+    stores = [ArtifactStore(str(tmp_path)) for _ in range(4)]
+
+    def write(store, worker):
+        for i in range(25):
+            store.save({"worker": worker, "i": i})
+
+    threads = [threading.Thread(target=write, args=(store, w)) for w, store in enumerate(stores)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    names = _names(tmp_path)
+    assert len(names) == 100
+    contents = {(d["worker"], d["i"]) for d in (json.loads((tmp_path / n).read_text()) for n in names)}
+    assert len(contents) == 100
+
+
+def test_no_temp_files_are_left_behind(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    store.save({})
+    assert [n for n in os.listdir(tmp_path) if n.startswith(".tmp-")] == []
+
+
+def test_failed_fill_releases_the_placeholder(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    _, path = store.reserve()
+    assert os.path.getsize(path) == 0
+
+    def fail(f):
+        f.write("partial")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        store.fill(path, fail)
+    assert not os.path.exists(path)
+    assert [n for n in os.listdir(tmp_path) if n.startswith(".tmp-")] == []
+
+
+def test_time_names_sort_by_creation(tmp_path):
+    store = ArtifactStore(str(tmp_path), naming="time")
+    paths = [store.save({"i": i}) for i in range(3)]
+    assert len(set(paths)) == 3
+    assert all(os.path.basename(p).startswith("toxicity_output_") for p in paths)
+    stamps = [os.path.basename(p).split("_")[2] for p in paths]
+    assert stamps == sorted(stamps)
@@ -0,0 +1,123 @@
+"""Unit tests for artifact encodings and background writes in :mod:`api.artifact_writer`."""
+
+import json
+import os
+
+import pytest
+
+from api import artifact_writer
+from api.artifact_writer import ArtifactWriter, load_artifact, select_encoding
+
+DOCUMENT = {
+    "source_filename": "thread.html",
+    "total_comments": 2,
+    "summary": {"toxicity": {"toxic": 1}},
+    "comments": [
+        {"comment_id": "comment_0", "text": "naïve take", "toxicity_level": "Toxic",
+         "toxicity_scores": {"toxic": 0.9}, "evidence_urls": [], "evidence_results": [],
+         "pattern_detection": {}},
+        {"comment_id": "comment_1", "text": "source: cdc.gov", "toxicity_level": "Neutral",
+         "toxicity_scores": {"toxic": 0.1}, "evidence_urls": ["https://cdc.gov"],
+         "evidence_results": [{"url": "https://cdc.gov", "status": "Verified"}],
+         "pattern_detection": {"phrase_matches": ["source"]}},
+    ],
+    "raw_data": {"toxicity": {"labels": ["toxic"]}, "evidence": []},
+}
+
+
+def _writer(tmp_path, **kwargs):
+    return ArtifactWriter(str(tmp_path), **kwargs)
+
+
+@pytest.mark.parametrize("encoding, suffix", [
+    ("json", ".json"), ("json-pretty", ".json"), ("gzip", ".json.gz"),
+])
+def test_file_encodings_round_trip(tmp_path, encoding, suffix):
+    writer = _writer(tmp_path, encoding=encoding)
+    path = writer.save(DOCUMENT)
+    writer.flush()
+    assert path.endswith(suffix)
+    assert load_artifact(path) == DOCUMENT
+    writer.close()
+
+
+def test_compact_json_is_smaller_than_pretty(tmp_path):
+    sizes = {}
+    for encoding in ("json", "json-pretty"):
+        writer = _writer(tmp_path / encoding, encoding=encoding, background=False)
+        sizes[encoding] = os.path.getsize(writer.save(DOCUMENT))
+    assert sizes["json"] < sizes["json-pretty"]
+
+
+def test_zstd_round_trip(tmp_path):
+    pytest.importorskip("zstandard")
+    writer = _writer(tmp_path, encoding="zstd", background=False)
+    path = writer.save(DOCUMENT)
+    assert path.endswith(".json.zst")
+    assert load_artifact(path) == DOCUMENT
+
+
+def test_raw_data_can_be_left_out(tmp_path):
+    writer = _writer(tmp_path, raw_data=False, background=False)
+    saved = load_artifact(writer.save(DOCUMENT))
+    assert "raw_data" not in saved
+    assert saved["comments"] == DOCUMENT["comments"]
+    assert "raw_data" in DOCUMENT
+
+
+def test_path_is_reported_before_the_background_write(tmp_path):
+    writer = _writer(tmp_path)
+    paths = [writer.save(dict(DOCUMENT, total_comments=i)) for i in range(5)]
+    writer.close()
+    assert [os.path.basename(p) for p in paths] == [f"toxicity_output_{i}.json" for i in range(1, 6)]
+    assert [load_artifact(p)["total_comments"] for p in paths] == list(range(5))
+    assert writer.stats()["written"] == 5
+
+
+def test_jsonl_appends_one_row_per_comment(tmp_path):
+    writer = _writer(tmp_path, encoding="jsonl")
+    path = writer.save(DOCUMENT)
+    assert writer.save(DOCUMENT) == path
+    writer.flush()
+
+    rows = [json.loads(line) for line in open(path, encoding="utf-8")]
+    assert [r["comment_id"] for r in rows] == ["comment_0", "comment_1"] * 2
+    assert rows[0]["source_filename"] == "thread.html"
+    assert rows[0]["ingest_id"] == rows[1]["ingest_id"] != rows[2]["ingest_id"]
+    assert "raw_data" not in rows[0]
+    writer.close()
+
+
+def test_parquet_writes_a_part_file_per_ingest(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    writer = _writer(tmp_path, encoding="parquet", background=False)
+    directory = writer.save(DOCUMENT)
+    writer.save(DOCUMENT)
+
+    parts = sorted(n for n in os.listdir(directory) if not n.startswith("."))
+    assert len(parts) == 2
+    table = pq.read_table(os.path.join(directory, parts[0]))
+    assert table.column("comment_id").to_pylist() == ["comment_0", "comment_1"]
+    assert json.loads(table.column("evidence_results").to_pylist()[1]) == [
+        {"url": "https://cdc.gov", "status": "Verified"}
+    ]
+    assert DOCUMENT["comments"][1]["evidence_results"] == [{"url": "https://cdc.gov", "status": "Verified"}]
+
+
+def test_failed_writes_are_counted_not_raised(tmp_path, monkeypatch):
+    writer = _writer(tmp_path)
+    monkeypatch.setattr(artifact_writer, "encode_document", lambda *a: (_ for _ in ()).throw(ValueError("bad")))
+    path = writer.save(DOCUMENT)
+    writer.flush()
+    assert writer.stats()["failed"] == 1
+    # The reserved name is released rather than left as an empty artifact
+    assert not os.path.exists(path)
+    writer.close()
+
+
+def test_unavailable_encodings_fall_back(monkeypatch):
+    monkeypatch.setattr(artifact_writer, "zstandard", None)
+    monkeypatch.setattr(artifact_writer, "pq", None)
+    assert select_encoding("zstd") == "gzip"
+    assert select_encoding("parquet") == "jsonl"
+    assert select_encoding("xml") == "json"
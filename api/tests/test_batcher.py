@@ -0,0 +1,111 @@
+"""Unit tests for the micro-batching layer in :mod:`api.toxicity_model.batcher`."""
+
+import threading
+
+import pytest
+
+from api.toxicity_model.base import BaseAdapter
+from api.toxicity_model.batcher import MicroBatcher
+
+
+class RecordingAdapter(BaseAdapter):
+    """Echoes each text back and records the size of every forward pass."""
+
+    def __init__(self, gate: threading.Event | None = None):
+        super().__init__()
+        self.batch_sizes = []
+        self.gate = gate
+
+    def load(self):
+        self._ready = True
+
+    def infer(self, batch):
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        self.batch_sizes.append(len(batch))
+        return [{"id": item["id"], "text": item["text"], "echo": item["text"].upper()} for item in batch]
+
+
+def _batch(*texts):
+    return [{"id": str(i), "text": t} for i, t in enumerate(texts)]
+
+
+@pytest.fixture
+def batcher():
+    instances = []
+
+    def make(adapter, **kwargs):
+        b = MicroBatcher(adapter, **kwargs)
+        instances.append(b)
+        return b
+
+    yield make
+    for b in instances:
+        b.close()
+
+
+def test_infer_returns_results_in_input_order(batcher):
+    b = batcher(RecordingAdapter(), max_wait_ms=0)
+    assert [r["echo"] for r in b.infer(_batch("a", "b", "c"))] == ["A", "B", "C"]
+
+
+def test_empty_batch_skips_the_model(batcher):
+    adapter = RecordingAdapter()
+    assert batcher(adapter).infer([]) == []
+    assert adapter.batch_sizes == []
+
+
+def test_concurrent_callers_share_one_forward_pass(batcher):
+    adapter = RecordingAdapter()
+    b = batcher(adapter, max_batch_size=64, max_wait_ms=500)
+
+    futures = [b.submit(_batch(f"t{i}", f"u{i}")) for i in range(10)]
+
+    for i, future in enumerate(futures):
+        assert [r["echo"] for r in future.result(timeout=5)] == [f"T{i}", f"U{i}"]
+    assert adapter.batch_sizes == [20]
+
+
+def test_full_batch_runs_without_waiting(batcher):
+    adapter = RecordingAdapter()
+    b = batcher(adapter, max_batch_size=2, max_wait_ms=10_000)
+    assert len(b.submit(_batch("a", "b")).result(timeout=5)) == 2
+
+
+def test_batches_are_capped_at_max_batch_size(batcher):
+    gate = threading.Event()
+    adapter = RecordingAdapter(gate)
+    b = batcher(adapter, max_batch_size=4, max_wait_ms=50)
+
+    futures = [b.submit(_batch(f"t{i}")) for i in range(9)]
+    gate.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert all(size <= 4 for size in adapter.batch_sizes)
+    assert sum(adapter.batch_sizes) == 9
+
+
+def test_adapter_errors_reach_every_caller_in_the_batch(batcher):
+    class FailingAdapter(RecordingAdapter):
+        def infer(self, batch):
+            raise RuntimeError("model exploded")
+
+    b = batcher(FailingAdapter(), max_wait_ms=0)
+    with pytest.raises(RuntimeError, match="model exploded"):
+        b.infer(_batch("a"))
+
+
+def test_observer_sees_every_forward_pass(batcher):
+    seen = []
+    b = batcher(RecordingAdapter(), max_wait_ms=0, observer=lambda size, ms: seen.append((size, ms >= 0)))
+    b.infer(_batch("a", "b", "c"))
+    b.infer(_batch("d"))
+    assert seen == [(3, True), (1, True)]
+
+
+def test_failing_observer_does_not_break_inference(batcher):
+    def observer(size, ms):
+        raise RuntimeError("metrics down")
+
+    b = batcher(RecordingAdapter(), max_wait_ms=0, observer=observer)
+    assert [r["echo"] for r in b.infer(_batch("a"))] == ["A"]
@@ -0,0 +1,124 @@
+"""Unit tests for the tiered result cache in :mod:`api.cache`."""
+
+import asyncio
+import threading
+
+import pytest
+
+from api import cache as cache_module
+from api.cache import TieredCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    return now
+
+
+class TestMemoryTier:
+    def test_get_returns_stored_value(self):
+        cache = TieredCache("t")
+        cache.set("k", {"verified": True}, ttl=60)
+        assert cache.get("k") == {"verified": True}
+
+    def test_missing_key_returns_none(self):
+        assert TieredCache("t").get("missing") is None
+
+    def test_entry_expires_after_ttl(self, clock):
+        cache = TieredCache("t")
+        cache.set("k", 1, ttl=10)
+        clock[0] += 9
+        assert cache.get("k") == 1
+        clock[0] += 2
+        assert cache.get("k") is None
+
+    def test_non_positive_ttl_is_not_cached(self):
+        cache = TieredCache("t")
+        cache.set("k", 1, ttl=0)
+        assert cache.get("k") is None
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TieredCache("t", max_entries=2)
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        cache.get("a")
+        cache.set("c", 3, ttl=60)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_clear_drops_entries(self):
+        cache = TieredCache("t")
+        cache.set("k", 1, ttl=60)
+        cache.clear()
+        assert cache.get("k") is None
+        assert cache.stats()["memory_entries"] == 0
+
+
+class TestSqliteTier:
+    def test_entries_survive_a_new_instance(self, tmp_path):
+        db = str(tmp_path / "cache.db")
+        first = TieredCache("urls", db_path=db)
+        first.set("k", {"reason": "dns_failure"}, ttl=60)
+        first.close()
+
+        second = TieredCache("urls", db_path=db)
+        assert second.get("k") == {"reason": "dns_failure"}
+        assert second.stats()["persistent"] is True
+
+    def test_expired_disk_entry_is_a_miss(self, tmp_path, clock):
+        db = str(tmp_path / "cache.db")
+        TieredCache("urls", db_path=db).set("k", 1, ttl=5)
+        clock[0] += 6
+        assert TieredCache("urls", db_path=db).get("k") is None
+
+    def test_caches_sharing_a_file_are_isolated_by_name(self, tmp_path):
+        db = str(tmp_path / "cache.db")
+        TieredCache("a", db_path=db).set("k", 1, ttl=60)
+        assert TieredCache("b", db_path=db).get("k") is None
+
+
+class TestAsyncAccess:
+    def _record_disk_threads(self, cache):
+        threads = []
+        for name in ("_get_disk", "_set_disk"):
+            method = getattr(cache, name)
+
+            def wrapper(*args, _method=method):
+                threads.append(threading.current_thread())
+                return _method(*args)
+
+            setattr(cache, name, wrapper)
+        return threads
+
+    def test_disk_tier_is_used_off_the_event_loop(self, tmp_path):
+        db = str(tmp_path / "cache.db")
+        writer = TieredCache("urls", db_path=db)
+        writer_threads = self._record_disk_threads(writer)
+        reader = TieredCache("urls", db_path=db)
+        reader_threads = self._record_disk_threads(reader)
+
+        async def scenario():
+            await writer.aset("k", {"verified": True}, ttl=60)
+            first = await reader.aget("k")
+            second = await reader.aget("k")  # now served from memory
+            missing = await reader.aget("other")
+            return first, second, missing, threading.current_thread()
+
+        first, second, missing, loop_thread = asyncio.run(scenario())
+        assert first == second == {"verified": True}
+        assert missing is None
+        assert len(writer_threads) == 1 and len(reader_threads) == 2
+        assert loop_thread not in writer_threads + reader_threads
+
+    def test_memory_only_cache_never_leaves_the_loop(self):
+        cache = TieredCache("t")
+        threads = self._record_disk_threads(cache)
+
+        async def scenario():
+            await cache.aset("k", 1, ttl=60)
+            return await cache.aget("k"), await cache.aget("missing")
+
+        assert asyncio.run(scenario()) == (1, None)
+        assert threads == []
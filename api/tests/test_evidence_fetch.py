@@ -0,0 +1,94 @@
+"""Unit tests for streamed, capped page reads in :mod:`api.evidence`."""
+
+import asyncio
+
+import httpx
+
+from api.evidence import _head_complete, _read_html
+
+CHUNK = 16 * 1024  # what _read_html asks aiter_bytes() for
+
+
+def _read(parts, max_bytes=1024 * 1024, stop_at_head=True, content_type="text/html"):
+    """Serve `parts` as separate body chunks; returns (text, bytes_read, chunks_served)."""
+    served = []
+
+    async def body():
+        for part in parts:
+            served.append(part)
+            yield part
+
+    def handler(request):
+        return httpx.Response(200, headers={"Content-Type": content_type}, content=body())
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            async with client.stream("GET", "https://example.com/") as response:
+                return await _read_html(response, max_bytes, stop_at_head)
+
+    text, bytes_read = asyncio.run(scenario())
+    return text, bytes_read, len(served)
+
+
+def _pad(prefix: bytes, size: int = CHUNK) -> bytes:
+    return prefix + b" " * (size - len(prefix))
+
+
+JSONLD_HEAD = b'<html><head><script type="application/ld+json">{"@type": "NewsArticle"}</script>'
+
+
+def test_head_complete():
+    assert not _head_complete(b"<html><head><title>x</title>")
+    # No JSON-LD in the head: the body may still hold it, or text hints
+    assert not _head_complete(b"<html><head></head><body>add to cart")
+    assert not _head_complete(b'<head><script type="application/ld+json">{</script></head><body><script type="application/ld+json">{')
+    assert _head_complete(JSONLD_HEAD.lower() + b"</head><body>")
+
+
+def test_reading_stops_at_max_bytes():
+    text, bytes_read, _ = _read([b"a" * CHUNK] * 4, max_bytes=CHUNK + 10)
+    assert bytes_read == CHUNK + 10
+    assert text == "a" * (CHUNK + 10)
+
+
+def test_reading_stops_at_head_split_across_chunks():
+    first = _pad(JSONLD_HEAD, CHUNK - 4) + b"</HE"
+    parts = [first, _pad(b"AD><body>"), _pad(b"never read"), _pad(b"never read")]
+    text, bytes_read, served = _read(parts)
+    assert bytes_read == 2 * CHUNK
+    assert "never read" not in text
+    assert served < len(parts)
+
+
+def test_head_without_jsonld_reads_the_body():
+    parts = [_pad(b"<html><head><title>Shop</title></head>"), _pad(b"<body>add to cart"),
+             b'<script type="application/ld+json">{"@type": "Product"}</script></body></html>']
+    text, bytes_read, served = _read(parts)
+    assert served == len(parts)
+    assert bytes_read == sum(map(len, parts))
+    assert text.endswith("</body></html>")
+
+
+def test_missing_head_close_reads_to_the_end():
+    parts = [_pad(JSONLD_HEAD), b"<body>no closing head tag</body>"]
+    text, bytes_read, _ = _read(parts)
+    assert bytes_read == sum(map(len, parts))
+    assert "no closing head tag" in text
+
+
+def test_stop_at_head_disabled_reads_everything():
+    parts = [_pad(JSONLD_HEAD + b"</head>"), b"<body>tail</body>"]
+    text, _, _ = _read(parts, stop_at_head=False)
+    assert text.endswith("<body>tail</body>")
+
+
+def test_non_utf8_bodies():
+    latin1 = "<html><title>Café</title></html>".encode("latin-1")
+    text, _, _ = _read([latin1], content_type="text/html; charset=iso-8859-1")
+    assert "Café" in text
+
+    # Undeclared charset and invalid UTF-8: replaced, never raised
+    body = b"<title>\xff\xfe ok</title>"
+    text, bytes_read, _ = _read([body])
+    assert bytes_read == len(body)
+    assert "�" in text and "ok" in text
@@ -0,0 +1,57 @@
+"""Unit tests for single-pass HTML feature extraction in :mod:`api.html_classifier`."""
+
+import pytest
+
+from api.html_classifier import BACKENDS, EMPTY_FEATURES, extract_page_features
+
+PAGE = (
+    "<html><head><title> A &amp; B </title>"
+    '<meta property="og:type" content=" Video.Movie ">'
+    '<script type="application/ld+json">[{"@type": ["Product", "Thing"]}, {"x": 1}]</script>'
+    '<script type="application/ld+json">{"@type": "Product"}</script>'
+    '<script>var label = "add to cart";</script>'
+    "<style>.sku {}</style></head>"
+    "<body><p>Add to</p><p>Cart</p></body></html>"
+)
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def backend(request):
+    return request.param
+
+
+class TestExtractPageFeatures:
+    def test_extracts_title(self, backend):
+        assert extract_page_features(PAGE, backend).title == "A & B"
+
+    def test_extracts_og_type_normalized(self, backend):
+        assert extract_page_features(PAGE, backend).og_type == "video.movie"
+
+    def test_extracts_deduplicated_jsonld_types(self, backend):
+        assert extract_page_features(PAGE, backend).jsonld_types == ("product", "thing")
+
+    def test_text_hints_span_elements_and_ignore_scripts(self, backend):
+        assert extract_page_features(PAGE, backend).text_hints == ("add to cart",)
+
+    def test_script_and_style_text_is_not_a_hint(self, backend):
+        html = "<html><head><style>.sku{}</style></head><body><script>'sku'</script></body></html>"
+        assert extract_page_features(html, backend).text_hints == ()
+
+    def test_invalid_jsonld_is_skipped(self, backend):
+        html = '<script type="application/ld+json">not json</script><p>SKU 12</p>'
+        features = extract_page_features(html, backend)
+        assert features.jsonld_types == ()
+        assert features.text_hints == ("sku",)
+
+    def test_missing_elements_give_empty_values(self, backend):
+        features = extract_page_features("<p>plain page</p>", backend)
+        assert features.title == ""
+        assert features.og_type == ""
+
+
+def test_empty_html_returns_empty_features():
+    assert extract_page_features("") == EMPTY_FEATURES
+
+
+def test_stdlib_backend_is_always_available():
+    assert "html.parser" in BACKENDS
@@ -0,0 +1,81 @@
+"""Unit tests for per-loop pooled clients and the sync bridge in :mod:`api.http_client`."""
+
+import asyncio
+import threading
+
+import pytest
+
+from api import http_client
+
+
+@pytest.fixture(autouse=True)
+def fresh_sync_loop():
+    http_client.shutdown_sync_loop()
+    yield
+    http_client.shutdown_sync_loop()
+
+
+async def _client_and_loop():
+    return http_client.get_http_client(), asyncio.get_running_loop()
+
+
+def test_one_client_per_loop():
+    async def twice():
+        first = http_client.get_http_client()
+        second = http_client.get_http_client()
+        await http_client.close_http_client()
+        return first, second
+
+    a1, a2 = asyncio.run(twice())
+    b1, _ = asyncio.run(twice())
+    assert a1 is a2
+    assert b1 is not a1
+    assert a1.is_closed and b1.is_closed
+
+
+def test_run_sync_from_threads_without_a_loop():
+    seen = []
+
+    def worker():
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()
+        seen.append(http_client.run_sync(_client_and_loop()))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Every caller shares the background loop and its pooled client
+    assert len(seen) == 4
+    assert len({id(client) for client, _ in seen}) == 1
+    assert all(loop is http_client._sync_loop for _, loop in seen)
+
+
+def test_run_sync_refuses_the_background_loop():
+    async def nested():
+        coro = _client_and_loop()
+        try:
+            http_client.run_sync(coro)
+        finally:
+            coro.close()
+
+    with pytest.raises(RuntimeError, match="background loop"):
+        http_client.run_sync(nested())
+
+
+def test_shutdown_closes_the_client_and_joins_the_thread():
+    client, loop = http_client.run_sync(_client_and_loop())
+    thread = http_client._sync_thread
+    assert thread.is_alive() and not client.is_closed
+
+    http_client.shutdown_sync_loop()
+    assert client.is_closed
+    assert not thread.is_alive()
+    assert loop.is_closed()
+    assert http_client._sync_loop is None and http_client._sync_thread is None
+
+    # The next call starts a new loop with a new client
+    client2, loop2 = http_client.run_sync(_client_and_loop())
+    assert loop2 is not loop and client2 is not client
@@ -0,0 +1,112 @@
+"""Unit tests for remote and in-process scoring in :mod:`api.inference_service`."""
+
+import asyncio
+import importlib
+import json
+
+import httpx
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from api import inference_service
+from api.inference_service import InferenceService
+
+# The modules the service actually uses (it imports its siblings as top-level modules)
+InferenceError = inference_service.InferenceError
+toxicity_app = importlib.import_module("toxicity_model.app")
+tracing = importlib.import_module("tracing")
+
+URL = "http://model.internal:8001/predict"
+RESULT = {"labels": ["toxic"], "probabilities": [[0.1]], "predictions": [[0]], "badge_colors": ["green"]}
+
+
+def _remote(handler):
+    service = InferenceService(remote_url=URL, timeout=1.0)
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler), timeout=1.0)
+    return service
+
+
+def _predict(service, texts, parent=None):
+    async def scenario():
+        try:
+            if parent is None:
+                return await service.predict(texts)
+            with tracing.use_span(parent):
+                return await service.predict(texts)
+        finally:
+            await service.aclose()
+
+    return asyncio.run(scenario())
+
+
+def test_remote_request_carries_texts_and_traceparent():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=RESULT)
+
+    root = tracing.start_trace("POST /ingest")
+    assert _predict(_remote(handler), ["a", "b"], parent=root) == RESULT
+    root.end()
+
+    request = requests[0]
+    assert request.url.params["detailed"] == "false"
+    assert json.loads(request.content) == {"texts": ["a", "b"]}
+    trace_id, span_id = request.headers["traceparent"].split("-")[1:3]
+    # The header names the toxicity_inference span, a child of the request's root
+    inference = next(s for s in root.trace.spans if s.name == "toxicity_inference")
+    assert (trace_id, span_id) == (root.trace.trace_id, inference.span_id)
+
+    _predict(_remote(handler), ["a"])
+    assert "traceparent" not in requests[1].headers
+
+
+@pytest.mark.parametrize("response", [
+    httpx.Response(503, text="overloaded"),
+    httpx.Response(422, json={"detail": "bad"}),
+    httpx.Response(200, text="<html>proxy error</html>"),
+])
+def test_remote_failures_raise_inference_error(response):
+    with pytest.raises(InferenceError):
+        _predict(_remote(lambda request: response), ["a"])
+
+
+def test_remote_timeout_raises_inference_error():
+    def handler(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    with pytest.raises(InferenceError, match="timed out"):
+        _predict(_remote(handler), ["a"])
+
+
+class FakeScorer:
+    def infer_probs(self, batch):
+        return np.array([[0.9 if "idiot" in item["text"] else 0.05] * len(toxicity_app.LABELS)
+                         for item in batch], dtype=np.float32)
+
+
+def test_in_process_result_matches_predict_endpoint(monkeypatch):
+    monkeypatch.setattr(toxicity_app, "tox_scorer", FakeScorer())
+    monkeypatch.setattr(toxicity_app, "_ensure_adapter_loaded", lambda: None)
+    texts = ["you idiot", "thanks"]
+
+    result = _predict(InferenceService(), texts)
+    response = TestClient(toxicity_app.app).post("/predict", params={"detailed": "false"}, json={"texts": texts})
+
+    assert response.status_code == 200
+    assert set(result) == {"labels", "probabilities", "predictions", "badge_colors"}
+    assert json.loads(json.dumps(result)) == response.json()
+    assert result["badge_colors"] == ["red", "green"]
+
+
+def test_in_process_failures_raise_inference_error(monkeypatch):
+    class Broken:
+        def infer_probs(self, batch):
+            raise RuntimeError("CUDA out of memory")
+
+    monkeypatch.setattr(toxicity_app, "tox_scorer", Broken())
+    monkeypatch.setattr(toxicity_app, "_ensure_adapter_loaded", lambda: None)
+    with pytest.raises(InferenceError, match="CUDA out of memory"):
+        _predict(InferenceService(), ["a"])
@@ -0,0 +1,162 @@
+"""Unit tests for the NDJSON streaming ingest in :mod:`api.ingest_pipeline`, with stubbed model and engine."""
+
+import asyncio
+
+import pytest
+
+from api import ingest_pipeline
+from api.ingest_pipeline import merge_toxicity_results, stream_ingest
+
+# The class the pipeline catches (it imports inference_service as a top-level module)
+InferenceError = ingest_pipeline.InferenceError
+
+LABELS = ["toxic", "insult"]
+
+
+def _prediction(texts):
+    return {
+        "labels": LABELS,
+        "probabilities": [[0.9, 0.1] if "idiot" in t else [0.1, 0.0] for t in texts],
+        "predictions": [[1, 0] if "idiot" in t else [0, 0] for t in texts],
+        "badge_colors": ["red" if "idiot" in t else "green" for t in texts],
+    }
+
+
+class FakeService:
+    def __init__(self, error=None, gate=None):
+        self.calls = []
+        self.error = error
+        self.gate = gate
+
+    async def predict(self, texts):
+        self.calls.append(list(texts))
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        return _prediction(texts)
+
+
+class FakeEngine:
+    """
+    Comment i finishes after delays[i] event-loop turns. Every comment links the
+    same two URLs and awaits them in turn, like VerificationEngine's comments.
+    """
+
+    def __init__(self, delays=None, block_urls=False):
+        self.delays = delays or {}
+        self.block_urls = block_urls
+        self.url_tasks = []
+        self.comment_tasks = []
+
+    def start_comments(self, batch):
+        async def fetch():
+            if self.block_urls:
+                await asyncio.Event().wait()
+            return {"verified": True}
+
+        async def finish(i, comment):
+            for _ in range(self.delays.get(i, 0)):
+                await asyncio.sleep(0)
+            for url_task in self.url_tasks:
+                await url_task
+            return {"comment_id": comment["comment_id"], "status": "None", "urls": [], "results": []}
+
+        self.url_tasks = [asyncio.ensure_future(fetch()) for _ in range(2)]
+        self.comment_tasks = [asyncio.ensure_future(finish(i, c)) for i, c in enumerate(batch)]
+        return self.comment_tasks, self.url_tasks
+
+
+@pytest.fixture
+def stubs(monkeypatch):
+    def install(service, engine):
+        monkeypatch.setattr(ingest_pipeline, "get_inference_service", lambda: service)
+        monkeypatch.setattr(ingest_pipeline, "get_engine", lambda: engine)
+        saved = []
+
+        def save(comments, predictions, evidence_results, source_filename, post=None):
+            saved.append(predictions)
+            return {"status": "ok", "total_comments": len(comments)}
+
+        monkeypatch.setattr(ingest_pipeline, "save_ingest_results", save)
+        return saved
+
+    return install
+
+
+async def _collect(gen):
+    return [record async for record in gen]
+
+
+def test_records_arrive_in_completion_order(stubs):
+    comments = ["you idiot", "nice", "hello", "fine"]
+    service = FakeService()
+    saved = stubs(service, FakeEngine(delays={0: 6, 1: 4, 2: 2, 3: 0}))
+
+    records = asyncio.run(_collect(stream_ingest(comments, "post.json", chunk_size=3)))
+
+    assert records[0] == {"type": "start", "total_comments": 4}
+    assert [r["index"] for r in records[1:-1]] == [3, 2, 1, 0]
+    assert all(r["type"] == "comment" for r in records[1:-1])
+    by_index = {r["index"]: r for r in records[1:-1]}
+    assert by_index[0]["toxicity_scores"] == {"toxic": 0.9, "insult": 0.1}
+    assert by_index[3]["toxicity_scores"] == {"toxic": 0.1, "insult": 0.0}
+    assert records[-1] == {"type": "summary", "status": "ok", "total_comments": 4}
+    assert service.calls == [comments[:3], comments[3:]]
+    assert saved[0]["badge_colors"] == ["red", "green", "green", "green"]
+
+
+def test_inference_error_ends_the_stream_with_an_error_record(stubs):
+    engine = FakeEngine()
+    stubs(FakeService(error=InferenceError("Toxicity model failed: boom")), engine)
+
+    async def scenario():
+        records = await _collect(stream_ingest(["a", "b"], "post.json"))
+        for _ in range(3):
+            await asyncio.sleep(0)
+        return records, [t.done() for t in engine.url_tasks + engine.comment_tasks]
+
+    engine.block_urls = True
+    records, done = asyncio.run(scenario())
+    assert records[0]["type"] == "start"
+    assert records[-1] == {"type": "error", "message": "Toxicity model failed: boom"}
+    assert not any(r["type"] == "summary" for r in records)
+    assert done == [True] * 4
+
+
+def test_closing_the_stream_cancels_outstanding_work(stubs):
+    engine = FakeEngine(block_urls=True)
+    service = FakeService(gate=asyncio.Event())
+    stubs(service, engine)
+
+    async def scenario():
+        gen = stream_ingest(["a", "b", "c"], "post.json", chunk_size=2)
+        assert (await gen.__anext__())["type"] == "start"
+        pending = asyncio.ensure_future(gen.__anext__())
+        await asyncio.sleep(0.01)
+        # The client disconnects while comments are still waiting on URL fetches
+        pending.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+        await gen.aclose()
+        for _ in range(3):
+            await asyncio.sleep(0)
+        # Checked before asyncio.run() cancels whatever is left on exit
+        return [t.cancelled() for t in engine.url_tasks + engine.comment_tasks]
+
+    # Including the second URL, which no cancelled comment task was awaiting yet
+    assert asyncio.run(scenario()) == [True] * 5
+
+
+def test_merge_toxicity_results_concatenates_chunks():
+    first, second = _prediction(["idiot", "ok"]), _prediction(["ok"])
+    merged = merge_toxicity_results([first, second])
+    assert merged["labels"] == LABELS
+    assert merged["probabilities"] == [[0.9, 0.1], [0.1, 0.0], [0.1, 0.0]]
+    assert merged["predictions"] == [[1, 0], [0, 0], [0, 0]]
+    assert merged["badge_colors"] == ["red", "green", "green"]
+    assert "detailed" not in merged
+
+    detailed = merge_toxicity_results([dict(first, detailed=[1, 2]), dict(second, detailed=[3])])
+    assert detailed["detailed"] == [1, 2, 3]
+    assert merge_toxicity_results([])["probabilities"] == []
@@ -0,0 +1,104 @@
+"""Unit tests for the background ingest job queue in :mod:`api.jobs`."""
+
+import asyncio
+
+import pytest
+
+from api.jobs import JobQueue, QueueFullError
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _echo_runner(job):
+    for _ in job.comments:
+        job.completed_comments += 1
+        job.notify()
+        await asyncio.sleep(0)
+    return {"status": "ok", "total_comments": job.total_comments}
+
+
+def test_job_runs_to_completion():
+    async def scenario():
+        queue = JobQueue(_echo_runner, workers=1)
+        job = queue.submit(["a", "b", "c"], "post.json")
+        assert job.status == "queued"
+        statuses = [s["status"] async for s in queue.watch(job)]
+        await queue.stop()
+        return job, statuses
+
+    job, statuses = run(scenario())
+    assert job.status == "done"
+    assert job.result == {"status": "ok", "total_comments": 3}
+    assert job.completed_comments == 3
+    assert statuses[0] == "queued" and statuses[-1] == "done"
+    assert job.comments == []
+
+
+def test_rejects_submissions_beyond_capacity():
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def blocked(job):
+            await gate.wait()
+            return {}
+
+        queue = JobQueue(blocked, workers=1, max_queued=2)
+        first = queue.submit(["x"], "a")
+        await asyncio.sleep(0)  # the worker takes the first job
+        queue.submit(["x"], "b")
+        queue.submit(["x"], "c")
+        with pytest.raises(QueueFullError):
+            queue.submit(["x"], "d")
+        stats = queue.stats()
+        await queue.stop()
+        return first, stats
+
+    first, stats = run(scenario())
+    assert first.status == "error"  # cancelled by stop()
+    assert stats["running"] == 1 and stats["queued"] == 2
+
+
+def test_runner_errors_are_reported_on_the_job():
+    async def failing(job):
+        raise RuntimeError("model unavailable")
+
+    async def scenario():
+        queue = JobQueue(failing, workers=1)
+        job = queue.submit(["x"], "a")
+        async for _ in queue.watch(job):
+            pass
+        await queue.stop()
+        return job
+
+    job = run(scenario())
+    assert job.status == "error"
+    assert "model unavailable" in job.error
+
+
+def test_finished_jobs_are_pruned_by_count_and_ttl():
+    async def scenario():
+        queue = JobQueue(_echo_runner, workers=2, max_finished=2, result_ttl=3600)
+        jobs = [queue.submit(["x"], str(i)) for i in range(4)]
+        for job in jobs:
+            async for _ in queue.watch(job):
+                pass
+        kept = [job.id for job in jobs if queue.get(job.id) is not None]
+
+        queue.result_ttl = 0
+        jobs[-1].finished_at -= 1
+        expired = queue.get(jobs[-1].id)
+        await queue.stop()
+        return jobs, kept, expired
+
+    jobs, kept, expired = run(scenario())
+    assert kept == [jobs[2].id, jobs[3].id]
+    assert expired is None
+
+
+def test_unknown_job():
+    async def scenario():
+        return JobQueue(_echo_runner).get("missing")
+
+    assert run(scenario()) is None
@@ -0,0 +1,66 @@
+"""Unit tests for length-bucketed sub-batching in :mod:`api.toxicity_model.toxicity_adapter`
+and how :mod:`api.toxicity_model.worker_pool` shards batches across processes."""
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from api.toxicity_model.toxicity_adapter import LengthBucketStats, _length_bucket, plan_sub_batches
+from api.toxicity_model.worker_pool import WorkerPool
+
+
+def test_every_input_is_planned_exactly_once():
+    lengths = [5, 120, 9, 7, 64, 3, 128, 12]
+    chunks = plan_sub_batches(lengths, token_budget=256)
+    assert sorted(i for chunk in chunks for i in chunk) == list(range(len(lengths)))
+
+
+def test_chunks_are_length_sorted_and_within_budget():
+    lengths = [40, 3, 100, 8, 8, 60, 2, 33]
+    for chunk in plan_sub_batches(lengths, token_budget=128):
+        chunk_lengths = [lengths[i] for i in chunk]
+        assert chunk_lengths == sorted(chunk_lengths)
+        assert len(chunk) * max(chunk_lengths) <= 128
+
+
+def test_short_inputs_are_not_padded_to_long_ones():
+    lengths = [128, 4, 4, 4, 4]
+    chunks = plan_sub_batches(lengths, token_budget=128)
+    assert chunks == [[1, 2, 3, 4], [0]]
+
+
+def test_row_longer_than_budget_still_gets_its_own_batch():
+    assert plan_sub_batches([10, 500], token_budget=100) == [[0], [1]]
+
+
+def test_empty_input_plans_nothing():
+    assert plan_sub_batches([], token_budget=128) == []
+
+
+@pytest.mark.parametrize("width,bucket", [(1, 16), (16, 16), (17, 32), (100, 128), (512, 128)])
+def test_length_bucket(width, bucket):
+    assert _length_bucket(width) == bucket
+
+
+def test_merged_worker_stats_sum_raw_counters():
+    a, b = LengthBucketStats(), LengthBucketStats()
+    a.record(width=10, rows=4, tokens=30, seconds=0.5)
+    b.record(width=12, rows=2, tokens=24, seconds=0.5)
+    b.record(width=100, rows=1, tokens=100, seconds=1.0)
+
+    merged = LengthBucketStats()
+    merged.merge(a.raw())
+    merged.merge(b.raw())
+    stats = merged.snapshot()
+    assert stats["<=16"]["sequences"] == 6
+    assert stats["<=16"]["tokens_per_sec"] == 54.0
+    assert stats["<=16"]["padding_ratio"] == pytest.approx(1 - 54 / 64, abs=1e-4)
+    assert stats["<=128"]["batches"] == 1
+
+
+@pytest.mark.parametrize("size,workers,expected_shards", [(1, 4, 1), (7, 4, 1), (16, 4, 4), (100, 4, 4), (9, 8, 2)])
+def test_pool_shards_cover_batch_once(size, workers, expected_shards):
+    shards = WorkerPool(workers=workers)._shards([{"id": str(i), "text": ""} for i in range(size)])
+    assert len(shards) == expected_shards
+    assert sorted(i for shard in shards for i in shard) == list(range(size))
@@ -0,0 +1,101 @@
+"""Unit tests for the Prometheus text output of :mod:`api.metrics_exporter`."""
+
+import re
+
+import pytest
+
+from api.metrics_exporter import render_metrics
+from api.performance_monitor import PerformanceMonitor
+
+SAMPLE_RX = re.compile(r'^(?P<name>[a-z_]+)(?:\{(?P<labels>.*)\})? (?P<value>\S+)$')
+
+
+def parse(text):
+    """{(name, frozenset(labels)): value} for every sample line, checking TYPE lines come first."""
+    samples, typed = {}, set()
+    for line in text.splitlines():
+        if line.startswith("# TYPE"):
+            typed.add(line.split()[2])
+            continue
+        if line.startswith("#"):
+            continue
+        m = SAMPLE_RX.match(line)
+        assert m, line
+        name = m.group("name")
+        assert any(name == t or name.startswith(t + "_") for t in typed), f"{name} has no TYPE"
+        labels = frozenset(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', m.group("labels") or ""))
+        samples[(name, labels)] = float(m.group("value"))
+    return samples
+
+
+@pytest.fixture
+def monitor():
+    m = PerformanceMonitor(enable_logging=False)
+    for _ in range(3):
+        m.record_comment_processed()
+    m.record_url_verification(True, "reachable")
+    m.record_url_verification(False, "dns_failure:[Errno -2] Name or service not known")
+    m.record_url_verification(False, "dns_failure:timeout")
+    for ms in (2.0, 30.0, 400.0):
+        m.record_latency("model_inference", ms)
+    m.record_endpoint("GET /jobs/{job_id}", 12.0)
+    m.record_batch(3, 20.0)
+    m.record_batch(40, 80.0)
+    m.record_cache_lookup("url_verification", True)
+    m.record_cache_lookup("url_verification", False)
+    return m
+
+
+def test_counters(monitor):
+    samples = parse(render_metrics(monitor))
+    assert samples[("trustlens_comments_processed_total", frozenset())] == 3
+    key = ("trustlens_url_verifications_total", frozenset({("outcome", "failed"), ("reason", "dns_failure")}))
+    assert samples[key] == 2
+    assert samples[("trustlens_url_verifications_total",
+                    frozenset({("outcome", "verified"), ("reason", "reachable")}))] == 1
+
+
+def test_latency_histogram_buckets_are_cumulative(monitor):
+    samples = parse(render_metrics(monitor))
+    labels = {("operation", "model_inference")}
+    buckets = sorted(
+        (float(dict(l)["le"]), v) for (name, l), v in samples.items()
+        if name == "trustlens_operation_duration_seconds_bucket" and labels <= l and dict(l)["le"] != "+Inf"
+    )
+    counts = [v for _, v in buckets]
+    assert counts == sorted(counts)
+    assert dict(buckets)[0.0025] == 1
+    assert dict(buckets)[0.05] == 2
+    assert dict(buckets)[0.5] == 3
+    inf = ("trustlens_operation_duration_seconds_bucket", frozenset(labels | {("le", "+Inf")}))
+    assert samples[inf] == samples[("trustlens_operation_duration_seconds_count", frozenset(labels))] == 3
+    assert samples[("trustlens_operation_duration_seconds_sum", frozenset(labels))] == pytest.approx(0.432)
+
+
+def test_endpoints_are_labelled_by_method_and_route(monitor):
+    samples = parse(render_metrics(monitor))
+    labels = frozenset({("method", "GET"), ("route", "/jobs/{job_id}")})
+    assert samples[("trustlens_http_request_duration_seconds_count", labels)] == 1
+
+
+def test_batch_sizes_and_caches(monitor):
+    samples = parse(render_metrics(monitor, caches={"toxicity_scores": {"hits": 3, "misses": 1}}))
+    assert samples[("trustlens_model_batch_size_bucket", frozenset({("le", "4.0")}))] == 1
+    assert samples[("trustlens_model_batch_size_bucket", frozenset({("le", "64.0")}))] == 2
+    assert samples[("trustlens_model_batch_size_sum", frozenset())] == 43
+    assert samples[("trustlens_cache_hit_ratio", frozenset({("cache", "toxicity_scores")}))] == 0.75
+    assert samples[("trustlens_cache_lookups_total",
+                    frozenset({("cache", "url_verification"), ("result", "miss")}))] == 1
+
+
+def test_in_flight_gauge(monitor):
+    monitor.request_started()
+    monitor.request_started()
+    monitor.request_finished()
+    assert parse(render_metrics(monitor))[("trustlens_http_requests_in_flight", frozenset())] == 1
+
+
+def test_label_values_are_escaped():
+    m = PerformanceMonitor(enable_logging=False)
+    m.record_endpoint('GET /a"b\\c', 1.0)
+    assert 'route="/a\\"b\\\\c"' in render_metrics(m)
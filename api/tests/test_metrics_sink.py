@@ -0,0 +1,69 @@
+"""Unit tests for the rotating JSONL output of :mod:`api.metrics_sink`."""
+
+import json
+import time
+
+import pytest
+
+from api.metrics_sink import RollingMetricsSink
+from api.performance_monitor import PerformanceMonitor
+
+
+@pytest.fixture
+def monitor():
+    m = PerformanceMonitor(enable_logging=False)
+    m.record_comment_processed()
+    m.record_latency("model_inference", 25.0)
+    return m
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_flush_appends_one_snapshot_per_call(tmp_path, monitor):
+    path = tmp_path / "metrics.jsonl"
+    sink = RollingMetricsSink(monitor, str(path), interval=60)
+    assert sink.flush() and sink.flush()
+    records = _lines(path)
+    assert len(records) == 2
+    assert records[0]["total_comments_processed"] == 1
+    assert records[0]["operations"]["model_inference"]["sample_size"] == 1
+    assert records[0]["time"] <= records[1]["time"]
+
+
+def test_rotates_by_size_and_keeps_only_backups(tmp_path, monitor):
+    path = tmp_path / "metrics.jsonl"
+    sink = RollingMetricsSink(monitor, str(path), interval=60, max_bytes=1, backups=2)
+    for _ in range(4):
+        sink.flush()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["metrics.jsonl", "metrics.jsonl.1", "metrics.jsonl.2"]
+    assert len(_lines(path)) == 1
+    assert sink.stats()["rotations"] == 3
+
+
+def test_rotates_by_age_across_restarts(tmp_path, monitor):
+    path = tmp_path / "metrics.jsonl"
+    path.write_text(json.dumps({"time": time.time() - 7200}) + "\n")
+    sink = RollingMetricsSink(monitor, str(path), interval=60, max_age=3600)
+    sink.flush()
+    assert json.loads((tmp_path / "metrics.jsonl.1").read_text())["time"] < time.time() - 3600
+    assert len(_lines(path)) == 1
+
+    # The new file is young, so the next snapshot goes into it
+    sink.flush()
+    assert len(_lines(path)) == 2
+
+
+def test_background_thread_writes_until_closed(tmp_path, monitor):
+    path = tmp_path / "metrics.jsonl"
+    sink = RollingMetricsSink(monitor, str(path), interval=0.01)
+    sink.start()
+    deadline = time.time() + 5
+    while sink.written < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    sink.close()
+    written = sink.written
+    assert written >= 3  # at least two periodic snapshots plus the final one
+    assert len(_lines(path)) == written
+    assert not sink.stats()["running"]
@@ -0,0 +1,46 @@
+"""Unit tests for combining toxicity and evidence results in :mod:`api.output_formatter`."""
+
+from api.output_formatter import format_all_results, toxicity_rows
+
+LABELS = ["toxic", "insult"]
+
+COMPACT = {
+    "labels": LABELS,
+    "probabilities": [[0.9, 0.2], [0.1, 0.05]],
+    "predictions": [[1, 0], [0, 0]],
+    "badge_colors": ["red", "green"],
+}
+
+DETAILED = dict(COMPACT, detailed=[
+    {"id": "0", "text": "a", "scores": {"toxic": 0.9, "insult": 0.2},
+     "predictions": {"toxic": 1, "insult": 0}, "badge_color": "red"},
+    {"id": "1", "text": "b", "scores": {"toxic": 0.1, "insult": 0.05},
+     "predictions": {"toxic": 0, "insult": 0}, "badge_color": "green"},
+])
+
+
+def test_compact_results_give_the_same_rows_as_detailed():
+    for compact_row, detailed_row in zip(toxicity_rows(COMPACT), toxicity_rows(DETAILED)):
+        for key in ("scores", "predictions", "badge_color"):
+            assert compact_row[key] == detailed_row[key]
+
+
+def test_format_all_results_accepts_compact_toxicity():
+    output = format_all_results(["a", "b"], COMPACT, [{"status": "None"}, {"status": "None"}])
+    first, second = output["comments"]
+    assert first["toxicity_level"] == "Toxic"
+    assert first["toxicity_scores"] == {"toxic": 0.9, "insult": 0.2}
+    assert first["toxicity_predictions"] == {"toxic": 1, "insult": 0}
+    assert second["toxicity_level"] == "Neutral"
+    assert output["summary"]["toxicity"] == {"toxic": 1, "mild": 0, "neutral": 1}
+
+
+def test_missing_toxicity_defaults_to_neutral():
+    output = format_all_results(["a"], {}, [])
+    assert output["comments"][0]["toxicity_level"] == "Neutral"
+
+
+def test_post_metadata_is_kept_when_given():
+    post = {"subreddit": "science", "id": "abc"}
+    assert format_all_results(["a"], COMPACT, [], post=post)["post"] == post
+    assert "post" not in format_all_results(["a"], COMPACT, [])
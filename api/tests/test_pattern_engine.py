@@ -0,0 +1,128 @@
+"""Unit tests for the compiled evidence pattern matcher in :mod:`api.pattern_engine`."""
+
+import json
+import os
+import re
+
+import pytest
+
+from api import pattern_engine
+from api.pattern_engine import CompiledPatterns, PatternEngine
+
+PATTERNS = {
+    "simple_keywords": ["study", "Studies", "source", "sources", "study", ""],
+    "sentence_patterns": [
+        {"pattern": r"according to (a|the) \w+", "flags": "i", "description": "According to"},
+        {"pattern": r"\b(\d{4})\b.*\b\1\b", "description": "Repeated year"},
+        {"pattern": r"Published in", "description": "Published"},
+        {"pattern": r"([unclosed", "description": "Invalid"},
+    ],
+    "multi_word_phrases": ["peer reviewed", "peer reviewed study"],
+    "credibility_indicators": [
+        {"type": "academic", "keywords": ["journal", "University"]},
+        {"type": "official", "keywords": ["journal", "cdc"]},
+    ],
+}
+
+TEXTS = [
+    "",
+    "Just my opinion.",
+    "According to the CDC, sources say a peer reviewed study in a Journal...",
+    "published in 2020, again in 2020 by the university",
+    "Published in Nature; studies show it",
+]
+
+
+def reference_match(patterns, text):
+    """The original per-pattern loop from evidence.detect_pattern_based_evidence."""
+    text_lower = text.lower()
+    out = {
+        "simple_keyword_matches": [],
+        "sentence_pattern_matches": [],
+        "phrase_matches": [],
+        "credibility_matches": [],
+    }
+    for keyword in patterns.get("simple_keywords", []):
+        if keyword.lower() in text_lower:
+            out["simple_keyword_matches"].append(keyword)
+    for pattern_obj in patterns.get("sentence_patterns", []):
+        pattern = pattern_obj.get("pattern", "")
+        flags = re.IGNORECASE if pattern_obj.get("flags", "").lower() == "i" else 0
+        try:
+            if re.search(pattern, text, flags):
+                out["sentence_pattern_matches"].append(
+                    {"pattern": pattern_obj.get("description", pattern), "regex": pattern}
+                )
+        except re.error:
+            continue
+    for phrase in patterns.get("multi_word_phrases", []):
+        if phrase.lower() in text_lower:
+            out["phrase_matches"].append(phrase)
+    for group in patterns.get("credibility_indicators", []):
+        for keyword in group.get("keywords", []):
+            if keyword.lower() in text_lower:
+                out["credibility_matches"].append({"type": group.get("type", ""), "keyword": keyword})
+    return out
+
+
+@pytest.fixture(params=["automaton", "scan"])
+def compiled(request, monkeypatch):
+    if request.param == "scan":
+        monkeypatch.setattr(pattern_engine, "ahocorasick", None)
+    elif pattern_engine.ahocorasick is None:
+        pytest.skip("pyahocorasick not installed")
+    return CompiledPatterns(PATTERNS)
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_matches_are_identical_to_reference_loop(compiled, text):
+    assert compiled.match(text) == reference_match(PATTERNS, text)
+
+
+def test_backreference_pattern_disables_prefilter():
+    compiled = CompiledPatterns(PATTERNS)
+    assert compiled._prefilter is None
+    assert compiled.match("in 1999 and 1999")["sentence_pattern_matches"] == [
+        {"pattern": "Repeated year", "regex": r"\b(\d{4})\b.*\b\1\b"}
+    ]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_combined_prefilter_gives_identical_matches(text):
+    patterns = dict(PATTERNS, sentence_patterns=[
+        p for p in PATTERNS["sentence_patterns"] if p["description"] != "Repeated year"
+    ])
+    compiled = CompiledPatterns(patterns)
+    assert compiled._prefilter is not None
+    assert compiled.match(text) == reference_match(patterns, text)
+
+
+def test_empty_document_matches_nothing():
+    assert CompiledPatterns({}).match("according to a study") == reference_match({}, "according to a study")
+
+
+class TestPatternEngineReload:
+    def _write(self, path, patterns):
+        path.write_text(json.dumps(patterns), encoding="utf-8")
+
+    def _engine(self, path):
+        return PatternEngine(str(path), lambda: json.loads(path.read_text(encoding="utf-8")), reload_interval=0)
+
+    def test_picks_up_changes_without_restart(self, tmp_path):
+        path = tmp_path / "evidence_patterns.json"
+        self._write(path, {"simple_keywords": ["study"]})
+        engine = self._engine(path)
+        assert engine.get().match("a survey")["simple_keyword_matches"] == []
+
+        self._write(path, {"simple_keywords": ["survey"]})
+        os.utime(path, (1, engine._mtime + 10))
+        assert engine.get().match("a survey")["simple_keyword_matches"] == ["survey"]
+
+    def test_keeps_previous_patterns_when_file_is_invalid(self, tmp_path):
+        path = tmp_path / "evidence_patterns.json"
+        self._write(path, {"simple_keywords": ["study"]})
+        engine = self._engine(path)
+
+        path.write_text("{not json", encoding="utf-8")
+        os.utime(path, (1, engine._mtime + 10))
+        assert engine.get().match("a study")["simple_keyword_matches"] == ["study"]
@@ -0,0 +1,134 @@
+"""Unit tests for the latency histograms and thread-sharded counters in :mod:`api.performance_monitor`."""
+
+import random
+import threading
+
+import pytest
+
+from api.performance_monitor import CORE_OPERATIONS, STAGE_OPERATIONS, LatencyHistogram, PerformanceMonitor
+
+
+def _exact(samples, q):
+    ordered = sorted(samples)
+    return ordered[max(1, -(-int(q * 1000) * len(ordered) // 1000)) - 1]
+
+
+@pytest.fixture
+def monitor():
+    return PerformanceMonitor(enable_logging=False)
+
+
+def test_percentiles_are_within_bucket_precision():
+    rng = random.Random(7)
+    samples = [rng.lognormvariate(3, 1.2) for _ in range(20_000)]
+    histogram = LatencyHistogram()
+    for value in samples:
+        histogram.record(value)
+
+    snap = histogram.snapshot()
+    for name, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p999", 0.999)):
+        assert snap[name] == pytest.approx(_exact(samples, q), rel=0.035)
+    assert snap["min"] == min(samples)
+    assert snap["max"] == max(samples)
+    assert snap["avg"] == pytest.approx(sum(samples) / len(samples))
+
+
+def test_memory_does_not_grow_with_samples():
+    histogram = LatencyHistogram()
+    size = len(histogram.counts)
+    for i in range(50_000):
+        histogram.record(i * 0.37)
+    assert len(histogram.counts) == size
+    assert histogram.count == 50_000
+
+
+def test_out_of_range_values_are_clamped_but_min_max_exact():
+    histogram = LatencyHistogram()
+    histogram.record(0.0)
+    histogram.record(1e12)
+    snap = histogram.snapshot()
+    assert (snap["min"], snap["max"]) == (0.0, 1e12)
+    assert snap["p50"] == 0.0
+    assert snap["p999"] == 1e12
+
+
+def test_single_sample_reports_that_sample():
+    histogram = LatencyHistogram()
+    histogram.record(12.5)
+    snap = histogram.snapshot()
+    assert all(snap[p] == 12.5 for p in ("p50", "p90", "p99", "p999"))
+    assert snap["std_dev"] == 0
+
+
+def test_empty_histogram_snapshot_is_zero():
+    snap = LatencyHistogram().snapshot()
+    assert snap["count"] == 0
+    assert snap["p99"] == 0
+
+
+def test_any_operation_name_is_tracked(monitor):
+    monitor.record_latency("model_inference", 40.0)
+    monitor.record_latency("model_inference", 60.0)
+    stats = monitor.get_all_stats()["operations"]
+    assert set(CORE_OPERATIONS) <= set(stats)
+    assert stats["model_inference"]["sample_size"] == 2
+    assert stats["model_inference"]["avg_latency_ms"] == 50.0
+    assert stats["pattern_detection"]["sample_size"] == 0
+    assert monitor.get_stats("unknown") == {}
+
+
+def test_endpoint_latencies_are_reported_separately(monitor):
+    for latency in (5.0, 7.0, 900.0):
+        monitor.record_endpoint("POST /ingest", latency)
+    endpoints = monitor.get_all_stats()["endpoints"]
+    assert list(endpoints) == ["POST /ingest"]
+    assert endpoints["POST /ingest"]["sample_size"] == 3
+    assert endpoints["POST /ingest"]["p99_latency_ms"] == 900.0
+
+
+def test_reset_clears_histograms(monitor):
+    monitor.record_latency("dns_resolution", 3.0)
+    monitor.record_latency("custom_stage", 3.0)
+    monitor.record_endpoint("GET /health", 1.0)
+    monitor.request_started()
+    monitor.reset()
+    stats = monitor.get_all_stats()
+    assert stats["operations"]["dns_resolution"]["sample_size"] == 0
+    assert "custom_stage" not in stats["operations"]
+    assert stats["endpoints"] == {}
+    assert stats["in_flight_requests"] == 1
+
+
+def test_registered_operations_are_reported_before_any_sample(monitor):
+    monitor.register_operations("rerank")
+    operations = monitor.get_all_stats()["operations"]
+    assert list(operations)[:len(CORE_OPERATIONS) + len(STAGE_OPERATIONS)] == [*CORE_OPERATIONS, *STAGE_OPERATIONS]
+    assert operations["rerank"]["sample_size"] == 0
+
+
+def test_concurrent_recording_loses_nothing(monitor):
+    def work(worker):
+        for i in range(2_000):
+            monitor.record_comment_processed()
+            monitor.record_latency("url_verification", 1.0 + worker)
+            monitor.record_url_verification(i % 2 == 0, "reachable" if i % 2 == 0 else "http_404")
+            monitor.record_cache_lookup("url_verification", hit=i % 4 == 0)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    # Reading while the writers run must not fail or see half an update
+    while any(t.is_alive() for t in threads):
+        stats = monitor.get_all_stats()
+        assert stats["total_urls_verified"] == (stats["successful_verifications"]
+                                                + stats["failed_verifications"])
+    for t in threads:
+        t.join()
+
+    # The threads have exited; their shards are folded in, not dropped
+    stats = monitor.get_all_stats()
+    assert stats["total_comments_processed"] == monitor.total_comments_processed == 16_000
+    assert stats["operations"]["url_verification"]["sample_size"] == 16_000
+    assert stats["operations"]["url_verification"]["max_latency_ms"] == 8.0
+    assert stats["verification_reasons"] == {"verified": {"reachable": 8_000}, "failed": {"http_404": 8_000}}
+    assert stats["caches"]["url_verification"]["hits"] == 4_000
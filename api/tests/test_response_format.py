@@ -0,0 +1,57 @@
+"""Unit tests for the compact /predict encodings in :mod:`api.toxicity_model.response_format`."""
+
+import json
+
+import numpy as np
+import pytest
+
+from api.toxicity_model.response_format import compact_response, decode_probabilities
+
+LABELS = ["toxic", "severe_toxic", "obscene"]
+PROBS = np.array([[0.123456789, 0.5, 0.0001], [0.9999999, 0.3, 0.7]], dtype=np.float32)
+COLORS = ["yellow", "red"]
+
+
+@pytest.mark.parametrize("encoding", ["json", "base64"])
+def test_round_trip(encoding):
+    response = json.loads(json.dumps(compact_response(LABELS, PROBS, COLORS, 0.5, encoding)))
+    decoded = decode_probabilities(response)
+    assert decoded.shape == PROBS.shape
+    np.testing.assert_allclose(decoded, PROBS, atol=5e-7)
+    assert response["labels"] == LABELS
+    assert response["badge_colors"] == COLORS
+
+
+def test_base64_is_exact_float32():
+    response = compact_response(LABELS, PROBS, COLORS, 0.5, "base64")
+    assert decode_probabilities(response).tobytes() == PROBS.astype("<f4").tobytes()
+
+
+def test_json_probabilities_are_rounded():
+    response = compact_response(LABELS, PROBS, COLORS, 0.5)
+    assert response["probabilities"][0][0] == 0.123457
+
+
+def test_compact_response_has_no_text_or_per_row_labels():
+    response = compact_response(LABELS, PROBS, COLORS, 0.5)
+    assert set(response) == {"format", "labels", "threshold", "badge_colors", "probabilities"}
+
+
+def test_predictions_can_be_derived_from_threshold():
+    response = compact_response(LABELS, PROBS, COLORS, 0.5, "base64")
+    preds = (decode_probabilities(response) >= response["threshold"]).astype(int).tolist()
+    assert preds == [[0, 1, 0], [1, 0, 1]]
+
+
+def test_empty_matrix():
+    empty = np.empty((0, len(LABELS)), dtype=np.float32)
+    for encoding in ("json", "base64"):
+        assert decode_probabilities(compact_response(LABELS, empty, [], 0.5, encoding)).shape == (0, len(LABELS))
+
+
+def test_badges_are_not_rederived_from_rounded_scores():
+    # Just under the red cutoff: the rounded JSON shows 0.7, the badge stays yellow
+    probs = np.array([[0.6999997, 0.0, 0.0]], dtype=np.float32)
+    response = compact_response(LABELS, probs, ["yellow"], 0.5)
+    assert response["probabilities"][0][0] == 0.7
+    assert response["badge_colors"] == ["yellow"]
@@ -0,0 +1,107 @@
+"""Unit tests for the content-hash toxicity score cache in :mod:`api.toxicity_model.score_cache`."""
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from api.cache import TieredCache
+from api.toxicity_model.base import BaseAdapter
+from api.toxicity_model.score_cache import ScoreCache, normalize_text, score_cache_key
+from api.toxicity_model.toxicity_adapter import LABELS
+
+
+class CountingAdapter(BaseAdapter):
+    """Scores each text by its length and records every text sent to the model."""
+
+    def __init__(self, model_id="fake:v1"):
+        super().__init__()
+        self._model_id = model_id
+        self.seen = []
+
+    @property
+    def model_id(self):
+        return self._model_id
+
+    def load(self):
+        self._ready = True
+
+    def infer(self, batch):
+        self.seen.extend(item["text"] for item in batch)
+        return [
+            {"id": item["id"], "text": item["text"], "probabilities": [min(len(item["text"]) / 10, 1.0)] * len(LABELS)}
+            for item in batch
+        ]
+
+
+def _batch(*texts):
+    return [{"id": str(i), "text": t} for i, t in enumerate(texts)]
+
+
+@pytest.fixture
+def scorer():
+    adapter = CountingAdapter()
+    return ScoreCache(adapter, TieredCache("toxicity_scores", max_entries=100), ttl=60)
+
+
+def test_only_misses_reach_the_model(scorer):
+    scorer.infer(_batch("abc", "defgh"))
+    results = scorer.infer(_batch("abc", "new longer text", "defgh"))
+
+    assert scorer.adapter.seen == ["abc", "defgh", "new longer text"]
+    assert [r["text"] for r in results] == ["abc", "new longer text", "defgh"]
+    assert [r["id"] for r in results] == ["0", "1", "2"]
+    assert results[0]["probabilities"][0] == pytest.approx(0.3)
+    assert results[1]["badge_color"] == "red"
+
+
+def test_duplicates_in_one_batch_are_scored_once(scorer):
+    results = scorer.infer(_batch("same", "same ", "  same"))
+    assert scorer.adapter.seen == ["same"]
+    assert len(results) == 3
+    assert [r["text"] for r in results] == ["same", "same ", "  same"]
+
+
+def test_hit_ratio(scorer):
+    scorer.infer(_batch("a", "b"))
+    scorer.infer(_batch("a", "b", "c", "d"))
+    stats = scorer.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 4)
+    assert stats["hit_ratio"] == pytest.approx(1 / 3, abs=1e-4)
+    assert stats["memory_entries"] == 4
+
+
+def test_model_identity_is_part_of_the_key():
+    store = TieredCache("toxicity_scores", max_entries=100)
+    ScoreCache(CountingAdapter("fake:v1"), store, ttl=60).infer(_batch("text"))
+    other = CountingAdapter("fake:v2")
+    ScoreCache(other, store, ttl=60).infer(_batch("text"))
+    assert other.seen == ["text"]
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    db_path = str(tmp_path / "scores.db")
+    ScoreCache(CountingAdapter(), TieredCache("toxicity_scores", db_path=db_path), ttl=60).infer(_batch("persisted"))
+
+    adapter = CountingAdapter()
+    results = ScoreCache(adapter, TieredCache("toxicity_scores", db_path=db_path), ttl=60).infer(_batch("persisted"))
+    assert adapter.seen == []
+    assert results[0]["probabilities"][0] == pytest.approx(0.9)
+
+
+def test_empty_batch(scorer):
+    assert scorer.infer([]) == []
+    assert scorer.stats()["hits"] == scorer.stats()["misses"] == 0
+
+
+def test_normalization_only_collapses_whitespace():
+    assert normalize_text("  a \t\n b  ") == "a b"
+    assert normalize_text("Cafe\u0301") == "Caf\u00e9"
+    assert score_cache_key("A b", "m") != score_cache_key("a b", "m")
+
+
+def test_infer_probs_matches_infer(scorer):
+    batch = _batch("abc", "defgh", "abc")
+    probs = scorer.infer_probs(batch)
+    assert probs.shape == (3, len(LABELS))
+    assert probs.tolist() == [r["probabilities"] for r in scorer.infer(batch)]
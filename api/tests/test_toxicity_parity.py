@@ -0,0 +1,70 @@
+"""Unit tests for the PyTorch/ONNX parity report in :mod:`api.toxicity_model.parity`."""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from api.toxicity_model.onnx_adapter import onnx_model_path
+from api.toxicity_model.parity import compare_probabilities
+from api.toxicity_model.toxicity_adapter import LABELS
+
+
+def _matrix(*rows):
+    return np.array(rows, dtype=np.float32)
+
+
+REFERENCE = _matrix(
+    [0.01, 0.0, 0.02, 0.0, 0.01, 0.0],
+    [0.45, 0.1, 0.2, 0.0, 0.3, 0.0],
+    [0.95, 0.4, 0.8, 0.1, 0.9, 0.05],
+)
+
+
+def test_identical_scores_pass():
+    report = compare_probabilities(REFERENCE, REFERENCE.copy())
+    assert report["ok"]
+    assert report["max_abs_diff"] == 0.0
+    assert set(report["per_label_max_abs_diff"]) == set(LABELS)
+
+
+def test_small_drift_within_tolerance_passes():
+    report = compare_probabilities(REFERENCE, REFERENCE + 0.005, tolerance=0.01)
+    assert report["ok"]
+    assert report["rows_over_tolerance"] == []
+
+
+def test_rows_over_tolerance_are_reported():
+    candidate = REFERENCE.copy()
+    candidate[2, 3] += 0.1
+    report = compare_probabilities(REFERENCE, candidate, tolerance=0.02)
+    assert not report["ok"]
+    assert report["rows_over_tolerance"] == [2]
+    assert report["per_label_max_abs_diff"]["threat"] == pytest.approx(0.1, abs=1e-6)
+    assert report["badge_mismatches"] == []
+
+
+def test_badge_band_change_fails_even_within_tolerance():
+    reference = _matrix([0.299, 0, 0, 0, 0, 0], [0.69, 0, 0, 0, 0, 0])
+    candidate = _matrix([0.301, 0, 0, 0, 0, 0], [0.71, 0, 0, 0, 0, 0])
+    report = compare_probabilities(reference, candidate, tolerance=0.05)
+    assert report["rows_over_tolerance"] == []
+    assert report["badge_mismatches"] == [
+        {"index": 0, "reference": "green", "candidate": "yellow"},
+        {"index": 1, "reference": "yellow", "candidate": "red"},
+    ]
+    assert not report["ok"]
+
+
+def test_shape_mismatch_raises():
+    with pytest.raises(ValueError):
+        compare_probabilities(REFERENCE, REFERENCE[:2])
+
+
+def test_onnx_cache_paths_distinguish_quantized_graphs(tmp_path):
+    fp32 = onnx_model_path("unitary/toxic-bert", quantize=False, onnx_dir=str(tmp_path))
+    int8 = onnx_model_path("unitary/toxic-bert", quantize=True, onnx_dir=str(tmp_path))
+    assert fp32 != int8
+    assert fp32.endswith("unitary__toxic-bert.onnx")
+    assert int8.endswith("unitary__toxic-bert.int8.onnx")
@@ -0,0 +1,126 @@
+"""Unit tests for span nesting, the slow-request log and OTLP/JSON export in :mod:`api.tracing`."""
+
+import asyncio
+import json
+
+import pytest
+
+from api import tracing
+
+
+def _traced(name="POST /ingest", **kwargs):
+    return tracing.start_trace(name, **kwargs)
+
+
+def _names(node):
+    return [node["name"], [_names(child) for child in node["children"]]]
+
+
+def test_spans_nest_across_tasks_and_threads():
+    root = _traced()
+
+    def parse():
+        with tracing.span("html_parse"):
+            pass
+
+    async def verify(url):
+        with tracing.span("verify_and_classify", **{"url.full": url}):
+            with tracing.span("dns"):
+                await asyncio.sleep(0)
+            with tracing.span("classify"):
+                await asyncio.to_thread(parse)
+
+    async def handler():
+        with tracing.use_span(root):
+            await asyncio.gather(verify("https://a.example"), verify("https://b.example"))
+        root.end()
+
+    asyncio.run(handler())
+    tree = root.trace.tree()
+    verify_node = ["verify_and_classify", [["dns", []], ["classify", [["html_parse", []]]]]]
+    assert _names(tree["root"]) == ["POST /ingest", [verify_node, verify_node]]
+    assert tree["duration_ms"] >= max(child["duration_ms"] for child in tree["root"]["children"])
+
+
+def test_span_outside_a_trace_is_a_no_op():
+    with tracing.span("dns") as span:
+        span.set_attribute("dns.ok", True)
+    assert span is tracing.NOOP_SPAN
+    assert tracing.current_span() is None
+
+
+def test_errors_are_recorded_and_reraised():
+    root = _traced()
+    with tracing.use_span(root):
+        with pytest.raises(TimeoutError):
+            with tracing.span("http_get"):
+                raise TimeoutError("read timed out")
+    root.end()
+    (child,) = root.trace.tree()["root"]["children"]
+    assert child["error"] == "TimeoutError: read timed out"
+
+
+def test_traceparent_continues_the_callers_trace():
+    header = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+    root = _traced(traceparent=header)
+    assert root.trace.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert root.parent_id == "00f067aa0ba902b7"
+    with tracing.use_span(root):
+        assert tracing.traceparent() == f"00-{root.trace.trace_id}-{root.span_id}-01"
+    assert _traced(traceparent="garbage").parent_id is None
+
+
+def test_background_trace_links_to_the_submitting_request():
+    request = _traced()
+    with tracing.trace("ingest_job", parent=request) as job:
+        pass
+    assert job.trace.trace_id == request.trace.trace_id
+    assert job.parent_id == request.span_id
+
+
+def test_slow_log_keeps_the_worst_n():
+    log = tracing.SlowTraceLog(capacity=2)
+    for ms in (5, 50, 1, 20):
+        root = _traced(f"req {ms}")
+        root.end()
+        root.end_ns = root.start_ns + ms * 1_000_000
+        log.add(root.trace)
+    assert [t["root"]["name"] for t in log.worst()] == ["req 50", "req 20"]
+
+
+def test_spans_beyond_the_cap_are_dropped(monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_MAX_SPANS", 3)
+    root = _traced()
+    with tracing.use_span(root):
+        for _ in range(5):
+            with tracing.span("format_comment"):
+                pass
+    root.end()
+    assert len(root.trace.spans) == 4  # three children and the root
+    assert root.trace.dropped_spans == 2
+    assert root.attributes["trace.dropped_spans"] == 2
+
+
+def test_otlp_export_to_file(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = tracing.TraceExporter(path=str(path), endpoint=None)
+    root = _traced(**{"http.request.method": "POST"})
+    with tracing.use_span(root):
+        with tracing.span("dns", **{"dns.ok": True, "dns.addresses": 2}):
+            pass
+    root.end()
+    exporter.export(root.trace)
+    exporter.close()
+
+    (line,) = path.read_text().splitlines()
+    (resource,) = json.loads(line)["resourceSpans"]
+    assert resource["resource"]["attributes"][0]["key"] == "service.name"
+    spans = {s["name"]: s for s in resource["scopeSpans"][0]["spans"]}
+    dns, server = spans["dns"], spans["POST /ingest"]
+    assert len(dns["traceId"]) == 32 and len(dns["spanId"]) == 16
+    assert dns["parentSpanId"] == server["spanId"] and "parentSpanId" not in server
+    assert server["kind"] == tracing.SPAN_KIND_SERVER
+    assert int(dns["startTimeUnixNano"]) <= int(dns["endTimeUnixNano"])
+    assert {"key": "dns.addresses", "value": {"intValue": "2"}} in dns["attributes"]
+    assert {"key": "dns.ok", "value": {"boolValue": True}} in dns["attributes"]
+    assert exporter.stats()["exported"] == 1
@@ -0,0 +1,105 @@
+"""Unit tests for concurrency limits and URL dedup in :mod:`api.verification_engine`."""
+
+import asyncio
+import importlib
+from collections import Counter
+
+import pytest
+
+from api import verification_engine
+from api.verification_engine import VerificationEngine
+
+
+class FakeVerifier:
+    """Stands in for verify_and_classify_async, recording concurrency per host."""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.running = Counter()
+        self.peak = Counter()
+        self.peak_total = 0
+
+    async def __call__(self, url):
+        host = url.split("/")[2]
+        self.calls[url] += 1
+        self.running[host] += 1
+        self.peak[host] = max(self.peak[host], self.running[host])
+        self.peak_total = max(self.peak_total, sum(self.running.values()))
+        await asyncio.sleep(0.001)
+        self.running[host] -= 1
+        return {"verified": True, "input_url": url, "final_url": url, "domain": host}
+
+
+@pytest.fixture
+def verifier(monkeypatch):
+    fake = FakeVerifier()
+    monkeypatch.setattr(verification_engine, "verify_and_classify_async", fake)
+    return fake
+
+
+def test_global_concurrency_cap(verifier):
+    engine = VerificationEngine(max_concurrency=3, per_host_limit=10)
+    urls = [f"https://host{i}.example/page" for i in range(12)]
+    results = asyncio.run(engine.verify_urls(urls))
+    assert list(results) == urls
+    assert verifier.peak_total == 3
+
+
+def test_per_host_cap_leaves_room_for_other_hosts(verifier):
+    engine = VerificationEngine(max_concurrency=10, per_host_limit=2)
+    urls = [f"https://busy.example/{i}" for i in range(8)] + [f"https://other{i}.example/" for i in range(4)]
+    asyncio.run(engine.verify_urls(urls))
+    assert verifier.peak["busy.example"] == 2
+    assert verifier.peak_total == 6  # two busy.example slots plus the four other hosts
+
+
+def test_each_distinct_url_is_verified_once(verifier):
+    engine = VerificationEngine()
+    shared = "https://news.example/story"
+    comments = [
+        {"comment_id": "c0", "text": f"see {shared}"},
+        {"comment_id": "c1", "text": f"{shared} and https://docs.example/a"},
+        {"comment_id": "c2", "text": "no links"},
+    ]
+    results = asyncio.run(engine.analyze_comments(comments))
+    assert verifier.calls == {shared: 1, "https://docs.example/a": 1}
+    assert [r["comment_id"] for r in results] == ["c0", "c1", "c2"]
+    assert [r["status"] for r in results[:2]] == ["Verified", "Verified"]
+
+    asyncio.run(engine.verify_urls([shared, shared]))
+    assert verifier.calls[shared] == 2
+
+
+def test_idle_hosts_are_dropped(verifier):
+    engine = VerificationEngine(per_host_limit=1)
+
+    async def scenario():
+        await engine.verify_urls([f"https://host{i}.example/" for i in range(50)])
+        return dict(engine._loop_limits()[1])
+
+    assert asyncio.run(scenario()) == {}
+
+
+def test_analyze_evidence_endpoint_goes_through_the_engine(monkeypatch):
+    from api import main
+
+    # The modules main actually uses (it imports its siblings as top-level modules)
+    flat_engine = importlib.import_module("verification_engine")
+    monitor = importlib.import_module("performance_monitor").get_monitor()
+
+    fake = FakeVerifier()
+    monkeypatch.setattr(flat_engine, "verify_and_classify_async", fake)
+    engine = flat_engine.VerificationEngine(max_concurrency=10, per_host_limit=2)
+    monkeypatch.setattr(main, "get_engine", lambda: engine)
+    monkeypatch.setattr(main, "toxicity_predict", lambda texts: {
+        "badge_colors": ["green"], "detailed": [{"scores": {"toxic": 0.01}}]
+    })
+
+    text = " ".join(f"https://wiki.example/page{i}" for i in range(6))
+    before = monitor.total_urls_verified
+    response = asyncio.run(main.analyze_evidence_single(main.SingleComment(text=text)))
+
+    assert response["status"] == "Verified"
+    assert len(response["evidence"]["urls"]) == 6
+    assert fake.peak["wiki.example"] == 2
+    assert monitor.total_urls_verified - before == 6
@@ -1,10 +1,20 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import Annotated, List, Dict, Any
 import numpy as np
+import os
+import sys
 import threading
 
-from .toxicity_adapter import ToxicityAdapter, LABELS
+from cache import TieredCache
+from performance_monitor import get_monitor
+
+from .base import BaseAdapter
+from .batcher import MicroBatcher
+from .response_format import FORMATS, compact_response
+from .score_cache import ScoreCache
+from .toxicity_adapter import ToxicityAdapter, LABELS, badge_colors
+from .worker_pool import WORKERS, WorkerPool
 
 
 THRESHOLD = 0.5
@@ -16,9 +26,52 @@ class Texts(BaseModel):
     texts: List[str]
 
 
-tox_adapter = ToxicityAdapter()
+# "torch" (eager PyTorch) or "onnx" (ONNX Runtime, CPU); TRUSTLENS_ONNX_QUANTIZE=1 adds int8
+TOXICITY_BACKEND = os.environ.get("TRUSTLENS_TOXICITY_BACKEND", "torch").lower()
+
+
+def create_adapter(backend: str = TOXICITY_BACKEND, workers: int = WORKERS) -> BaseAdapter:
+    """
+    Build the configured toxicity adapter, falling back to PyTorch if ONNX
+    Runtime is missing. With workers > 0 the model runs in a process pool.
+    """
+    if backend == "onnx":
+        from .onnx_adapter import ort
+        if ort is None:
+            print("Warning: TRUSTLENS_TOXICITY_BACKEND=onnx but onnxruntime is not installed; using PyTorch",
+                  file=sys.stderr, flush=True)
+            backend = "torch"
+    elif backend != "torch":
+        print(f"Warning: unknown TRUSTLENS_TOXICITY_BACKEND '{backend}'; using PyTorch", file=sys.stderr, flush=True)
+        backend = "torch"
+
+    if workers > 0:
+        return WorkerPool(backend, workers=workers)
+    if backend == "onnx":
+        from .onnx_adapter import OnnxToxicityAdapter
+        return OnnxToxicityAdapter()
+    return ToxicityAdapter()
+
+
+tox_adapter = create_adapter()
 _adapter_lock = threading.Lock()
 
+# Concurrent /predict calls share forward passes through the batcher
+tox_batcher = MicroBatcher(tox_adapter, method="infer_probs", observer=get_monitor().record_batch)
+
+# Scores for previously seen texts (same model) are served from the cache;
+# only misses go through the batcher
+SCORE_CACHE_SIZE = int(os.environ.get("TRUSTLENS_TOX_CACHE_SIZE", "50000"))
+SCORE_CACHE_TTL = float(os.environ.get("TRUSTLENS_TOX_CACHE_TTL", str(7 * 24 * 3600)))
+SCORE_CACHE_DB = os.environ.get("TRUSTLENS_TOX_CACHE_DB") or None
+
+tox_scorer = ScoreCache(
+    tox_adapter,
+    TieredCache("toxicity_scores", max_entries=SCORE_CACHE_SIZE, db_path=SCORE_CACHE_DB),
+    score=tox_batcher.infer,
+    ttl=SCORE_CACHE_TTL,
+)
+
 
 def _ensure_adapter_loaded():
     """Ensure the adapter is loaded (thread-safe lazy loading)."""
@@ -29,79 +82,92 @@ def _ensure_adapter_loaded():
                 tox_adapter.load()
 
 
+def shutdown():
+    """Stop the batcher thread and any inference worker processes."""
+    tox_batcher.close()
+    tox_adapter.close()
+
+
 @app.on_event("startup")
 def startup_event():
     tox_adapter.load()
 
 
+@app.on_event("shutdown")
+def shutdown_event():
+    shutdown()
+
+
 @app.get("/")
 def home():
     return {"message": "Toxicity API is running!"}
 
 
-def _badge_color_for_row(row_probs: List[float]) -> str:
-    # Red   → if any label has score ≥ 0.5
-    # Yellow→ if none ≥ 0.7 but max score ∈ [0.3, 0.7)
-    # Green → if all scores < 0.3
-    arr = np.array(row_probs, dtype=float)
-    if (arr >= 0.7).any():
-        return "red"
-    top = float(arr.max(initial=0.0))
-    if top >= 0.3:
-        return "yellow"
-    return "green"
+@app.get("/stats")
+def model_stats() -> Dict[str, Any]:
+    """Throughput per padded-length bucket and score cache hit ratio."""
+    return {
+        "token_budget": tox_adapter.token_budget,
+        "length_buckets": tox_adapter.get_bucket_stats(),
+        "score_cache": tox_scorer.stats(),
+    }
 
 
 @app.post("/predict")
-def predict(data: Texts) -> Dict[str, Any]:
+def predict(
+    data: Texts,
+    detailed: bool = True,
+    response_format: Annotated[str, Query(alias="format")] = "full",
+) -> Dict[str, Any]:
+    """
+    Score texts. The probability matrix stays a float32 ndarray until it is
+    serialized; thresholding and badge banding run on the whole matrix.
+
+    Args:
+        data: Texts to score
+        detailed: Also return per-text dicts keyed by label (the verbose form);
+            callers that only need the matrices can skip building them
+        response_format: "full", or "compact" / "compact-base64" for labels
+            once, the probability matrix and badge colors only (no text echo)
+
+    Returns:
+        labels, probabilities, predictions and badge_colors (plus detailed)
+    """
+    if response_format not in FORMATS:
+        raise HTTPException(status_code=422, detail=f"format must be one of {', '.join(FORMATS)}")
+
     # Ensure adapter is loaded before use (lazy loading)
     _ensure_adapter_loaded()
-    
-    if not data.texts:
-        return {
-            "labels": LABELS,
-            "probabilities": [],
-            "predictions": [],
-            "badge_colors": [],
-            "detailed": [],
-        }
 
     batch = [{"id": str(i), "text": text} for i, text in enumerate(data.texts)]
-    adapter_results = tox_adapter.infer(batch)
-    # adapter_results is expected to be:
-    # [{"id": "0", "text": "...", "probabilities": [...], "predictions": [...]}, ...]
-
-    probabilities: List[List[float]] = []
-    predictions: List[List[int]] = []
-    badge_colors: List[str] = []
-    detailed: List[Dict[str, Any]] = []
+    probs = tox_scorer.infer_probs(batch)  # float32 [N, len(LABELS)]
 
-    for item in adapter_results:
-        probs = item["probabilities"]
-        preds = item["predictions"]
-        color = _badge_color_for_row(probs)
+    if response_format != "full":
+        encoding = "base64" if response_format == "compact-base64" else "json"
+        return compact_response(LABELS, probs, badge_colors(probs).tolist(), THRESHOLD, encoding)
 
-        probabilities.append(probs)
-        predictions.append(preds)
-        badge_colors.append(color)
+    probabilities = probs.tolist()
+    predictions = (probs >= THRESHOLD).astype(np.int8).tolist()
+    # Red if any label >= 0.7, yellow if the top score is in [0.3, 0.7), else green
+    colors = badge_colors(probs).tolist()
 
-        scores_dict = {label: float(p) for label, p in zip(LABELS, probs)}
-        preds_dict = {label: int(v) for label, v in zip(LABELS, preds)}
-
-        detailed.append(
-            {
-                "id": item.get("id"),
-                "text": item.get("text", ""),
-                "scores": scores_dict,
-                "predictions": preds_dict,
-                "badge_color": color,
-            }
-        )
-
-    return {
+    response: Dict[str, Any] = {
         "labels": LABELS,
         "probabilities": probabilities,
         "predictions": predictions,
-        "badge_colors": badge_colors,
-        "detailed": detailed,
+        "badge_colors": colors,
     }
+    if detailed:
+        response["detailed"] = [
+            {
+                "id": str(i),
+                "text": text,
+                "scores": dict(zip(LABELS, row_probs)),
+                "predictions": dict(zip(LABELS, row_preds)),
+                "badge_color": color,
+            }
+            for i, (text, row_probs, row_preds, color) in enumerate(
+                zip(data.texts, probabilities, predictions, colors)
+            )
+        ]
+    return response
@@ -1,18 +1,32 @@
-from abc import ABC, abstractmethod
-
-
-class BaseAdapter(ABC):
-    def __init__(self, cfg: dict | None = None):
-        self.cfg = cfg or {}
-        self._ready = False
-
-    @abstractmethod
-    def load(self) -> None:
-        ...
-
-    @abstractmethod
-    def infer(self, batch):
-        ...
-
-    def health(self) -> dict:
-        return {"ready": self._ready}
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+class BaseAdapter(ABC):
+    def __init__(self, cfg: dict | None = None):
+        self.cfg = cfg or {}
+        self._ready = False
+
+    @abstractmethod
+    def load(self) -> None:
+        ...
+
+    @abstractmethod
+    def infer(self, batch):
+        ...
+
+    def infer_probs(self, batch) -> np.ndarray:
+        """Probability matrix [len(batch), n_labels]; adapters override this to skip per-item dicts."""
+        return np.array([r["probabilities"] for r in self.infer(batch)], dtype=np.float32)
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the weights/runtime producing scores (used in cache keys)."""
+        return type(self).__name__
+
+    def health(self) -> dict:
+        return {"ready": self._ready}
+
+    def close(self) -> None:
+        """Release processes or sessions held by the adapter."""
@@ -0,0 +1,133 @@
+"""
+Dynamic micro-batching for toxicity inference.
+
+Requests from many concurrent callers are collected for a few milliseconds
+(or until max_batch_size items are waiting), run through the adapter in one
+forward pass, and the results are handed back to each caller in order.
+"""
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from .base import BaseAdapter
+
+
+MAX_BATCH_SIZE = int(os.environ.get("TRUSTLENS_BATCH_MAX_SIZE", "32"))
+MAX_WAIT_MS = float(os.environ.get("TRUSTLENS_BATCH_MAX_WAIT_MS", "5"))
+
+
+# Called after every forward pass with (items in the batch, latency in ms)
+BatchObserver = Callable[[int, float], None]
+
+
+class _Request(NamedTuple):
+    batch: List[Dict]
+    future: Future
+
+
+class MicroBatcher:
+    """
+    Wraps an adapter with the same infer(batch) contract, coalescing calls
+    from concurrent threads into shared forward passes.
+    """
+
+    def __init__(self, adapter: BaseAdapter, max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS,
+                 method: str = "infer", observer: Optional[BatchObserver] = None):
+        """
+        Args:
+            adapter: Adapter whose forward passes are shared
+            max_batch_size: Most items per forward pass
+            max_wait_ms: How long the first request waits for company
+            method: Adapter method to batch ("infer" for result dicts,
+                "infer_probs" for a probability matrix)
+            observer: Optional callback told the size and latency of each
+                forward pass (e.g. for metrics)
+        """
+        self.adapter = adapter
+        self._infer = getattr(adapter, method)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.observer = observer
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name="tox-batcher", daemon=True)
+                    self._worker.start()
+
+    def submit(self, batch: List[Dict]) -> Future:
+        """Queue a batch for inference; the future resolves to its results."""
+        future: Future = Future()
+        if not batch:
+            future.set_result([])
+            return future
+        self._ensure_worker()
+        self._queue.put(_Request(batch, future))
+        return future
+
+    def infer(self, batch: List[Dict]) -> List[Dict]:
+        """Blocking equivalent of calling the adapter method on batch."""
+        return self.submit(batch).result()
+
+    def _collect(self, first: _Request) -> List[_Request]:
+        pending = [first]
+        size = len(first.batch)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Shutdown requested: finish this batch, then stop
+                self._queue.put(None)
+                break
+            pending.append(request)
+            size += len(request.batch)
+        return pending
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            pending = self._collect(first)
+            merged = [item for request in pending for item in request.batch]
+            started = time.perf_counter()
+            try:
+                results = self._infer(merged)
+            except Exception as e:
+                self._observe(len(merged), started)
+                for request in pending:
+                    request.future.set_exception(e)
+                continue
+            self._observe(len(merged), started)
+            # Results (a list or an ndarray) come back in input order; slice them per caller
+            offset = 0
+            for request in pending:
+                request.future.set_result(results[offset:offset + len(request.batch)])
+                offset += len(request.batch)
+
+    def _observe(self, size: int, started: float):
+        if self.observer is None:
+            return
+        try:
+            self.observer(size, (time.perf_counter() - started) * 1000)
+        except Exception as e:
+            # Metrics must never break inference
+            print(f"Warning: batch observer failed: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+
+    def close(self):
+        """Stop the worker thread after it drains the queue."""
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
@@ -0,0 +1,206 @@
+"""
+ONNX Runtime backend for the toxicity model.
+
+The Hugging Face model is exported to ONNX once (cached under ONNX_DIR),
+optionally quantized to dynamic int8, and run on CPU through ONNX Runtime.
+Tokenization, length-bucketed sub-batching and result building are shared
+with the PyTorch ToxicityAdapter, so both backends return identical shapes.
+"""
+import inspect
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from transformers import AutoTokenizer
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+from .base import BaseAdapter
+from . import toxicity_adapter
+from .toxicity_adapter import (
+    LABELS,
+    MAX_LENGTH,
+    TOKEN_BUDGET,
+    LengthBucketStats,
+    build_results,
+    pad_sub_batch,
+    plan_sub_batches,
+)
+
+
+ONNX_DIR = os.environ.get("TRUSTLENS_ONNX_DIR", os.path.join(os.path.dirname(__file__), "onnx"))
+QUANTIZE = os.environ.get("TRUSTLENS_ONNX_QUANTIZE", "0").lower() in ("1", "true", "yes")
+# 0 lets ONNX Runtime pick (one thread per physical core)
+INTRA_OP_THREADS = int(os.environ.get("TRUSTLENS_ONNX_THREADS", "0"))
+OPSET_VERSION = 17
+
+
+def onnx_model_path(model_name: str, quantize: bool, onnx_dir: Optional[str] = None) -> str:
+    """Cache location of the exported (and optionally int8-quantized) graph."""
+    onnx_dir = onnx_dir or ONNX_DIR
+    stem = model_name.strip("/").replace("/", "__")
+    return os.path.join(onnx_dir, f"{stem}.int8.onnx" if quantize else f"{stem}.onnx")
+
+
+def export_onnx(model_name: str, path: str) -> str:
+    """
+    Export a sequence-classification model to ONNX with dynamic batch and
+    sequence axes.
+
+    Args:
+        model_name: Hugging Face model id or local directory
+        path: Destination .onnx file (written atomically)
+
+    Returns:
+        path
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    sample = tokenizer(["export"], return_tensors="pt")
+    # The exporter binds inputs positionally, so follow forward()'s order
+    input_names = [name for name in inspect.signature(model.forward).parameters if name in sample]
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            tmp_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=OPSET_VERSION,
+            dynamo=False,
+        )
+    os.replace(tmp_path, path)
+    return path
+
+
+def quantize_onnx(source_path: str, path: str) -> str:
+    """Dynamic int8 quantization of the exported graph's weights."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    quantize_dynamic(source_path, tmp_path, weight_type=QuantType.QInt8)
+    os.replace(tmp_path, path)
+    return path
+
+
+def ensure_onnx_model(model_name: str, quantize: bool, onnx_dir: Optional[str] = None) -> str:
+    """Return the cached ONNX graph for model_name, exporting/quantizing it if missing."""
+    fp32_path = onnx_model_path(model_name, quantize=False, onnx_dir=onnx_dir)
+    if not os.path.exists(fp32_path):
+        export_onnx(model_name, fp32_path)
+    if not quantize:
+        return fp32_path
+
+    int8_path = onnx_model_path(model_name, quantize=True, onnx_dir=onnx_dir)
+    if not os.path.exists(int8_path):
+        quantize_onnx(fp32_path, int8_path)
+    return int8_path
+
+
+class OnnxToxicityAdapter(BaseAdapter):
+    """
+    cfg keys (all optional):
+        model_path: Pre-exported .onnx file; skips the export step
+        onnx_dir: Export cache directory (default TRUSTLENS_ONNX_DIR)
+        quantize: Use the dynamic int8 graph (default TRUSTLENS_ONNX_QUANTIZE)
+        intra_op_threads: ONNX Runtime thread count (default TRUSTLENS_ONNX_THREADS)
+        token_budget: Padded tokens per forward pass (default TRUSTLENS_TOKEN_BUDGET)
+    """
+
+    def __init__(self, cfg: dict | None = None):
+        super().__init__(cfg)
+        self.quantize = bool(self.cfg.get("quantize", QUANTIZE))
+        self.token_budget = int(self.cfg.get("token_budget", TOKEN_BUDGET))
+        self.tokenizer = None
+        self.session = None
+        self.model_path = None
+        self.model_name = toxicity_adapter.MODEL_NAME
+        self._input_names: List[str] = []
+        self.bucket_stats = LengthBucketStats()
+
+    def load(self) -> None:
+        """Load the tokenizer and open an ONNX Runtime session, exporting the model on first use."""
+        if ort is None:
+            raise RuntimeError("onnxruntime is not installed (pip install onnxruntime)")
+
+        # Read at load time so MODEL_NAME overrides apply to both backends
+        model_name = toxicity_adapter.MODEL_NAME
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model_path = self.cfg.get("model_path") or ensure_onnx_model(
+            model_name, self.quantize, self.cfg.get("onnx_dir")
+        )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = int(self.cfg.get("intra_op_threads", INTRA_OP_THREADS))
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = [i.name for i in self.session.get_inputs()]
+        self.model_name = model_name
+        self._ready = True
+
+    @property
+    def model_id(self) -> str:
+        return f"onnx:{self.model_name}:{'int8' if self.quantize else 'fp32'}"
+
+    def infer(self, batch: List[Dict]) -> List[Dict]:
+        """
+        batch: [{"id": str, "text": str}, ...]
+        returns: per-item results with probabilities, predictions, and badge_color
+        """
+        if not self._ready:
+            raise RuntimeError("OnnxToxicityAdapter not loaded. Call load() first.")
+
+        if not batch:
+            return []
+
+        return build_results(batch, self.infer_probs(batch))
+
+    def infer_probs(self, batch: List[Dict]) -> np.ndarray:
+        """Probability matrix [N, len(LABELS)], in input order."""
+        if not self._ready:
+            raise RuntimeError("OnnxToxicityAdapter not loaded. Call load() first.")
+        return self._predict_probs([item["text"] for item in batch])
+
+    def _predict_probs(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, len(LABELS)), dtype=np.float32)
+        enc = self.tokenizer(texts, truncation=True, max_length=MAX_LENGTH)
+        lengths = [len(ids) for ids in enc["input_ids"]]
+        pad_token_id = self.tokenizer.pad_token_id or 0
+
+        probs = np.empty((len(texts), len(LABELS)), dtype=np.float32)
+        for chunk in plan_sub_batches(lengths, self.token_budget):
+            arrays = pad_sub_batch(enc, chunk, lengths, pad_token_id)
+            feeds = {name: arrays[name] for name in self._input_names}
+
+            start = time.perf_counter()
+            logits = self.session.run(["logits"], feeds)[0]
+            probs[chunk] = 1 / (1 + np.exp(-logits))
+            self.bucket_stats.record(
+                arrays["input_ids"].shape[1], len(chunk), sum(lengths[i] for i in chunk), time.perf_counter() - start
+            )
+
+        return probs
+
+    def get_bucket_stats(self) -> Dict[str, Any]:
+        """Per length-bucket throughput (real tokens/sec) and padding overhead."""
+        return self.bucket_stats.snapshot()
+
+    def health(self) -> dict:
+        return {"ready": self._ready, "backend": "onnx", "quantized": self.quantize, "model_path": self.model_path}
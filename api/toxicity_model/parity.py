@@ -0,0 +1,114 @@
+"""
+Parity check between the PyTorch and ONNX Runtime toxicity backends.
+
+Runs the same texts through both adapters and verifies that every per-label
+probability is within a tolerance and that no comment changes badge band
+(green < 0.3 <= yellow < 0.7 <= red).
+
+Usage (from the api/ directory):
+    python -m toxicity_model.parity [--quantize] [--tolerance 0.02] [--file texts.txt]
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .base import BaseAdapter
+from .toxicity_adapter import LABELS, ToxicityAdapter, badge_color
+
+
+DEFAULT_TOLERANCE = 0.02
+
+SAMPLE_TEXTS = [
+    "Thanks for sharing, this was really helpful.",
+    "I disagree, but I see where you're coming from.",
+    "You are an idiot and nobody wants you here.",
+    "This is the dumbest thing I've read all week.",
+    "Shut up, you worthless piece of garbage.",
+    "I will find you and make you regret this.",
+    "According to the CDC, the study was peer reviewed.",
+    "lol",
+    "",
+    "A very long comment that keeps going " * 20,
+]
+
+
+def compare_probabilities(reference: np.ndarray, candidate: np.ndarray,
+                          tolerance: float = DEFAULT_TOLERANCE) -> Dict[str, Any]:
+    """
+    Compare two [N, len(LABELS)] probability matrices.
+
+    Returns:
+        Report with the largest absolute differences, rows over tolerance,
+        badge band mismatches and an overall "ok" flag
+    """
+    reference = np.asarray(reference, dtype=np.float64).reshape(-1, len(LABELS))
+    candidate = np.asarray(candidate, dtype=np.float64).reshape(-1, len(LABELS))
+    if reference.shape != candidate.shape:
+        raise ValueError(f"shape mismatch: {reference.shape} vs {candidate.shape}")
+
+    diff = np.abs(reference - candidate)
+    over = [int(i) for i in np.flatnonzero((diff > tolerance).any(axis=1))]
+
+    badge_mismatches = []
+    for i, (ref_row, cand_row) in enumerate(zip(reference, candidate)):
+        ref_badge = badge_color(float(ref_row.max(initial=0.0)))
+        cand_badge = badge_color(float(cand_row.max(initial=0.0)))
+        if ref_badge != cand_badge:
+            badge_mismatches.append({"index": i, "reference": ref_badge, "candidate": cand_badge})
+
+    return {
+        "rows": int(reference.shape[0]),
+        "tolerance": tolerance,
+        "max_abs_diff": float(diff.max(initial=0.0)),
+        "per_label_max_abs_diff": {
+            label: float(diff[:, j].max(initial=0.0)) for j, label in enumerate(LABELS)
+        },
+        "rows_over_tolerance": over,
+        "badge_mismatches": badge_mismatches,
+        "ok": not over and not badge_mismatches,
+    }
+
+
+def _probabilities(adapter: BaseAdapter, texts: List[str]) -> np.ndarray:
+    batch = [{"id": str(i), "text": text} for i, text in enumerate(texts)]
+    return np.array([r["probabilities"] for r in adapter.infer(batch)], dtype=np.float64)
+
+
+def run_parity_check(texts: List[str], quantize: bool = False, tolerance: float = DEFAULT_TOLERANCE,
+                     onnx_cfg: Optional[dict] = None) -> Dict[str, Any]:
+    """Score texts with both backends and compare the results."""
+    from .onnx_adapter import OnnxToxicityAdapter
+
+    reference = ToxicityAdapter()
+    reference.load()
+    candidate = OnnxToxicityAdapter(dict(onnx_cfg or {}, quantize=quantize))
+    candidate.load()
+
+    report = compare_probabilities(_probabilities(reference, texts), _probabilities(candidate, texts), tolerance)
+    report["onnx_model"] = candidate.model_path
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare PyTorch and ONNX toxicity scores")
+    parser.add_argument("--quantize", action="store_true", help="check the dynamic int8 graph")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"max per-label absolute difference (default {DEFAULT_TOLERANCE})")
+    parser.add_argument("--file", help="newline-separated texts to score instead of the built-in samples")
+    args = parser.parse_args(argv)
+
+    texts = SAMPLE_TEXTS
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            texts = [line.rstrip("\n") for line in f]
+
+    report = run_parity_check(texts, quantize=args.quantize, tolerance=args.tolerance)
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Compact /predict response encodings.
+
+"compact" sends the labels once, the probability matrix as nested JSON
+arrays rounded to 6 decimals, and the badge colors. "compact-base64" sends
+the matrix as little-endian float32 bytes instead, which is smaller and
+skips float formatting entirely. Neither echoes input text or repeats label
+names per row; predictions are probabilities >= threshold, and the badge
+colors are computed server-side from the exact scores.
+"""
+import base64
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+FORMATS = ("full", "compact", "compact-base64")
+
+# Rounding is for display and size only. Badge colors are computed from the
+# unrounded float32 scores before they are sent; predictions re-derived from
+# the rounded matrix can flip for scores within 5e-7 of a cutoff (use
+# compact-base64 when exact scores matter)
+JSON_DECIMALS = 6
+WIRE_DTYPE = "<f4"
+
+
+def compact_response(labels: List[str], probs: np.ndarray, colors: List[str],
+                     threshold: float, encoding: str = "json") -> Dict[str, Any]:
+    """
+    Args:
+        labels: Column names of probs
+        probs: float32 matrix [N, len(labels)]
+        colors: Badge color per row
+        threshold: Per-label prediction cutoff, so clients can derive predictions
+        encoding: "json" (nested arrays) or "base64" (raw float32 bytes)
+    """
+    response: Dict[str, Any] = {
+        "format": "compact",
+        "labels": labels,
+        "threshold": threshold,
+        "badge_colors": colors,
+    }
+    if encoding == "base64":
+        matrix = np.ascontiguousarray(probs, dtype=WIRE_DTYPE)
+        response["probabilities_b64"] = base64.b64encode(matrix.tobytes()).decode("ascii")
+        response["dtype"] = WIRE_DTYPE
+        response["shape"] = list(matrix.shape)
+    else:
+        response["probabilities"] = np.round(probs.astype(np.float64), JSON_DECIMALS).tolist()
+    return response
+
+
+def decode_probabilities(response: Dict[str, Any]) -> np.ndarray:
+    """Probability matrix from a compact (or full) /predict response."""
+    if "probabilities_b64" in response:
+        raw = base64.b64decode(response["probabilities_b64"])
+        return np.frombuffer(raw, dtype=response.get("dtype", WIRE_DTYPE)).reshape(response["shape"])
+    return np.asarray(response.get("probabilities", []), dtype=np.float32).reshape(-1, len(response["labels"]))
@@ -0,0 +1,106 @@
+"""
+Content-addressed toxicity score cache.
+
+Wraps an adapter (or the MicroBatcher in front of it) with the same
+infer(batch) / infer_probs(batch) contract. Each text is keyed by a hash of its normalized form
+plus the model identity, so hits are answered without touching the model and
+only the misses are sent through in one batch.
+"""
+import hashlib
+import re
+import threading
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .base import BaseAdapter
+from .toxicity_adapter import LABELS, build_results
+
+
+_WHITESPACE_RX = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form used for cache keys: NFC with whitespace runs collapsed.
+    The tokenizer splits on whitespace, so this doesn't change model input.
+    """
+    return _WHITESPACE_RX.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def score_cache_key(text: str, model_id: str) -> str:
+    return hashlib.sha256(f"{model_id}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class ScoreCache:
+    """
+    Usage:
+        scorer = ScoreCache(adapter, TieredCache("toxicity_scores"), score=batcher.infer)
+        probs = scorer.infer_probs([{"id": "0", "text": "..."}])
+    """
+
+    def __init__(self, adapter: BaseAdapter, store,
+                 score: Optional[Callable[[List[Dict]], np.ndarray]] = None, ttl: float = 7 * 24 * 3600):
+        """
+        Args:
+            adapter: The model adapter; its model_id is part of every key
+            store: Cache with get(key) / set(key, value, ttl), e.g. TieredCache
+            score: Scores the misses as a probability matrix (default: adapter.infer_probs)
+            ttl: Seconds a score stays cached
+        """
+        self.adapter = adapter
+        self.store = store
+        self.score = score if score is not None else adapter.infer_probs
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def infer(self, batch: List[Dict]) -> List[Dict]:
+        """Same contract as adapter.infer(batch); cached texts skip the model."""
+        if not batch:
+            return []
+        return build_results(batch, self.infer_probs(batch))
+
+    def infer_probs(self, batch: List[Dict]) -> np.ndarray:
+        """Probability matrix [N, len(LABELS)]; cached texts skip the model."""
+        probs = np.empty((len(batch), len(LABELS)), dtype=np.float32)
+        if not batch:
+            return probs
+
+        model_id = self.adapter.model_id
+        keys = [score_cache_key(item["text"], model_id) for item in batch]
+        rows: List[Optional[List[float]]] = [self.store.get(key) for key in keys]
+
+        # Duplicates within the batch are scored once
+        pending: Dict[str, str] = {}
+        for key, item, row in zip(keys, batch, rows):
+            if row is None and key not in pending:
+                pending[key] = item["text"]
+
+        hits = sum(row is not None for row in rows)
+        with self._lock:
+            self._hits += hits
+            self._misses += len(rows) - hits
+
+        scored: Dict[str, List[float]] = {}
+        if pending:
+            pending_probs = self.score([{"id": str(i), "text": text} for i, text in enumerate(pending.values())])
+            for key, row in zip(pending, pending_probs.tolist()):
+                scored[key] = row
+                self.store.set(key, row, self.ttl)
+
+        for i, (key, row) in enumerate(zip(keys, rows)):
+            probs[i] = row if row is not None else scored[key]
+        return probs
+
+    def stats(self) -> Dict[str, Any]:
+        """Lookup counts and hit ratio since startup, plus the store's size."""
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        total = hits + misses
+        stats = {"hits": hits, "misses": misses, "hit_ratio": round(hits / total, 4) if total else 0.0}
+        if hasattr(self.store, "stats"):
+            stats.update(self.store.stats())
+        return stats
@@ -1,95 +1,232 @@
-from typing import List, Dict
-
-import torch
-import numpy as np
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-
-from .base import BaseAdapter
-
-# Model config
-MODEL_NAME = "unitary/toxic-bert"
-LABELS = ["toxic", "severe_toxic", "obscene", "threat", "insult", "identity_hate"]
-
-# This is ONLY for per-label 0/1 predictions.
-# The overall badge is driven by max_prob ranges (0–0.3, 0.3–0.7, 0.7–1.0).
-THRESHOLD = 0.5
-
-
-class ToxicityAdapter(BaseAdapter):
-    def __init__(self, cfg: dict | None = None):
-        super().__init__(cfg)
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.tokenizer = None
-        self.model = None
-
-    def load(self) -> None:
-        """Load tokenizer + model once at startup."""
-        self.tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-        self.model = AutoModelForSequenceClassification.from_pretrained(
-            MODEL_NAME
-        ).to(self.device)
-        self.model.eval()
-        self._ready = True
-
-    @staticmethod
-    def _badge_color(max_prob: float) -> str:
-        """
-        Overall toxicity banding:
-
-        0.0 – 0.3   → green  (neutral / low risk)
-        0.3 – 0.7   → yellow (mild / borderline)
-        0.7 – 1.0   → red    (high toxicity)
-        """
-        if max_prob >= 0.7:
-            return "red"
-        if max_prob >= 0.3:
-            return "yellow"
-        return "green"
-
-    def infer(self, batch: List[Dict]) -> List[Dict]:
-        """
-        batch: [{"id": str, "text": str}, ...]
-        returns: per-item results with probabilities, predictions, and badge_color
-        """
-        if not self._ready:
-            raise RuntimeError("ToxicityAdapter not loaded. Call load() first.")
-
-        if not batch:
-            return []
-
-        texts = [item["text"] for item in batch]
-
-        enc = self.tokenizer(
-            texts,
-            truncation=True,
-            padding=True,
-            max_length=128,
-            return_tensors="pt",
-        ).to(self.device)
-
-        with torch.no_grad():
-            logits = self.model(**enc).logits
-            probs = torch.sigmoid(logits).cpu().numpy()  # shape: [N, len(LABELS)]
-
-        results: List[Dict] = []
-
-        for item, row in zip(batch, probs):
-            row_list = [float(p) for p in row]  # per-label probabilities
-            preds = [1 if p >= THRESHOLD else 0 for p in row_list]
-
-            max_prob = max(row_list) if row_list else 0.0
-            badge_color = self._badge_color(max_prob)
-
-            results.append(
-                {
-                    "id": item["id"],
-                    "text": item["text"],
-                    "labels": LABELS,
-                    "probabilities": row_list,
-                    "predictions": preds,
-                    "badge_color": badge_color,
-                    "max_prob": max_prob,  # handy for monitoring/fusion
-                }
-            )
-
-        return results
+import os
+import threading
+import time
+from typing import Any, List, Dict
+
+import torch
+import numpy as np
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+from .base import BaseAdapter
+
+# Model config
+MODEL_NAME = "unitary/toxic-bert"
+LABELS = ["toxic", "severe_toxic", "obscene", "threat", "insult", "identity_hate"]
+
+# This is ONLY for per-label 0/1 predictions.
+# The overall badge is driven by max_prob ranges (0–0.3, 0.3–0.7, 0.7–1.0).
+THRESHOLD = 0.5
+
+MAX_LENGTH = 128
+
+# Upper bound on padded tokens (rows x longest row) per forward pass. Inputs
+# are sorted by length and split into sub-batches under this budget, so a few
+# long comments don't pad every short one up to MAX_LENGTH.
+TOKEN_BUDGET = int(os.environ.get("TRUSTLENS_TOKEN_BUDGET", "4096"))
+
+# Throughput is reported per padded-length bucket (sequences up to N tokens)
+LENGTH_BUCKETS = (16, 32, 64, 128)
+
+
+def plan_sub_batches(lengths: List[int], token_budget: int) -> List[List[int]]:
+    """
+    Group input positions into length-sorted sub-batches whose padded size
+    (rows x longest row) stays within token_budget.
+    """
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    chunks: List[List[int]] = []
+    current: List[int] = []
+    for i in order:
+        # Sorted ascending, so lengths[i] is the longest row if i joins
+        if current and (len(current) + 1) * lengths[i] > token_budget:
+            chunks.append(current)
+            current = []
+        current.append(i)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _length_bucket(padded_length: int) -> int:
+    for bucket in LENGTH_BUCKETS:
+        if padded_length <= bucket:
+            return bucket
+    return LENGTH_BUCKETS[-1]
+
+
+def pad_sub_batch(encoding, chunk: List[int], lengths: List[int], pad_token_id: int) -> Dict[str, np.ndarray]:
+    """Pad the rows in chunk to the chunk's longest row, as int64 arrays per model input."""
+    width = max(lengths[i] for i in chunk)
+    arrays = {}
+    for key in encoding.keys():
+        fill = pad_token_id if key == "input_ids" else 0
+        arr = np.full((len(chunk), width), fill, dtype=np.int64)
+        for row, i in enumerate(chunk):
+            arr[row, :lengths[i]] = encoding[key][i]
+        arrays[key] = arr
+    return arrays
+
+
+def badge_color(max_prob: float) -> str:
+    """
+    Overall toxicity banding:
+
+    0.0 – 0.3   → green  (neutral / low risk)
+    0.3 – 0.7   → yellow (mild / borderline)
+    0.7 – 1.0   → red    (high toxicity)
+    """
+    if max_prob >= 0.7:
+        return "red"
+    if max_prob >= 0.3:
+        return "yellow"
+    return "green"
+
+
+def badge_colors(probs: np.ndarray) -> np.ndarray:
+    """badge_color() for every row of a [N, len(LABELS)] matrix at once."""
+    top = probs.max(axis=1, initial=0.0)
+    return np.where(top >= 0.7, "red", np.where(top >= 0.3, "yellow", "green"))
+
+
+def build_results(batch: List[Dict], probs: np.ndarray) -> List[Dict]:
+    """Turn a [N, len(LABELS)] probability matrix into per-item adapter results."""
+    probs = np.asarray(probs, dtype=np.float32).reshape(len(batch), len(LABELS))
+    # Threshold and band in bulk; tolist() yields plain Python floats/ints
+    preds = (probs >= THRESHOLD).astype(np.int8).tolist()
+    colors = badge_colors(probs).tolist()
+    max_probs = probs.max(axis=1, initial=0.0).tolist()
+
+    return [
+        {
+            "id": item["id"],
+            "text": item["text"],
+            "labels": LABELS,
+            "probabilities": row,
+            "predictions": row_preds,
+            "badge_color": color,
+            "max_prob": max_prob,  # handy for monitoring/fusion
+        }
+        for item, row, row_preds, color, max_prob in zip(batch, probs.tolist(), preds, colors, max_probs)
+    ]
+
+
+class LengthBucketStats:
+    """Thread-safe tokens/sec and padding counters per padded-length bucket."""
+
+    def __init__(self):
+        self._stats: Dict[int, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, width: int, rows: int, tokens: int, seconds: float):
+        with self._lock:
+            stats = self._stats.setdefault(
+                _length_bucket(width),
+                {"batches": 0, "sequences": 0, "tokens": 0, "padded_tokens": 0, "seconds": 0.0}
+            )
+            stats["batches"] += 1
+            stats["sequences"] += rows
+            stats["tokens"] += tokens
+            stats["padded_tokens"] += rows * width
+            stats["seconds"] += seconds
+
+    def raw(self) -> Dict[int, Dict[str, float]]:
+        """Copy of the raw counters, e.g. to send across a process boundary."""
+        with self._lock:
+            return {bucket: dict(stats) for bucket, stats in self._stats.items()}
+
+    def merge(self, raw: Dict[int, Dict[str, float]]):
+        """Add counters previously returned by raw()."""
+        with self._lock:
+            for bucket, stats in raw.items():
+                total = self._stats.setdefault(bucket, dict.fromkeys(stats, 0))
+                for key, value in stats.items():
+                    total[key] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per length-bucket throughput (real tokens/sec) and padding overhead."""
+        with self._lock:
+            snapshot = {bucket: dict(stats) for bucket, stats in sorted(self._stats.items())}
+        return {
+            f"<={bucket}": {
+                "batches": stats["batches"],
+                "sequences": stats["sequences"],
+                "tokens": stats["tokens"],
+                "padding_ratio": round(1 - stats["tokens"] / stats["padded_tokens"], 4) if stats["padded_tokens"] else 0,
+                "tokens_per_sec": round(stats["tokens"] / stats["seconds"], 1) if stats["seconds"] > 0 else 0
+            }
+            for bucket, stats in snapshot.items()
+        }
+
+
+class ToxicityAdapter(BaseAdapter):
+    def __init__(self, cfg: dict | None = None):
+        super().__init__(cfg)
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.tokenizer = None
+        self.model = None
+        self.model_name = MODEL_NAME
+        self.token_budget = int(self.cfg.get("token_budget", TOKEN_BUDGET))
+        self.bucket_stats = LengthBucketStats()
+
+    def load(self) -> None:
+        """Load tokenizer + model once at startup."""
+        self.tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+        self.model = AutoModelForSequenceClassification.from_pretrained(
+            MODEL_NAME
+        ).to(self.device)
+        self.model.eval()
+        self.model_name = MODEL_NAME
+        self._ready = True
+
+    @property
+    def model_id(self) -> str:
+        return f"torch:{self.model_name}"
+
+    _badge_color = staticmethod(badge_color)
+
+    def infer(self, batch: List[Dict]) -> List[Dict]:
+        """
+        batch: [{"id": str, "text": str}, ...]
+        returns: per-item results with probabilities, predictions, and badge_color
+        """
+        if not self._ready:
+            raise RuntimeError("ToxicityAdapter not loaded. Call load() first.")
+
+        if not batch:
+            return []
+
+        return build_results(batch, self.infer_probs(batch))
+
+    def infer_probs(self, batch: List[Dict]) -> np.ndarray:
+        """Probability matrix [N, len(LABELS)], in input order."""
+        if not self._ready:
+            raise RuntimeError("ToxicityAdapter not loaded. Call load() first.")
+        return self._predict_probs([item["text"] for item in batch])
+
+    def _predict_probs(self, texts: List[str]) -> np.ndarray:
+        """Run the model over length-sorted sub-batches and restore input order."""
+        if not texts:
+            return np.empty((0, len(LABELS)), dtype=np.float32)
+        # Tokenize once without padding; each sub-batch is padded to its own longest row
+        enc = self.tokenizer(texts, truncation=True, max_length=MAX_LENGTH)
+        lengths = [len(ids) for ids in enc["input_ids"]]
+        pad_token_id = self.tokenizer.pad_token_id or 0
+
+        probs = np.empty((len(texts), len(LABELS)), dtype=np.float32)
+        for chunk in plan_sub_batches(lengths, self.token_budget):
+            arrays = pad_sub_batch(enc, chunk, lengths, pad_token_id)
+            tensors = {key: torch.from_numpy(arr).to(self.device) for key, arr in arrays.items()}
+
+            start = time.perf_counter()
+            with torch.no_grad():
+                logits = self.model(**tensors).logits
+                probs[chunk] = torch.sigmoid(logits).cpu().numpy()
+            self.bucket_stats.record(
+                arrays["input_ids"].shape[1], len(chunk), sum(lengths[i] for i in chunk), time.perf_counter() - start
+            )
+
+        return probs
+
+    def get_bucket_stats(self) -> Dict[str, Any]:
+        """Per length-bucket throughput (real tokens/sec) and padding overhead."""
+        return self.bucket_stats.snapshot()
@@ -0,0 +1,165 @@
+"""
+Multi-process toxicity inference.
+
+A WorkerPool owns N spawned processes, each loading its own adapter with a
+pinned intra-op thread count, and splits every batch across them. It has the
+adapter contract (load/infer), so it slots in behind the MicroBatcher and the
+score cache unchanged. Checkpoints are read from safetensors through mmap, so
+the read-only weight files are shared through the OS page cache instead of
+being read into each process separately.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .base import BaseAdapter
+from . import toxicity_adapter
+from .toxicity_adapter import LABELS, LengthBucketStats, ToxicityAdapter, build_results
+
+
+# 0 keeps inference in the API process
+WORKERS = int(os.environ.get("TRUSTLENS_TOXICITY_WORKERS", "0"))
+# Torch/ORT threads per worker; 0 splits the machine's cores evenly
+THREADS_PER_WORKER = int(os.environ.get("TRUSTLENS_TOXICITY_WORKER_THREADS", "0"))
+# Smaller shards cost more in IPC than they gain in parallelism
+MIN_SHARD_SIZE = int(os.environ.get("TRUSTLENS_TOXICITY_MIN_SHARD", "4"))
+
+
+# Per-process state, set by _init_worker in each pool process
+_worker_adapter: Optional[BaseAdapter] = None
+
+
+def _init_worker(backend: str, model_name: str, threads: int, cfg: dict):
+    global _worker_adapter
+    # torch is already imported here (unpickling this function imports the
+    # module), so thread env vars would come too late; set the counts through
+    # the runtimes instead, before the first op starts their pools
+    import torch
+    torch.set_num_threads(threads)
+    toxicity_adapter.MODEL_NAME = model_name
+
+    if backend == "onnx":
+        from .onnx_adapter import OnnxToxicityAdapter
+        _worker_adapter = OnnxToxicityAdapter(dict(cfg, intra_op_threads=threads))
+    else:
+        _worker_adapter = ToxicityAdapter(cfg)
+    _worker_adapter.load()
+
+
+def _worker_info() -> Tuple[int, str]:
+    return os.getpid(), _worker_adapter.model_id
+
+
+def _worker_infer(batch: List[Dict]) -> Tuple[int, np.ndarray, Dict]:
+    # Only the probability matrix crosses the process boundary
+    probs = _worker_adapter.infer_probs(batch)
+    return os.getpid(), probs, _worker_adapter.bucket_stats.raw()
+
+
+
+class WorkerPool(BaseAdapter):
+    """
+    The MicroBatcher runs every forward pass from its single thread, so one
+    batch is in flight at a time: parallelism comes from splitting that batch
+    across the workers, and a worker that finishes its shard early idles until
+    the slowest shard is done.
+
+    Usage:
+        pool = WorkerPool("torch", workers=8)
+        pool.load()           # spawns and warms every worker
+        pool.infer(batch)     # rows are spread across workers, order preserved
+        pool.close()
+    """
+
+    def __init__(self, backend: str = "torch", workers: int = WORKERS,
+                 threads_per_worker: int = THREADS_PER_WORKER, cfg: dict | None = None):
+        """
+        Args:
+            backend: Adapter each worker runs ("torch" or "onnx")
+            workers: Number of inference processes
+            threads_per_worker: Intra-op threads per process (0 = cores // workers)
+            cfg: Adapter cfg passed to every worker
+        """
+        super().__init__(cfg)
+        self.backend = backend
+        self.workers = max(1, workers)
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.workers)
+        self.token_budget = int(self.cfg.get("token_budget", toxicity_adapter.TOKEN_BUDGET))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._model_id = f"{backend}:{toxicity_adapter.MODEL_NAME}"
+        self._worker_stats: Dict[int, Dict] = {}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def model_id(self) -> str:
+        # Same identity as the in-process adapter, so cached scores carry over
+        return self._model_id
+
+    def load(self) -> None:
+        """Spawn the workers and wait until each one has loaded the model."""
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            # fork would copy a process that may already hold torch threads
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.backend, toxicity_adapter.MODEL_NAME, self.threads_per_worker, self.cfg),
+        )
+        # Each worker runs its initializer before its first task; keep asking
+        # until every process has answered so no request pays the load cost
+        seen: Dict[int, str] = {}
+        while len(seen) < self.workers:
+            futures = [self._executor.submit(_worker_info) for _ in range(self.workers)]
+            seen.update(f.result() for f in futures)
+        self._model_id = next(iter(seen.values()))
+        self._ready = True
+
+    def _shards(self, batch: List[Dict]) -> List[List[int]]:
+        count = max(1, min(self.workers, len(batch) // MIN_SHARD_SIZE))
+        # Round-robin keeps long and short texts spread evenly across workers
+        return [list(range(start, len(batch), count)) for start in range(count)]
+
+    def infer(self, batch: List[Dict]) -> List[Dict]:
+        """Same contract as the adapter: results in input order."""
+        if not batch:
+            return []
+        return build_results(batch, self.infer_probs(batch))
+
+    def infer_probs(self, batch: List[Dict]) -> np.ndarray:
+        """Probability matrix [N, len(LABELS)] assembled from every worker's shard."""
+        if not self._ready:
+            raise RuntimeError("WorkerPool not loaded. Call load() first.")
+        probs = np.empty((len(batch), len(LABELS)), dtype=np.float32)
+        if not batch:
+            return probs
+
+        shards = self._shards(batch)
+        futures = [self._executor.submit(_worker_infer, [batch[i] for i in shard]) for shard in shards]
+        for shard, future in zip(shards, futures):
+            pid, shard_probs, stats = future.result()
+            with self._stats_lock:
+                self._worker_stats[pid] = stats
+            probs[shard] = shard_probs
+        return probs
+
+    def get_bucket_stats(self) -> Dict[str, Any]:
+        """Length-bucket stats summed over every worker."""
+        merged = LengthBucketStats()
+        with self._stats_lock:
+            for stats in self._worker_stats.values():
+                merged.merge(stats)
+        return merged.snapshot()
+
+    def health(self) -> dict:
+        return {"ready": self._ready, "backend": self.backend, "workers": self.workers,
+                "threads_per_worker": self.threads_per_worker}
+
+    def close(self) -> None:
+        """Shut the worker processes down."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._ready = False
@@ -0,0 +1,447 @@
+"""
+Request Tracing
+Per-request span trees that show where an ingest's time went. Every HTTP
+request gets a root span; the pipeline opens child spans for comment
+extraction, toxicity inference, each URL verification (split into DNS, HEAD,
+GET and classify), formatting and persistence. The current span lives in a
+contextvar, so spans nest correctly across asyncio tasks and worker threads
+started with asyncio.to_thread / run_in_threadpool.
+
+When a trace's root span ends, the trace is:
+  - offered to the slow-request log, which keeps the span trees of the
+    TRUSTLENS_TRACE_SLOW_N slowest traces (GET /traces/slow)
+  - exported in OTLP/JSON, OpenTelemetry's JSON encoding. Each trace becomes
+    one ExportTraceServiceRequest, written as a line to TRUSTLENS_TRACE_FILE
+    and/or POSTed to TRUSTLENS_TRACE_OTLP_ENDPOINT
+    (e.g. http://localhost:4318/v1/traces) from a background thread
+
+An incoming W3C traceparent header continues the caller's trace, and remote
+/predict calls pass the trace on the same way.
+TRUSTLENS_TRACING=0 turns every span into a no-op.
+"""
+import heapq
+import itertools
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+
+
+TRACING_ENABLED = os.environ.get("TRUSTLENS_TRACING", "1").lower() in ("1", "true", "yes")
+TRACE_FILE = os.environ.get("TRUSTLENS_TRACE_FILE") or None
+TRACE_OTLP_ENDPOINT = os.environ.get("TRUSTLENS_TRACE_OTLP_ENDPOINT") or None
+# Slowest traces kept for GET /traces/slow
+TRACE_SLOW_N = int(os.environ.get("TRUSTLENS_TRACE_SLOW_N", "20"))
+# Spans recorded per trace; later ones are counted but dropped
+TRACE_MAX_SPANS = int(os.environ.get("TRUSTLENS_TRACE_MAX_SPANS", "2000"))
+# Traces waiting to be exported before new ones are dropped
+TRACE_EXPORT_QUEUE = int(os.environ.get("TRUSTLENS_TRACE_EXPORT_QUEUE", "256"))
+SERVICE_NAME = os.environ.get("TRUSTLENS_SERVICE_NAME", "trustlens-api")
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+TRACEPARENT_RX = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class Trace:
+    """The spans of one request (or background job), collected as they end."""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.root: Optional["Span"] = None
+        self.spans: List["Span"] = []
+        self.dropped_spans = 0
+        # Spans can end on worker threads
+        self._lock = threading.Lock()
+
+    def add(self, span: "Span"):
+        with self._lock:
+            if len(self.spans) < TRACE_MAX_SPANS or span is self.root:
+                self.spans.append(span)
+            else:
+                self.dropped_spans += 1
+
+    def tree(self) -> Dict[str, Any]:
+        """The root span with its descendants nested under "children", in start order."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+        children: Dict[Optional[str], List[Span]] = {}
+        for span in spans:
+            children.setdefault(span.parent_id, []).append(span)
+
+        def node(span: Span) -> Dict[str, Any]:
+            return {
+                "name": span.name,
+                "span_id": span.span_id,
+                "offset_ms": round((span.start_ns - self.root.start_ns) / 1e6, 3),
+                "duration_ms": round(span.duration_ms, 3),
+                "attributes": span.attributes,
+                **({"error": span.error} if span.error else {}),
+                "children": [node(child) for child in children.get(span.span_id, [])]
+            }
+
+        return {
+            "trace_id": self.trace_id,
+            "duration_ms": round(self.root.duration_ms, 3),
+            "started_at": self.root.start_ns / 1e9,
+            "dropped_spans": self.dropped_spans,
+            "root": node(self.root)
+        }
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "attributes", "start_ns", "end_ns",
+                 "_start_perf", "error")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str] = None,
+                 kind: int = SPAN_KIND_INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self._start_perf = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else self.start_ns + time.perf_counter_ns() - self._start_perf
+        return (end - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, exc: BaseException):
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self):
+        """Finish the span; ending a trace's root span finishes the trace."""
+        if self.end_ns is not None:
+            return
+        # Durations come from the monotonic clock, so they survive clock steps
+        self.end_ns = self.start_ns + time.perf_counter_ns() - self._start_perf
+        self.trace.add(self)
+        if self is self.trace.root:
+            _finish_trace(self.trace)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            # 0 = unset, 2 = error
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 0}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Stands in for a span when nothing is being traced, so callers needn't check."""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_error(self, exc: BaseException):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("trustlens_current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def traceparent() -> Optional[str]:
+    """W3C traceparent header for the current span, so another service can continue the trace."""
+    span = _current_span.get()
+    return f"00-{span.trace.trace_id}-{span.span_id}-01" if span is not None else None
+
+
+def start_trace(name: str, parent: Optional[Span] = None, traceparent: Optional[str] = None,
+                kind: int = SPAN_KIND_SERVER, **attributes: Any) -> Optional[Span]:
+    """
+    Start the root span of a new trace. It is not made current (see use_span)
+    and must be ended explicitly.
+
+    Args:
+        name: Span name
+        parent: Continue this span's trace, e.g. a background job started by a request
+        traceparent: Continue the trace in a W3C traceparent header
+        kind: SPAN_KIND_SERVER for requests, SPAN_KIND_INTERNAL for background work
+        **attributes: Span attributes
+
+    Returns:
+        The root span, or None if tracing is disabled
+    """
+    if not TRACING_ENABLED:
+        return None
+    trace_id = parent_id = None
+    if parent is not None:
+        trace_id, parent_id = parent.trace.trace_id, parent.span_id
+    elif traceparent:
+        m = TRACEPARENT_RX.match(traceparent.strip().lower())
+        if m and m.group(1) != "0" * 32:
+            trace_id, parent_id = m.group(1), m.group(2)
+    trace = Trace(trace_id or secrets.token_hex(16))
+    trace.root = Span(trace, name, parent_id, kind, attributes)
+    return trace.root
+
+
+@contextmanager
+def use_span(span: Optional[Span]) -> Iterator[Optional[Span]]:
+    """Make `span` the parent of spans opened in this block (and tasks started from it)."""
+    token = _current_span.set(span)
+    try:
+        yield span
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def trace(name: str, parent: Optional[Span] = None, **attributes: Any):
+    """Run a block as the root span of its own trace, e.g. one background job."""
+    root = start_trace(name, parent=parent, kind=SPAN_KIND_INTERNAL, **attributes)
+    if root is None:
+        yield NOOP_SPAN
+        return
+    with use_span(root):
+        try:
+            yield root
+        except BaseException as e:
+            root.record_error(e)
+            raise
+        finally:
+            root.end()
+
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any):
+    """
+    Time a block as a child of the current span. Outside a trace this is a
+    no-op that yields NOOP_SPAN.
+
+    Usage:
+        with tracing.span("dns", host=host) as s:
+            ok, ips, err = await resolve_public_ips_async(host)
+            s.set_attribute("dns.ok", ok)
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+    child = Span(parent.trace, name, parent.span_id, kind, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+def _finish_trace(trace: Trace):
+    if trace.dropped_spans:
+        trace.root.set_attribute("trace.dropped_spans", trace.dropped_spans)
+    get_slow_traces().add(trace)
+    exporter = get_trace_exporter()
+    if exporter is not None:
+        exporter.export(trace)
+
+
+# ---------- OTLP/JSON ----------
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # 64-bit integers are strings in OTLP/JSON
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def otlp_request(traces: List[Trace]) -> Dict[str, Any]:
+    """An OTLP ExportTraceServiceRequest, in its JSON encoding, holding every span of `traces`."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+            "scopeSpans": [{
+                "scope": {"name": "trustlens.tracing"},
+                "spans": [span.to_otlp() for t in traces for span in t.spans]
+            }]
+        }]
+    }
+
+
+class TraceExporter:
+    """Writes finished traces to a JSON-lines file and/or an OTLP/HTTP collector, off the request path."""
+
+    def __init__(self, path: Optional[str] = TRACE_FILE, endpoint: Optional[str] = TRACE_OTLP_ENDPOINT,
+                 max_pending: int = TRACE_EXPORT_QUEUE, timeout: float = 5.0):
+        """
+        Args:
+            path: File that gets one ExportTraceServiceRequest per line
+            endpoint: OTLP/HTTP traces URL, e.g. http://localhost:4318/v1/traces
+            max_pending: Traces allowed to wait for export; more are dropped
+            timeout: Collector request timeout, in seconds
+        """
+        self.path = path
+        self.endpoint = endpoint
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.exported = 0
+        self.failed = 0
+        self.dropped = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._client: Optional[httpx.Client] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trustlens-trace-export")
+
+    def export(self, trace: Trace):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending += 1
+        self._executor.submit(self._export, trace)
+
+    def _export(self, trace: Trace):
+        try:
+            body = json.dumps(otlp_request([trace]), ensure_ascii=False, separators=(",", ":"))
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(body + "\n")
+            if self.endpoint:
+                if self._client is None:
+                    self._client = httpx.Client(timeout=self.timeout)
+                resp = self._client.post(self.endpoint, content=body.encode("utf-8"),
+                                         headers={"Content-Type": "application/json"})
+                resp.raise_for_status()
+            self.exported += 1
+        except (OSError, httpx.HTTPError) as e:
+            self.failed += 1
+            print(f"Warning: could not export trace {trace.trace_id}: {e}", file=sys.stderr, flush=True)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def close(self):
+        """Export queued traces and stop the exporter thread."""
+        self._executor.shutdown(wait=True)
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "file": self.path,
+            "endpoint": self.endpoint,
+            "pending": self._pending,
+            "exported": self.exported,
+            "failed": self.failed,
+            "dropped": self.dropped
+        }
+
+
+# ---------- Slow-request log ----------
+
+class SlowTraceLog:
+    """Keeps the `capacity` slowest traces seen, in a min-heap keyed by duration."""
+
+    def __init__(self, capacity: int = TRACE_SLOW_N):
+        self.capacity = capacity
+        self._heap: List[Any] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace):
+        if self.capacity <= 0:
+            return
+        entry = (trace.root.duration_ms, next(self._seq), trace)
+        with self._lock:
+            if len(self._heap) < self.capacity:
+                heapq.heappush(self._heap, entry)
+            elif entry[0] > self._heap[0][0]:
+                heapq.heapreplace(self._heap, entry)
+
+    def worst(self) -> List[Dict[str, Any]]:
+        """Span trees of the kept traces, slowest first."""
+        with self._lock:
+            entries = sorted(self._heap, reverse=True)
+        return [trace.tree() for _, _, trace in entries]
+
+    def clear(self):
+        with self._lock:
+            self._heap = []
+
+
+# Global instances (singleton pattern)
+_slow_traces: Optional[SlowTraceLog] = None
+_exporter: Optional[TraceExporter] = None
+_globals_lock = threading.Lock()
+
+
+def get_slow_traces() -> SlowTraceLog:
+    """Get or create the global slow-request log."""
+    global _slow_traces
+    if _slow_traces is None:
+        with _globals_lock:
+            if _slow_traces is None:
+                _slow_traces = SlowTraceLog()
+    return _slow_traces
+
+
+def get_trace_exporter() -> Optional[TraceExporter]:
+    """Get or create the global exporter, or None if no trace file or collector is configured."""
+    global _exporter
+    if not (TRACE_FILE or TRACE_OTLP_ENDPOINT):
+        return None
+    if _exporter is None:
+        with _globals_lock:
+            if _exporter is None:
+                _exporter = TraceExporter()
+    return _exporter
+
+
+def shutdown_tracing():
+    """Export traces still queued and stop the exporter thread."""
+    global _exporter
+    with _globals_lock:
+        exporter, _exporter = _exporter, None
+    if exporter is not None:
+        exporter.close()
@@ -0,0 +1,216 @@
+"""
+Concurrent Evidence Verification Engine
+Fans out URL verification for every comment in a batch at once, bounded by a
+global concurrency limit and a per-host limit, then reassembles the results in
+the original per-comment order. Runs on the caller's event loop.
+"""
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from evidence import (
+    build_comment_result,
+    detect_pattern_based_evidence,
+    extract_urls_from_text,
+    verify_and_classify_async,
+)
+from performance_monitor import get_monitor
+
+
+# Global cap on URLs being verified at the same time (across all comments)
+MAX_CONCURRENCY = int(os.environ.get("TRUSTLENS_VERIFY_CONCURRENCY", "32"))
+
+# Cap on simultaneous verifications against a single host, so one thread full
+# of wikipedia links doesn't hammer one server
+PER_HOST_LIMIT = int(os.environ.get("TRUSTLENS_VERIFY_PER_HOST", "4"))
+
+
+def fallback_comment_result(comment_id: str, text: str, error: Exception) -> Dict[str, Any]:
+    """
+    Result used when a comment's evidence could not be analyzed at all.
+
+    DNS/URL resolution errors (UnicodeError, ValueError, OSError) are expected
+    for malformed URLs; anything else is reported as a generic analysis error.
+    """
+    if isinstance(error, (UnicodeError, ValueError, OSError)):
+        tl2, tl3 = "Unable to verify sources", "Could not analyze URLs in this comment"
+    else:
+        tl2, tl3 = "Analysis error", "Error analyzing evidence"
+    return {
+        "comment_id": comment_id,
+        "text": text,
+        "urls": [],
+        "status": "None",
+        "results": [],
+        "TL2_tooltip": tl2,
+        "TL3_detail": tl3
+    }
+
+
+class VerificationEngine:
+    """
+    Verifies the URLs of many comments concurrently.
+
+    Every distinct URL in a batch is verified exactly once; comments that share
+    a link share the verification result.
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, per_host_limit: int = PER_HOST_LIMIT):
+        """
+        Args:
+            max_concurrency: Maximum number of URLs verified at the same time
+            per_host_limit: Maximum number of simultaneous verifications per host
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host_limit = max(1, per_host_limit)
+        # asyncio semaphores belong to one event loop, so limits are kept per loop:
+        # loop -> (global semaphore, {host: [semaphore, verifications using it]})
+        # A host's entry is dropped once nothing is running or queued for it, so
+        # the dict only holds hosts with work in flight
+        self._limits = weakref.WeakKeyDictionary()
+
+    def _loop_limits(self) -> Tuple[asyncio.Semaphore, Dict[str, List[Any]]]:
+        loop = asyncio.get_running_loop()
+        limits = self._limits.get(loop)
+        if limits is None:
+            limits = (asyncio.Semaphore(self.max_concurrency), {})
+            self._limits[loop] = limits
+        return limits
+
+    async def _verify_one(self, url: str) -> Dict[str, Any]:
+        monitor = get_monitor()
+        global_sem, hosts = self._loop_limits()
+        try:
+            host = (urlparse(url).hostname or "").lower()
+        except ValueError:
+            host = ""
+        entry = hosts.get(host)
+        if entry is None:
+            entry = hosts[host] = [asyncio.Semaphore(self.per_host_limit), 0]
+        entry[1] += 1
+        try:
+            # Take the host slot first so a queue of same-host links doesn't hold
+            # global slots that other hosts could use
+            async with entry[0], global_sem:
+                with monitor.measure_operation("url_verification"):
+                    result = await verify_and_classify_async(url)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del hosts[host]
+        monitor.record_url_verification(result.get("verified", False), result.get("reason"))
+        return result
+
+    async def verify_urls(self, urls: List[str]) -> Dict[str, Any]:
+        """
+        Verify a list of URLs concurrently.
+
+        Returns:
+            Dict mapping each distinct URL to its verify_and_classify result, or
+            to the exception raised while verifying it
+        """
+        unique = list(dict.fromkeys(urls))
+        outcomes = await asyncio.gather(*(self._verify_one(u) for u in unique), return_exceptions=True)
+        return dict(zip(unique, outcomes))
+
+    async def _verify_safely(self, url: str) -> Any:
+        # Like gather(return_exceptions=True): failures are values, so a task
+        # nobody ends up awaiting never logs an unretrieved exception
+        try:
+            return await self._verify_one(url)
+        except Exception as e:
+            return e
+
+    def start_comments(
+        self, comments: List[Dict[str, str]]
+    ) -> Tuple[List["asyncio.Task[Dict[str, Any]]"], List["asyncio.Task[Any]"]]:
+        """
+        Start analyzing evidence for a batch of comments, verifying all their
+        URLs at once. Must be called from a running event loop.
+
+        Args:
+            comments: [{"comment_id": str, "text": str}, ...]
+
+        Returns:
+            (comment_tasks, url_tasks): one task per comment, in input order,
+            each resolving to that comment's analyze_comment()-shaped result as
+            soon as its own URLs are verified; and one task per distinct URL.
+            Cancelling a comment task does not stop the URL tasks it waits on
+            (other comments may share them), so a caller abandoning the batch
+            must cancel both.
+        """
+        monitor = get_monitor()
+
+        # 1) Extract URLs and pattern cues for every comment up front
+        prepared: List[Optional[Dict[str, Any]]] = []
+        errors: Dict[int, Exception] = {}
+        for i, comment in enumerate(comments):
+            try:
+                with monitor.measure_operation("url_extraction"):
+                    urls = extract_urls_from_text(comment["text"])
+                with monitor.measure_operation("pattern_detection"):
+                    pattern_detection = detect_pattern_based_evidence(comment["text"])
+                prepared.append({"urls": urls, "pattern_detection": pattern_detection})
+            except Exception as e:
+                prepared.append(None)
+                errors[i] = e
+
+        # 2) Start verifying every distinct URL in the batch concurrently
+        verifications = {
+            url: asyncio.ensure_future(self._verify_safely(url))
+            for url in dict.fromkeys(u for p in prepared if p for u in p["urls"])
+        }
+
+        # 3) Each comment completes once the URLs it links to are done
+        async def finish(i: int, comment: Dict[str, str], prep: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            comment_id, text = comment["comment_id"], comment["text"]
+            try:
+                if prep is None:
+                    raise errors[i]
+                link_results = []
+                for url in prep["urls"]:
+                    outcome = await verifications[url]
+                    if isinstance(outcome, Exception):
+                        raise outcome
+                    link_results.append(dict(outcome))
+                result = build_comment_result(
+                    comment_id, text, prep["urls"], link_results, prep["pattern_detection"]
+                )
+            except Exception as e:
+                result = fallback_comment_result(comment_id, text, e)
+            monitor.record_comment_processed()
+            return result
+
+        comment_tasks = [asyncio.ensure_future(finish(i, c, p)) for i, (c, p) in enumerate(zip(comments, prepared))]
+        return comment_tasks, list(verifications.values())
+
+    async def analyze_comments(self, comments: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Analyze evidence for a batch of comments, verifying all their URLs at once.
+
+        Args:
+            comments: [{"comment_id": str, "text": str}, ...]
+
+        Returns:
+            Per-comment results in input order, matching analyze_comment()
+        """
+        comment_tasks, _ = self.start_comments(comments)
+        return list(await asyncio.gather(*comment_tasks))
+
+
+# Global engine instance (singleton pattern)
+_global_engine: Optional[VerificationEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> VerificationEngine:
+    """Get or create the global verification engine."""
+    global _global_engine
+    if _global_engine is None:
+        with _engine_lock:
+            if _global_engine is None:
+                _global_engine = VerificationEngine()
+    return _global_engine
@@ -137,32 +137,80 @@ async function resolveApiBaseOnce() {
     return resolvedApiBase;
 }
 
+// Large threads can take longer than one request should stay open, so the
+// ingest runs as a background job: submit, then poll until it finishes.
+const JOB_POLL_INTERVAL_MS = 1000;
+const JOB_MAX_WAIT_MS = 5 * 60 * 1000;
+
+function sleep(ms) {
+    return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+async function waitForJob(base, job) {
+    const deadline = Date.now() + JOB_MAX_WAIT_MS;
+    while (Date.now() < deadline) {
+        await sleep(JOB_POLL_INTERVAL_MS);
+        const res = await fetch(`${base}${job.result_url}`);
+        if (res.status === 202) {
+            const status = await res.json();
+            console.log(`TrustLens: job ${status.status} (${status.completed_comments}/${status.total_comments} comments)`);
+            continue;
+        }
+        if (!res.ok) {
+            console.error("TrustLens: job result responded with error:", res.status);
+            return null;
+        }
+        return res.json();
+    }
+    console.error("TrustLens: gave up waiting for ingest job", job.job_id);
+    return null;
+}
+
 async function sendToApi(payload) {
     const base = await resolveApiBaseOnce();
     console.log("TrustLens: Sending to /ingest at:", base);
     const controller = new AbortController();
+    // Only the submission is bounded by this timeout; the job itself may run longer
     const timeout = setTimeout(() => controller.abort(), 8000);
+    let job = null;
     try {
-        const res = await fetch(`${base}/ingest`, {
+        const res = await fetch(`${base}/ingest?mode=job`, {
             method: "POST",
             headers: { "Content-Type": "application/json" },
             body: JSON.stringify(payload),
             signal: controller.signal,
         });
+        if (res.status === 429) {
+            console.error("TrustLens: /ingest queue is full, try again shortly");
+            return;
+        }
         if (!res.ok) {
             console.error("TrustLens: /ingest responded with error:", res.status);
-        } else {
-            console.log("TrustLens: Successfully sent to /ingest!");
+            return;
         }
+        job = await res.json();
+        console.log("TrustLens: Ingest job queued:", job.job_id);
     } catch (e) {
         if (e.name === 'AbortError') {
             console.error("TrustLens: /ingest request timed out");
         } else {
             console.error("TrustLens: Failed to reach /ingest API:", e);
         }
+        return;
     } finally {
         clearTimeout(timeout);
     }
+
+    try {
+        const result = await waitForJob(base, job);
+        if (result && result.status === "ok") {
+            console.log("TrustLens: Successfully analyzed post:", result.saved_to);
+        } else if (result) {
+            console.error("TrustLens: ingest job failed:", result.message);
+        }
+    } catch (e) {
+        console.error("TrustLens: Failed to poll ingest job:", e);
+    }
 }
 
 async function processPost(postUrl) {